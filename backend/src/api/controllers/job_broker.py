@@ -0,0 +1,340 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional, Tuple
+
+# "" runs research in the API process; "sqlite" hands it to worker processes (src/worker.py)
+JOB_BROKER = os.getenv("JOB_BROKER", "")
+JOB_BROKER_PATH = os.getenv("JOB_BROKER_PATH", "jobs.sqlite3")
+# Seconds without a heartbeat after which a running job's worker is presumed dead
+JOB_WORKER_TIMEOUT = float(os.getenv("JOB_WORKER_TIMEOUT", 60))
+# Seconds a job may wait for a worker, e.g. while none is running, before it is failed
+JOB_QUEUE_TIMEOUT = float(os.getenv("JOB_QUEUE_TIMEOUT", 1800))
+
+_job_broker = None
+_job_broker_lock = threading.Lock()
+
+
+class JobBroker(ABC):
+    """
+    Hands research jobs from API processes to worker processes and routes their events back.
+
+    API processes enqueue jobs and read their events; workers claim jobs and publish
+    events, so any API process can stream a job to the websocket following it.
+    Cancellation requests and client input (human feedback) travel the other way.
+    """
+
+    @abstractmethod
+    def enqueue(self, job_id: str, user_id: str, params: Dict[str, Any]) -> None:
+        """Adds a queued job."""
+
+    @abstractmethod
+    def claim(self, worker_id: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        """Marks the oldest queued job as running on the worker and returns (job_id, user_id, params)."""
+
+    @abstractmethod
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the job's user_id, status, cancel flag and heartbeat, or None."""
+
+    @abstractmethod
+    def count_active(self, user_id: str) -> int:
+        """Number of the user's queued or running jobs, not counting stale ones (see `expire_stale`)."""
+
+    @abstractmethod
+    def set_status(self, job_id: str, status: str, expected: Optional[str] = None) -> bool:
+        """
+        Updates the job's status, only if it is still `expected` when given.
+        Returns whether the job was updated.
+        """
+
+    @abstractmethod
+    def expire_stale(self) -> List[str]:
+        """
+        Fails running jobs whose worker stopped sending heartbeats and jobs left queued too long,
+        publishing a job event for each. Returns their ids.
+        """
+
+    @abstractmethod
+    def heartbeat(self, job_ids: List[str]) -> None:
+        """Records that the jobs' worker is alive."""
+
+    @abstractmethod
+    def publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        """Appends an event to the job's stream."""
+
+    @abstractmethod
+    def publish_many(self, job_id: str, events: List[Dict[str, Any]], status: Optional[str] = None) -> None:
+        """Appends events to the job's stream and optionally updates its status, in one write."""
+
+    @abstractmethod
+    def read_events(self, job_id: str, after: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+        """Returns the job's (sequence, event) pairs published after sequence `after`."""
+
+    @abstractmethod
+    def watch(self, job_ids: List[str]) -> None:
+        """Records that the jobs have subscribers in this API process."""
+
+    @abstractmethod
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """
+        Asks the worker running the job to cancel it, or cancels it outright if still queued.
+        Returns the job's status before the request, or None if there is no such job.
+        """
+
+    @abstractmethod
+    def jobs_to_cancel(self, job_ids: List[str], abandon_timeout: float) -> List[str]:
+        """Returns the jobs among `job_ids` with a cancellation request or unwatched for `abandon_timeout` seconds."""
+
+    @abstractmethod
+    def send_input(self, job_id: str, message: str) -> None:
+        """Queues a client message for the job."""
+
+    @abstractmethod
+    def read_input(self, job_id: str) -> Optional[str]:
+        """Pops the job's oldest client message, if any."""
+
+    @abstractmethod
+    def prune(self, retention: float) -> None:
+        """
+        Expires stale jobs, then deletes jobs, with their events and input,
+        finished more than `retention` seconds ago.
+        """
+
+
+class SQLiteJobBroker(JobBroker):
+    """
+    Job broker on a SQLite database shared by the processes of one host.
+
+    The database runs in WAL mode so workers writing events don't block API processes reading them.
+    """
+
+    def __init__(self, path: str = JOB_BROKER_PATH, worker_timeout: float = JOB_WORKER_TIMEOUT,
+                 queue_timeout: float = JOB_QUEUE_TIMEOUT):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.worker_timeout = worker_timeout
+        self.queue_timeout = queue_timeout
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, user_id TEXT, params TEXT, status TEXT, worker TEXT, "
+            "cancel_requested INTEGER DEFAULT 0, created_at REAL, heartbeat_at REAL, watched_at REAL, "
+            "finished_at REAL);"
+            "CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);"
+            "CREATE TABLE IF NOT EXISTS job_events ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, data TEXT);"
+            "CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, seq);"
+            "CREATE TABLE IF NOT EXISTS job_input ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, job_id TEXT, data TEXT);"
+        )
+
+    @contextmanager
+    def _transaction(self):
+        """Runs the block in a write transaction; the caller holds `_lock`."""
+        self._conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+            self._conn.execute("COMMIT")
+        except BaseException:
+            self._conn.execute("ROLLBACK")
+            raise
+
+    def enqueue(self, job_id: str, user_id: str, params: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, user_id, params, status, created_at, watched_at) "
+                "VALUES (?, ?, ?, 'queued', ?, ?)",
+                (job_id, user_id, json.dumps(params), time.time(), time.time()),
+            )
+
+    def claim(self, worker_id: str) -> Optional[Tuple[str, str, Dict[str, Any]]]:
+        # BEGIN IMMEDIATE takes the write lock, so two workers never claim the same job
+        with self._lock, self._transaction():
+            self._expire_stale()
+            row = self._conn.execute(
+                "SELECT id, user_id, params FROM jobs WHERE status = 'queued' "
+                "AND cancel_requested = 0 ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = 'running', worker = ?, heartbeat_at = ? WHERE id = ?",
+                    (worker_id, time.time(), row[0]),
+                )
+        if row is None:
+            return None
+        return row[0], row[1], json.loads(row[2])
+
+    def get_job(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT user_id, status, cancel_requested, heartbeat_at FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"user_id": row[0], "status": row[1], "cancel_requested": bool(row[2]), "heartbeat_at": row[3]}
+
+    def count_active(self, user_id: str) -> int:
+        # Expire first: jobs of a crashed worker, or queued with no worker, would count forever
+        with self._lock, self._transaction():
+            self._expire_stale()
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE user_id = ? AND status IN ('queued', 'running')", (user_id,)
+            ).fetchone()[0]
+
+    def set_status(self, job_id: str, status: str, expected: Optional[str] = None) -> bool:
+        finished_at = time.time() if status not in ("queued", "running") else None
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND (? IS NULL OR status = ?)",
+                (status, finished_at, job_id, expected, expected),
+            )
+        return cursor.rowcount > 0
+
+    def expire_stale(self) -> List[str]:
+        with self._lock, self._transaction():
+            return self._expire_stale()
+
+    def _expire_stale(self) -> List[str]:
+        """Fails stale jobs; the caller holds `_lock` in a write transaction."""
+        now = time.time()
+        rows = self._conn.execute(
+            "SELECT id, status FROM jobs WHERE (status = 'running' AND heartbeat_at < ?) "
+            "OR (status = 'queued' AND created_at < ?)",
+            (
+                now - self.worker_timeout if self.worker_timeout else 0,
+                now - self.queue_timeout if self.queue_timeout else 0,
+            ),
+        ).fetchall()
+        for job_id, status in rows:
+            error = (
+                "The worker running this job stopped responding" if status == "running"
+                else "No worker picked up this job in time"
+            )
+            self._conn.execute(
+                "UPDATE jobs SET status = 'failed', finished_at = ? WHERE id = ?", (now, job_id)
+            )
+            # Relaying API processes learn the outcome like any other status change
+            self._conn.execute(
+                "INSERT INTO job_events (job_id, data) VALUES (?, ?)",
+                (job_id, json.dumps({"type": "job", "job_id": job_id, "status": "failed",
+                                     "finished_at": now, "error": error})),
+            )
+        return [job_id for job_id, _ in rows]
+
+    def heartbeat(self, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET heartbeat_at = ? WHERE id = ?", [(time.time(), job_id) for job_id in job_ids]
+            )
+
+    def publish(self, job_id: str, event: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO job_events (job_id, data) VALUES (?, ?)", (job_id, json.dumps(event, default=str))
+            )
+
+    def publish_many(self, job_id: str, events: List[Dict[str, Any]], status: Optional[str] = None) -> None:
+        finished_at = time.time() if status not in ("queued", "running") else None
+        with self._lock, self._transaction():
+            self._conn.executemany(
+                "INSERT INTO job_events (job_id, data) VALUES (?, ?)",
+                [(job_id, json.dumps(event, default=str)) for event in events],
+            )
+            if status is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ?", (status, finished_at, job_id)
+                )
+
+    def read_events(self, job_id: str, after: int = 0) -> List[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq", (job_id, after)
+            ).fetchall()
+        return [(seq, json.loads(data)) for seq, data in rows]
+
+    def watch(self, job_ids: List[str]) -> None:
+        if not job_ids:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "UPDATE jobs SET watched_at = ? WHERE id = ?", [(time.time(), job_id) for job_id in job_ids]
+            )
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        # Same write lock as claim, so a queued job is either claimed or cancelled, not both
+        with self._lock, self._transaction():
+            row = self._conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+            if row is not None:
+                self._conn.execute(
+                    "UPDATE jobs SET cancel_requested = 1, "
+                    "status = CASE WHEN status = 'queued' THEN 'cancelled' ELSE status END, "
+                    "finished_at = CASE WHEN status = 'queued' THEN ? ELSE finished_at END "
+                    "WHERE id = ?",
+                    (time.time(), job_id),
+                )
+        return row[0] if row is not None else None
+
+    def jobs_to_cancel(self, job_ids: List[str], abandon_timeout: float) -> List[str]:
+        if not job_ids:
+            return []
+        placeholders = ",".join("?" for _ in job_ids)
+        watched_after = time.time() - abandon_timeout if abandon_timeout else 0
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT id FROM jobs WHERE id IN ({placeholders}) "
+                "AND (cancel_requested = 1 OR watched_at < ?)",
+                [*job_ids, watched_after],
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def send_input(self, job_id: str, message: str) -> None:
+        with self._lock:
+            self._conn.execute("INSERT INTO job_input (job_id, data) VALUES (?, ?)", (job_id, message))
+
+    def read_input(self, job_id: str) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, data FROM job_input WHERE job_id = ? ORDER BY id LIMIT 1", (job_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._conn.execute("DELETE FROM job_input WHERE id = ?", (row[0],))
+        return row[1]
+
+    def prune(self, retention: float) -> None:
+        cutoff = time.time() - retention
+        with self._lock, self._transaction():
+            # Stale jobs get a finished_at here, so they are deleted once past retention too
+            self._expire_stale()
+            self._conn.execute(
+                "DELETE FROM job_events WHERE job_id IN (SELECT id FROM jobs WHERE finished_at < ?)", (cutoff,)
+            )
+            self._conn.execute(
+                "DELETE FROM job_input WHERE job_id IN (SELECT id FROM jobs WHERE finished_at < ?)", (cutoff,)
+            )
+            self._conn.execute("DELETE FROM jobs WHERE finished_at < ?", (cutoff,))
+
+
+def get_job_broker() -> Optional[JobBroker]:
+    """Returns the process-wide job broker, or None when research runs in the API process."""
+    global _job_broker
+    if not JOB_BROKER:
+        return None
+    with _job_broker_lock:
+        if _job_broker is None:
+            if JOB_BROKER == "sqlite":
+                _job_broker = SQLiteJobBroker(JOB_BROKER_PATH)
+            else:
+                raise ValueError(f"Unknown JOB_BROKER: {JOB_BROKER}")
+    return _job_broker
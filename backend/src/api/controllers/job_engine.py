@@ -0,0 +1,433 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+from enum import Enum
+from typing import Any, Deque, Dict, List, Optional, Set
+
+from src.services.gpt_researcher.utils.enum import Tone
+from src.services.firebase.firestore_utils import invalidate_user_cache, update_user_tokens
+from src.api.controllers.job_broker import JOB_WORKER_TIMEOUT, JobBroker, get_job_broker
+
+JOB_MAX_WORKERS = int(os.getenv("JOB_MAX_WORKERS", 8))
+JOB_MAX_PER_USER = int(os.getenv("JOB_MAX_PER_USER", 2))
+# Seconds a job may run with nobody subscribed before it is cancelled
+JOB_ABANDON_TIMEOUT = float(os.getenv("JOB_ABANDON_TIMEOUT", 60))
+# Seconds a finished job stays available to late subscribers
+JOB_RETENTION = float(os.getenv("JOB_RETENTION", 600))
+JOB_EVENT_HISTORY = int(os.getenv("JOB_EVENT_HISTORY", 2000))
+# With a job broker: how often events are polled (the worker timeout is set in job_broker)
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", 0.1))
+
+_job_engine = None
+
+
+class JobStatus(str, Enum):
+    """Research job states"""
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+
+FINISHED_STATUSES = {JobStatus.COMPLETED, JobStatus.FAILED, JobStatus.CANCELLED}
+
+
+class JobLimitError(ValueError):
+    """Raised when a user already has the maximum number of active jobs"""
+
+
+class JobEventStream:
+    """
+    Stands in for the websocket while a job runs.
+
+    The research code sends its frames here, and they are fanned out to every subscriber.
+    Recent frames are kept so a client reconnecting to the job gets the output so far.
+    Messages from the client, such as human feedback, are read with `receive_text`.
+    """
+
+    def __init__(self, user_id: str, history_size: int = JOB_EVENT_HISTORY):
+        self.user_id = user_id
+        self.history: Deque[Dict[str, Any]] = deque(maxlen=history_size)
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._inbox: asyncio.Queue = asyncio.Queue()
+
+    async def send_json(self, data: Dict[str, Any], mode: str = "text") -> None:
+        self.publish(data)
+
+    async def send_text(self, data: str) -> None:
+        self.publish(json.loads(data))
+
+    def publish(self, data: Dict[str, Any]) -> None:
+        self.history.append(data)
+        for queue in self.subscribers:
+            queue.put_nowait(data)
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue()
+        for data in self.history:
+            queue.put_nowait(data)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self.subscribers.discard(queue)
+
+    async def receive_text(self) -> str:
+        return await self._inbox.get()
+
+    def put_input(self, message: str) -> None:
+        self._inbox.put_nowait(message)
+
+    async def flush(self) -> None:
+        """Waits until published events are delivered; local streams deliver immediately."""
+
+
+class BrokerEventStream(JobEventStream):
+    """
+    Event stream of a job running in a worker process: events and status go to the job broker.
+
+    Events are queued in memory and written by a background task off the event loop; whatever
+    accumulates while a write is in progress goes out in the next write, as one transaction.
+    """
+
+    def __init__(self, broker: JobBroker, job_id: str, user_id: str):
+        super().__init__(user_id, history_size=0)
+        self.broker = broker
+        self.job_id = job_id
+        self._pending: List[Dict[str, Any]] = []
+        self._writer: Optional[asyncio.Task] = None
+
+    def publish(self, data: Dict[str, Any]) -> None:
+        self._pending.append(data)
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_events())
+
+    async def _write_events(self) -> None:
+        while self._pending:
+            batch, self._pending = self._pending, []
+            # The broker already marked the job running when it was claimed; never hand it back to the queue
+            statuses = [
+                data["status"] for data in batch
+                if data.get("type") == "job" and data.get("status") != JobStatus.QUEUED.value
+            ]
+            try:
+                await asyncio.to_thread(
+                    self.broker.publish_many, self.job_id, batch, statuses[-1] if statuses else None
+                )
+            except Exception as e:
+                print(f"Error writing {len(batch)} events of job {self.job_id} to the broker: {str(e)}")
+
+    async def flush(self) -> None:
+        while self._writer is not None and not self._writer.done():
+            await asyncio.shield(self._writer)
+
+    async def receive_text(self) -> str:
+        while True:
+            message = await asyncio.to_thread(self.broker.read_input, self.job_id)
+            if message is not None:
+                return message
+            await asyncio.sleep(JOB_POLL_INTERVAL)
+
+
+class ResearchJob:
+    """A research run and its event stream"""
+
+    def __init__(
+        self,
+        user_id: str,
+        params: Dict[str, Any],
+        job_id: Optional[str] = None,
+        events: Optional[JobEventStream] = None,
+    ):
+        self.id = job_id or uuid.uuid4().hex
+        self.user_id = user_id
+        self.params = params
+        self.status = JobStatus.QUEUED
+        self.events = events or JobEventStream(user_id)
+        self.task: Optional[asyncio.Task] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[str] = None
+        self._abandon_timer: Optional[asyncio.TimerHandle] = None
+        self._detached = False
+
+    @property
+    def finished(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status.value,
+            "task": self.params.get("task"),
+            "report_type": self.params.get("report_type"),
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "error": self.error,
+        }
+
+
+class JobEngine:
+    """
+    Runs research jobs in the background, decoupled from the websocket that asked for them.
+
+    At most `max_workers` jobs run at once across the process and each user may have
+    `max_jobs_per_user` queued or running jobs. Cancelling a job cancels its task, which
+    propagates into the researcher and its subtopic tasks. A job nobody has subscribed to
+    for `abandon_timeout` seconds is cancelled too, so research nobody is listening to
+    stops using LLM and scrape resources.
+
+    With a `broker`, jobs run in worker processes (src/worker.py) instead: the engine enqueues
+    them and relays their events from the broker, so any API process can serve any job.
+    The worker count is then set by the workers, and workers cancel the jobs no API process
+    has watched for `abandon_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = JOB_MAX_WORKERS,
+        max_jobs_per_user: int = JOB_MAX_PER_USER,
+        abandon_timeout: float = JOB_ABANDON_TIMEOUT,
+        retention: float = JOB_RETENTION,
+        broker: Optional[JobBroker] = None,
+    ):
+        self.max_workers = max_workers
+        self.max_jobs_per_user = max_jobs_per_user
+        self.abandon_timeout = abandon_timeout
+        self.retention = retention
+        self.broker = broker
+        self.jobs: Dict[str, ResearchJob] = {}
+        self._semaphore = asyncio.Semaphore(max_workers)
+
+    async def submit(self, user_id: str, params: Dict[str, Any]) -> ResearchJob:
+        """Queues a research job for the user and starts its task."""
+        if self.max_jobs_per_user:
+            if self.broker is not None:
+                active = await asyncio.to_thread(self.broker.count_active, user_id)
+            else:
+                active = len(self.active_jobs(user_id))
+            if active >= self.max_jobs_per_user:
+                raise JobLimitError(
+                    f"You already have {self.max_jobs_per_user} research tasks running. "
+                    "Wait for one to finish or cancel it."
+                )
+
+        job = ResearchJob(user_id, params)
+        if self.broker is not None:
+            await asyncio.to_thread(self.broker.enqueue, job.id, user_id, params)
+            await asyncio.to_thread(self.broker.publish, job.id, {"type": "job", **job.to_dict()})
+        self.start(job)
+        return job
+
+    def start(self, job: ResearchJob) -> None:
+        """Starts the task of a job: its research run, or with a broker the relay of its events."""
+        self.jobs[job.id] = job
+        job.task = asyncio.create_task(self._relay(job) if self.broker is not None else self._run(job))
+        # Nobody is subscribed yet; the submitter is expected to subscribe right away
+        self._schedule_abandon(job)
+
+    async def get_job(self, job_id: str, user_id: Optional[str] = None) -> Optional[ResearchJob]:
+        job = self.jobs.get(job_id)
+        if job is None and self.broker is not None and job_id:
+            # The job was submitted through another API process; relay it from the broker
+            row = await asyncio.to_thread(self.broker.get_job, job_id)
+            if row is not None and job_id not in self.jobs:
+                job = ResearchJob(row["user_id"], {}, job_id=job_id)
+                self.start(job)
+        if job is None or (user_id is not None and job.user_id != user_id):
+            return None
+        return job
+
+    def active_jobs(self, user_id: Optional[str] = None) -> List[ResearchJob]:
+        return [
+            job for job in self.jobs.values()
+            if not job.finished and (user_id is None or job.user_id == user_id)
+        ]
+
+    async def cancel(self, job_id: str, user_id: Optional[str] = None) -> bool:
+        """Cancels a queued or running job. Returns whether there was one to cancel."""
+        job = await self.get_job(job_id, user_id)
+        if job is None or job.finished or job.task is None:
+            return False
+        if self.broker is not None:
+            # The worker cancels the running job and reports it; a queued job is cancelled here
+            status = await asyncio.to_thread(self.broker.request_cancel, job.id)
+            if status == JobStatus.QUEUED.value:
+                job.finished_at = time.time()
+                job.status = JobStatus.CANCELLED
+                await asyncio.to_thread(self.broker.publish, job.id, {"type": "job", **job.to_dict()})
+            return status in (JobStatus.QUEUED.value, JobStatus.RUNNING.value)
+        job.task.cancel()
+        return True
+
+    async def send_input(self, job: ResearchJob, message: str) -> None:
+        """Passes a client message, such as human feedback, to a running job."""
+        if self.broker is not None:
+            await asyncio.to_thread(self.broker.send_input, job.id, message)
+        else:
+            job.events.put_input(message)
+
+    def subscribe(self, job: ResearchJob) -> asyncio.Queue:
+        """Returns a queue of the job's events, starting with those already sent."""
+        if job._abandon_timer is not None:
+            job._abandon_timer.cancel()
+            job._abandon_timer = None
+        return job.events.subscribe()
+
+    def unsubscribe(self, job: ResearchJob, queue: asyncio.Queue) -> None:
+        job.events.unsubscribe(queue)
+        if not job.events.subscribers and not job.finished:
+            self._schedule_abandon(job)
+
+    def _schedule_abandon(self, job: ResearchJob) -> None:
+        if not self.abandon_timeout:
+            return
+        if job._abandon_timer is not None:
+            job._abandon_timer.cancel()
+        job._abandon_timer = asyncio.get_running_loop().call_later(
+            self.abandon_timeout, self._abandon, job
+        )
+
+    def _abandon(self, job: ResearchJob) -> None:
+        job._abandon_timer = None
+        if job.events.subscribers or job.finished:
+            return
+        if self.broker is not None:
+            # Stop relaying; the worker cancels the job once no API process watches it
+            job._detached = True
+            job.task.cancel()
+        elif job.task is not None and not job.task.done():
+            job.task.cancel()
+            print(f"Cancelling research job {job.id}: no subscribers for {self.abandon_timeout:.0f}s")
+
+    def _set_status(self, job: ResearchJob, status: JobStatus) -> None:
+        job.status = status
+        job.events.publish({"type": "job", **job.to_dict()})
+
+    async def _run(self, job: ResearchJob) -> None:
+        # Imported here as the websocket manager imports this module
+        from src.api.controllers.websocket_manager import run_agent
+
+        self._set_status(job, JobStatus.QUEUED)
+        try:
+            async with self._semaphore:
+                job.started_at = time.time()
+                self._set_status(job, JobStatus.RUNNING)
+                params = job.params
+                result = await run_agent(
+                    params["task"],
+                    params["report_type"],
+                    params["report_source"],
+                    params["source_urls"],
+                    Tone[params["tone"]],
+                    job.events,
+                    params.get("headers"),
+                )
+
+            if result and result.get("user_id"):
+                # Deduct one token for the research generation
+                try:
+                    await update_user_tokens(result["user_id"], -1, "Research generation")
+                except Exception as e:
+                    print(f"Error deducting token for research job {job.id}: {str(e)}")
+                job.finished_at = time.time()
+                self._set_status(job, JobStatus.COMPLETED)
+            else:
+                job.error = "Research failed"
+                job.finished_at = time.time()
+                self._set_status(job, JobStatus.FAILED)
+        except asyncio.CancelledError:
+            job.finished_at = time.time()
+            self._set_status(job, JobStatus.CANCELLED)
+        except Exception as e:
+            print(f"Error in research job {job.id}: {str(e)}")
+            job.error = str(e)
+            job.finished_at = time.time()
+            self._set_status(job, JobStatus.FAILED)
+        finally:
+            if job._abandon_timer is not None:
+                job._abandon_timer.cancel()
+                job._abandon_timer = None
+            # With a broker, the final status must be written before the worker forgets the job
+            await job.events.flush()
+            asyncio.get_running_loop().call_later(self.retention, self.jobs.pop, job.id, None)
+
+    async def _relay(self, job: ResearchJob) -> None:
+        """Publishes the events a worker process sends for the job to the job's local subscribers."""
+        after = 0
+        last_event_at = last_watched_at = time.time()
+        try:
+            while not job.finished:
+                events = await asyncio.to_thread(self.broker.read_events, job.id, after)
+                for after, event in events:
+                    if event.get("type") == "job":
+                        job.status = JobStatus(event["status"])
+                        job.started_at = event.get("started_at", job.started_at)
+                        job.finished_at = event.get("finished_at")
+                        job.error = event.get("error")
+                    job.events.publish(event)
+                if job.finished:
+                    break
+
+                now = time.time()
+                if events:
+                    last_event_at = now
+                if job.events.subscribers and now - last_watched_at >= min(5.0, self.abandon_timeout or 5.0):
+                    await asyncio.to_thread(self.broker.watch, [job.id])
+                    last_watched_at = now
+                if now - last_event_at >= JOB_WORKER_TIMEOUT:
+                    row = await asyncio.to_thread(self.broker.get_job, job.id)
+                    stale = row is not None and (
+                        row["status"] == JobStatus.RUNNING.value
+                        and (row["heartbeat_at"] or 0) < now - JOB_WORKER_TIMEOUT
+                    )
+                    # Record the failure in the broker too, so the job stops counting against the
+                    # user's limit and gets pruned; a status the worker wrote meanwhile is kept
+                    if stale:
+                        stale = await asyncio.to_thread(
+                            self.broker.set_status, job.id, JobStatus.FAILED.value, JobStatus.RUNNING.value
+                        )
+                    if row is None or stale:
+                        job.error = "The worker running this job stopped responding"
+                        job.finished_at = now
+                        self._set_status(job, JobStatus.FAILED)
+                        break
+                    last_event_at = now
+                await asyncio.sleep(JOB_POLL_INTERVAL)
+            # The worker process deducted tokens outside this process's user cache
+            invalidate_user_cache(job.user_id)
+        except asyncio.CancelledError:
+            if job._detached:
+                self.jobs.pop(job.id, None)
+                return
+            raise
+        finally:
+            if job._abandon_timer is not None:
+                job._abandon_timer.cancel()
+                job._abandon_timer = None
+        asyncio.get_running_loop().call_later(self.retention, self.jobs.pop, job.id, None)
+
+    def metrics(self) -> Dict[str, Any]:
+        active = self.active_jobs()
+        return {
+            "max_workers": self.max_workers,
+            "max_jobs_per_user": self.max_jobs_per_user,
+            "running": sum(1 for job in active if job.status == JobStatus.RUNNING),
+            "queued": sum(1 for job in active if job.status == JobStatus.QUEUED),
+            "retained": len(self.jobs),
+            "broker": type(self.broker).__name__ if self.broker is not None else None,
+        }
+
+
+def get_job_engine() -> JobEngine:
+    """Returns the process-wide research job engine."""
+    global _job_engine
+    if _job_engine is None:
+        _job_engine = JobEngine(broker=get_job_broker())
+    return _job_engine
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+from prometheus_client import Counter, Gauge
+
+OUTBOUND_QUEUE_SIZE = int(os.getenv("OUTBOUND_QUEUE_SIZE", 256))
+
+# Frame types that may be merged or dropped when a connection falls behind
+DROPPABLE_TYPES = {"logs"}
+
+# Metrics
+outbound_queue_depth = Gauge('websocket_outbound_queue_depth', 'Frames waiting in websocket outbound queues')
+outbound_dropped = Counter('websocket_outbound_dropped_total', 'Outbound websocket frames dropped', ['type'])
+outbound_merged = Counter('websocket_outbound_merged_total', 'Outbound websocket frames merged into a queued frame', ['type'])
+
+
+class OutboundQueue:
+    """
+    Bounded queue of frames waiting to be sent on one websocket.
+
+    When a slow client lets `max_size` frames pile up, verbose `logs` frames give way first:
+    a new logs frame is merged into a queued one or dropped, and other frames evict the
+    oldest queued logs frame. Report, error and other frames are never dropped; if only
+    those are queued, consecutive report chunks are merged and the queue may run over.
+    Exposes `send_json`/`send_text` so it can stand in for the websocket as an output.
+    """
+
+    def __init__(self, max_size: int = OUTBOUND_QUEUE_SIZE):
+        self.max_size = max_size
+        self._frames: Deque[Dict[str, Any]] = deque()
+        self._not_empty = asyncio.Event()
+        self._closed = False
+        self.dropped = 0
+        self.merged = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    async def send_json(self, data: Dict[str, Any], mode: str = "text") -> None:
+        self.put(data)
+
+    async def send_text(self, data: str) -> None:
+        self.put(json.loads(data))
+
+    def put(self, frame: Dict[str, Any]) -> None:
+        if self._closed:
+            return
+        frame_type = frame.get("type")
+        if len(self._frames) >= self.max_size:
+            if frame_type in DROPPABLE_TYPES:
+                if not self._merge_into_last(frame):
+                    self._count_drop(frame_type)
+                return
+            if not self._evict_droppable() and self._merge_into_last(frame):
+                return
+        self._frames.append(frame)
+        outbound_queue_depth.inc()
+        self._not_empty.set()
+
+    def _merge_into_last(self, frame: Dict[str, Any]) -> bool:
+        """Appends the frame's output to the last queued frame of the same type, if it only carries output."""
+        last = self._frames[-1] if self._frames else None
+        if (
+            last is None or last.get("type") != frame.get("type")
+            or not isinstance(last.get("output"), str) or not isinstance(frame.get("output"), str)
+            or last.get("metadata") or frame.get("metadata")
+        ):
+            return False
+        separator = "\n" if frame.get("type") in DROPPABLE_TYPES else ""
+        # Frames may be shared with other subscribers of a job, so replace rather than modify
+        self._frames[-1] = {**last, "output": f"{last['output']}{separator}{frame['output']}"}
+        self.merged += 1
+        outbound_merged.labels(type=frame.get("type")).inc()
+        return True
+
+    def _evict_droppable(self) -> bool:
+        for index, queued in enumerate(self._frames):
+            if queued.get("type") in DROPPABLE_TYPES:
+                del self._frames[index]
+                outbound_queue_depth.dec()
+                self._count_drop(queued.get("type"))
+                return True
+        return False
+
+    def _count_drop(self, frame_type: Optional[str]) -> None:
+        self.dropped += 1
+        outbound_dropped.labels(type=frame_type or "unknown").inc()
+
+    async def get(self) -> Optional[Dict[str, Any]]:
+        """Waits for the next frame. Returns None once the queue is closed."""
+        while not self._frames:
+            if self._closed:
+                return None
+            self._not_empty.clear()
+            await self._not_empty.wait()
+        outbound_queue_depth.dec()
+        return self._frames.popleft()
+
+    def close(self) -> None:
+        """Discards the queued frames and wakes the sender so it can stop."""
+        self._closed = True
+        outbound_queue_depth.dec(len(self._frames))
+        self._frames.clear()
+        self._not_empty.set()
+
+    def metrics(self) -> Dict[str, int]:
+        return {"depth": len(self._frames), "dropped": self.dropped, "merged": self.merged}
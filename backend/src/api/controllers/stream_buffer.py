@@ -0,0 +1,69 @@
+import asyncio
+import json
+import os
+from typing import Any, Dict, List, Optional
+
+from fastapi import WebSocket
+
+STREAM_FLUSH_INTERVAL = float(os.getenv("STREAM_FLUSH_INTERVAL", 0.05))
+STREAM_FLUSH_BYTES = int(os.getenv("STREAM_FLUSH_BYTES", 4096))
+
+# Frame types that may wait in the buffer; anything else (errors, paths, ...) flushes immediately
+BATCHABLE_TYPES = {"logs", "report"}
+
+
+class BufferedWebSocket:
+    """
+    Per-connection output buffer for clients that opt in with `stream_batching`.
+
+    Frames sent through `send_json` are buffered and flushed every `flush_interval`
+    seconds or once about `max_bytes` are pending. Consecutive report chunks are
+    concatenated into one report frame, and a flush holding several frames sends
+    them as one `{"type": "batch", "messages": [...]}` frame, in order.
+    Every other attribute is read from the wrapped websocket.
+    """
+
+    def __init__(self, websocket: WebSocket, flush_interval: float = STREAM_FLUSH_INTERVAL, max_bytes: int = STREAM_FLUSH_BYTES):
+        self.websocket = websocket
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self._buffer: List[Dict[str, Any]] = []
+        self._pending_bytes = 0
+        self._lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    def __getattr__(self, name):
+        return getattr(self.websocket, name)
+
+    async def send_json(self, data: Dict[str, Any], mode: str = "text") -> None:
+        frame_type = data.get("type")
+        last = self._buffer[-1] if self._buffer else None
+        if (
+            frame_type == "report" and last is not None and last.get("type") == "report"
+            and set(data) == {"type", "output"} and set(last) == {"type", "output"}
+        ):
+            last["output"] += data["output"]
+        else:
+            self._buffer.append(dict(data))
+        self._pending_bytes += len(str(data.get("output") or "")) + len(str(data.get("content") or "")) + 32
+
+        if frame_type not in BATCHABLE_TYPES or self._pending_bytes >= self.max_bytes:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    async def flush(self) -> None:
+        async with self._lock:
+            if not self._buffer:
+                return
+            messages, self._buffer, self._pending_bytes = self._buffer, [], 0
+            payload = messages[0] if len(messages) == 1 else {"type": "batch", "messages": messages}
+            await self.websocket.send_text(json.dumps(payload))
+
+    async def close(self) -> None:
+        """Flushes what is left in the buffer. The wrapped websocket stays open."""
+        await self.flush()
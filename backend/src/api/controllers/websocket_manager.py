@@ -1,7 +1,7 @@
 import asyncio
 import datetime
 import json
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 from enum import Enum
 from dotenv import load_dotenv
 
@@ -11,8 +11,11 @@ from src.services.gpt_researcher.report_type import BasicReport, DetailedReport
 from src.services.gpt_researcher.utils.enum import ReportType, Tone
 from src.services.multi_agents.main import run_research_task
 from src.services.gpt_researcher.orchestrator.actions import stream_output
-from src.services.firebase.firebase import verify_firebase_token
+from src.services.firebase.auth_utils import verify_firebase_token
 from src.services.firebase.firebase import db
+from src.api.controllers.stream_buffer import BufferedWebSocket
+from src.api.controllers.outbound_queue import OutboundQueue
+from src.api.controllers.job_engine import FINISHED_STATUSES, JobStatus, ResearchJob, get_job_engine
 
 class ConnectionState(str, Enum):
     """WebSocket connection states"""
@@ -30,9 +33,11 @@ class WebSocketManager:
         """Initialize the WebSocketManager class."""
         self.active_connections: List[WebSocket] = []
         self.sender_tasks: Dict[WebSocket, asyncio.Task] = {}
-        self.message_queues: Dict[WebSocket, asyncio.Queue] = {}
+        self.message_queues: Dict[WebSocket, OutboundQueue] = {}
         self.connection_states: Dict[WebSocket, ConnectionState] = {}
+        self.authenticated_events: Dict[WebSocket, asyncio.Event] = {}
         self.user_connections: Dict[str, List[WebSocket]] = {}
+        self.job_followers: Dict[WebSocket, Set[asyncio.Task]] = {}
 
     async def set_state(self, websocket: WebSocket, state: ConnectionState):
         """Update connection state and notify client"""
@@ -40,6 +45,8 @@ class WebSocketManager:
             # Only update state if connection is still active
             if websocket in self.active_connections:
                 self.connection_states[websocket] = state
+                if state == ConnectionState.AUTHENTICATED and websocket in self.authenticated_events:
+                    self.authenticated_events[websocket].set()
                 if state != ConnectionState.CLOSED:
                     await websocket.send_json({
                         "type": "connection_state",
@@ -71,29 +78,20 @@ class WebSocketManager:
     async def start_sender(self, websocket: WebSocket):
         """Start the sender task with proper error handling."""
         queue = self.message_queues.get(websocket)
-        if not queue:
+        authenticated = self.authenticated_events.get(websocket)
+        if queue is None or authenticated is None:
             return
 
-        while True:
-            try:
+        try:
+            # Messages wait in the queue until the connection is authenticated
+            await authenticated.wait()
+            while websocket in self.active_connections:
                 message = await queue.get()
                 if message is None:  # Shutdown signal
                     break
-                    
-                if websocket in self.active_connections:
-                    if await self.can_send_message(websocket):
-                        if message == "ping":
-                            await websocket.send_text("pong")
-                        else:
-                            await websocket.send_text(message)
-                    else:
-                        # Queue message if can't send yet
-                        await queue.put(message)
-                else:
-                    break
-            except Exception as e:
-                print(f"Error in sender task: {str(e)}")
-                break
+                await websocket.send_json(message)
+        except Exception as e:
+            print(f"Error in sender task: {str(e)}")
 
         # Cleanup
         await self.disconnect(websocket)
@@ -106,7 +104,8 @@ class WebSocketManager:
             await self.set_state(websocket, ConnectionState.CONNECTED)
             
             self.active_connections.append(websocket)
-            self.message_queues[websocket] = asyncio.Queue()
+            self.message_queues[websocket] = OutboundQueue()
+            self.authenticated_events[websocket] = asyncio.Event()
             self.sender_tasks[websocket] = asyncio.create_task(
                 self.start_sender(websocket)
             )
@@ -182,12 +181,17 @@ class WebSocketManager:
                 if not self.user_connections[user_id]:
                     del self.user_connections[user_id]
             
+            # Stop following jobs; jobs left without subscribers are cancelled by the job engine
+            for follower in self.job_followers.pop(websocket, set()):
+                follower.cancel()
+
             # Cancel sender task
             if websocket in self.sender_tasks:
                 self.sender_tasks[websocket].cancel()
-                await self.message_queues[websocket].put(None)
+                self.message_queues[websocket].close()
                 del self.sender_tasks[websocket]
                 del self.message_queues[websocket]
+            self.authenticated_events.pop(websocket, None)
             
             # Clean up state
             if websocket in self.connection_states:
@@ -248,18 +252,17 @@ class WebSocketManager:
             if not user_id:
                 raise ValueError("No user ID found")
             
-            # Process research request
-            report = await self.start_streaming(
-                query,
-                settings.get('report_type', 'research_report'),
-                settings.get('report_source', 'web'),
-                settings.get('source_urls', []),
-                settings.get('tone', 'professional'),
-                websocket
+            # Run the research as a background job and stream its events
+            return await self.start_job(
+                websocket,
+                task=query,
+                report_type=settings.get('report_type', 'research_report'),
+                report_source=settings.get('report_source', 'web'),
+                source_urls=settings.get('source_urls', []),
+                tone=settings.get('tone', 'professional'),
+                stream_batching=bool(data.get('stream_batching'))
             )
             
-            return report
-            
         except Exception as e:
             error_message = str(e)
             print(f"Error processing research request: {error_message}")
@@ -268,20 +271,81 @@ class WebSocketManager:
                 "message": error_message
             })
 
-    async def start_streaming(self, task, report_type, report_source, source_urls, tone, websocket, headers=None):
-        """Start streaming with proper error handling."""
+    async def start_streaming(self, task, report_type, report_source, source_urls, tone, websocket, headers=None, stream_batching=False):
+        """Start streaming with proper error handling.
+
+        Clients that send `stream_batching` get buffered output: frames are flushed every
+        50 ms or 4 KB, and several frames are delivered as one `batch` frame.
+        """
+        output_websocket = BufferedWebSocket(websocket) if stream_batching else websocket
         try:
             tone_enum = Tone[tone]
-            report = await run_agent(task, report_type, report_source, source_urls, tone_enum, websocket, headers)
+            report = await run_agent(task, report_type, report_source, source_urls, tone_enum, output_websocket, headers)
             return report
         except Exception as e:
             error_message = str(e)
             print(f"Error in streaming: {error_message}")
-            await websocket.send_json({
+            await output_websocket.send_json({
                 "type": "error",
                 "message": error_message
             })
             return None
+        finally:
+            if stream_batching:
+                await output_websocket.close()
+
+    async def start_job(self, websocket, task, report_type, report_source, source_urls, tone, headers=None, stream_batching=False) -> ResearchJob:
+        """Submit a research job for the websocket's user and follow its events on the websocket."""
+        user_id = getattr(websocket, 'user_id', None)
+        if not user_id:
+            raise ValueError("No user ID found")
+
+        job = await get_job_engine().submit(user_id, {
+            "task": task,
+            "report_type": report_type,
+            "report_source": report_source,
+            "source_urls": source_urls,
+            "tone": tone,
+            "headers": headers,
+        })
+        self.follow_job(websocket, job, stream_batching)
+        return job
+
+    def follow_job(self, websocket, job: ResearchJob, stream_batching=False):
+        """Forward a job's events, including those already sent, to the websocket until the job finishes."""
+        follower = asyncio.create_task(self._forward_job_events(websocket, job, stream_batching))
+        followers = self.job_followers.setdefault(websocket, set())
+        followers.add(follower)
+        follower.add_done_callback(followers.discard)
+
+    async def _forward_job_events(self, websocket, job: ResearchJob, stream_batching=False):
+        engine = get_job_engine()
+        # Events go through the connection's bounded outbound queue, so a stalled client can't hold them all
+        outbound = self.message_queues.get(websocket)
+        if outbound is None:
+            return
+        output_websocket = BufferedWebSocket(outbound) if stream_batching else outbound
+        queue = engine.subscribe(job)
+        try:
+            while True:
+                event = await queue.get()
+                await output_websocket.send_json(event)
+                if event.get("type") == "job" and JobStatus(event["status"]) in FINISHED_STATUSES:
+                    break
+            if stream_batching:
+                await output_websocket.close()
+        except Exception as e:
+            print(f"Error forwarding events of job {job.id}: {str(e)}")
+        finally:
+            engine.unsubscribe(job, queue)
+
+    def queue_metrics(self) -> Dict[str, int]:
+        """Depth, dropped and merged frame totals over the outbound queues of open connections."""
+        totals = {"connections": len(self.message_queues), "depth": 0, "dropped": 0, "merged": 0}
+        for queue in self.message_queues.values():
+            for key, value in queue.metrics().items():
+                totals[key] += value
+        return totals
 
 # Load environment variables
 load_dotenv()
@@ -2,17 +2,25 @@
 Main FastAPI server application
 """
 
+import json
 import logging
 import os
-from fastapi import FastAPI, Request, WebSocket, WebSocketDisconnect
+from fastapi import Depends, FastAPI, Request, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import RedirectResponse
+from fastapi.responses import RedirectResponse, Response
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from src.services.firebase.stripe_routes import router as stripe_router
 from src.services.firebase.firestore_routes import router as firestore_router
 from src.services.firebase.storage_routes import router as storage_router
-from src.services.firebase.firebase import verify_firebase_token
-from src.services.firebase.firestore_utils import get_user_data, update_user_tokens
+from src.services.firebase.auth_utils import get_current_user, start_certificate_prefetch, verify_firebase_token
+from src.services.firebase.firestore_utils import get_user_data
+from src.services.firebase.token_ledger import get_token_ledger
 from src.api.controllers.websocket_manager import WebSocketManager
+from src.api.controllers.job_engine import JobLimitError, get_job_engine
+from src.services.gpt_researcher.scraper.scraper import close_http_session
+from src.services.gpt_researcher.llm_provider.scheduler import get_scheduler
+from src.services.gpt_researcher.llm_provider.routing import get_tier_stats
+from src.services.gpt_researcher.config import Config
 import time
 
 # Configure logging
@@ -118,6 +126,9 @@ async def startup_event():
     logger.info(f"🔑 Firebase initialized: {bool(os.getenv('GOOGLE_APPLICATION_CREDENTIALS'))}")
     logger.info(f"💳 Stripe configured: {bool(os.getenv('STRIPE_SECRET_KEY'))}")
     
+    # Keep Google's token signing certificates warm so verifications don't block on a fetch
+    start_certificate_prefetch()
+    
     # Log available routes
     logger.info("🛣️ Available routes:")
     for route in app.routes:
@@ -130,6 +141,8 @@ async def startup_event():
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("🛑 Shutting down server...")
+    await get_token_ledger().flush()
+    await close_http_session()
 
 # Include routers
 app.include_router(stripe_router)
@@ -189,6 +202,31 @@ async def health_check():
     logger.info("✅ Health check requested")
     return {"status": "healthy"}
 
+@app.get("/backend/metrics/llm")
+async def llm_scheduler_metrics(current_user: dict = Depends(get_current_user)):
+    """LLM scheduler queue depths and admission stats per provider/model"""
+    return get_scheduler(Config()).metrics()
+
+@app.get("/backend/metrics/llm/tiers")
+async def llm_tier_metrics(current_user: dict = Depends(get_current_user)):
+    """Latency and cost of routed LLM calls per model tier and task class"""
+    return get_tier_stats().metrics()
+
+@app.get("/backend/metrics/jobs")
+async def job_metrics(current_user: dict = Depends(get_current_user)):
+    """Running and queued research jobs"""
+    return get_job_engine().metrics()
+
+@app.get("/backend/metrics/websockets")
+async def websocket_metrics(current_user: dict = Depends(get_current_user)):
+    """Outbound queue depth and dropped/merged frames over open websocket connections"""
+    return websocket_manager.queue_metrics()
+
+@app.get("/backend/metrics/prometheus")
+async def prometheus_metrics(current_user: dict = Depends(get_current_user)):
+    """Prometheus exposition of the counters and histograms registered across the app, including per-user gauges"""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 # Handle WebSocket CORS preflight
 @app.options("/backend/ws")
 async def websocket_cors(request: Request):
@@ -257,32 +295,44 @@ async def websocket_endpoint(websocket: WebSocket):
                     continue
                     
                 if data.get("type") == "research":
-                    task = data.get("task")
-                    report_type = data.get("report_type", "detailed")
-                    report_source = data.get("report_source", "web")
-                    source_urls = data.get("source_urls", [])
-                    tone = data.get("tone", "balanced")
-                    headers = data.get("headers")
-                    
-                    # Start streaming research results
-                    report = await websocket_manager.start_streaming(
-                        task=task,
-                        report_type=report_type,
-                        report_source=report_source,
-                        source_urls=source_urls,
-                        tone=tone,
-                        websocket=websocket,
-                        headers=headers
-                    )
-                    
-                    if report and report.get("user_id"):
-                        # Deduct one token for the research generation
-                        await update_user_tokens(
-                            report["user_id"], 
-                            -1,  # Deduct 1 token
-                            "Research generation"
+                    # The research runs as a background job, so this loop stays free for
+                    # pings, cancellation and new messages while it streams
+                    try:
+                        job = await websocket_manager.start_job(
+                            websocket,
+                            task=data.get("task"),
+                            report_type=data.get("report_type", "detailed"),
+                            report_source=data.get("report_source", "web"),
+                            source_urls=data.get("source_urls", []),
+                            tone=data.get("tone", "balanced"),
+                            headers=data.get("headers"),
+                            stream_batching=bool(data.get("stream_batching"))
                         )
-                        
+                    except JobLimitError as e:
+                        await websocket.send_json({"type": "error", "message": str(e)})
+                        continue
+                    logger.info(f"🧵 Research job {job.id} queued for user: {websocket.user_id}")
+
+                elif data.get("type") == "subscribe_job":
+                    # Reattach to a job, e.g. after a reconnect
+                    job = await get_job_engine().get_job(data.get("job_id"), websocket.user_id)
+                    if not job:
+                        await websocket.send_json({"type": "error", "message": "Job not found"})
+                        continue
+                    websocket_manager.follow_job(websocket, job, bool(data.get("stream_batching")))
+
+                elif data.get("type") == "cancel_job":
+                    if not await get_job_engine().cancel(data.get("job_id"), websocket.user_id):
+                        await websocket.send_json({"type": "error", "message": "No running job to cancel"})
+
+                elif data.get("type") == "human_feedback":
+                    job = await get_job_engine().get_job(data.get("job_id"), websocket.user_id)
+                    if job and not job.finished:
+                        await get_job_engine().send_input(job, json.dumps(data))
+
+                elif data.get("type") == "ping":
+                    await websocket.send_json({"type": "pong"})
+
             except WebSocketDisconnect:
                 logger.info("WebSocket disconnected by client")
                 break
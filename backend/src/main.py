@@ -36,4 +36,11 @@ if __name__ == "__main__":
     print(f"FIREBASE_CLIENT_EMAIL: {os.getenv('FIREBASE_CLIENT_EMAIL')}")
     print(f"ALLOWED_ORIGINS: {os.getenv('ALLOWED_ORIGINS')}")
     
-    uvicorn.run(app, host="0.0.0.0", port=8000) 
\ No newline at end of file
+    workers = int(os.getenv("WEB_CONCURRENCY", 1))
+    if workers > 1:
+        # Jobs started in one API process can only be followed from another through a job broker
+        if not os.getenv("JOB_BROKER"):
+            print("WEB_CONCURRENCY > 1 without JOB_BROKER: clients must reconnect to the same process to follow a job")
+        uvicorn.run("src.api.routes.server:app", host="0.0.0.0", port=8000, workers=workers)
+    else:
+        uvicorn.run(app, host="0.0.0.0", port=8000)
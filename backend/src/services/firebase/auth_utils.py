@@ -0,0 +1,127 @@
+"""
+@purpose: Shared Firebase ID token verification and FastAPI authentication dependency
+@prereq: Requires the Firebase app initialized in firebase.py
+@reference: Used by firestore_routes, storage_routes, stripe_routes, server.py and websocket_manager
+@performance: Verified claims are cached until the token expires; misses verify off the event loop
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from fastapi import Depends, HTTPException
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from firebase_admin import auth, _token_gen
+from prometheus_client import Counter
+
+from src.services.firebase.firebase import db  # noqa: F401 - ensures the Firebase app is initialized
+from src.services.gpt_researcher.utils.cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+"""
+@purpose: Token verification settings
+@invariant: A cached token is never served past its `exp` claim
+@limitation: Revocation is not checked, matching the previous verify_id_token(token) behaviour
+"""
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", 10000))
+AUTH_VERIFY_WORKERS = int(os.getenv("AUTH_VERIFY_WORKERS", 4))
+AUTH_CERT_REFRESH_INTERVAL = float(os.getenv("AUTH_CERT_REFRESH_INTERVAL", 1800))
+
+_executor = ThreadPoolExecutor(max_workers=AUTH_VERIFY_WORKERS, thread_name_prefix="firebase-auth")
+_token_cache = LRUCache(max_size=AUTH_TOKEN_CACHE_SIZE)
+_in_flight: Dict[str, asyncio.Future] = {}
+_prefetch_task: Optional[asyncio.Task] = None
+
+# Metrics
+token_verifications = Counter('auth_token_verifications_total', 'Firebase ID token lookups', ['result'])
+
+
+def _token_key(token: str) -> str:
+    """@purpose: Cache key that never keeps raw tokens in memory"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+async def verify_firebase_token(token: str) -> Optional[Dict[str, Any]]:
+    """
+    @purpose: Validates Firebase authentication tokens for protected routes
+    @prereq: Token must be a valid Firebase JWT
+    @example: decoded_user = await verify_firebase_token(request_token)
+    @performance: Cache hit is a dict lookup; concurrent misses for one token share a single verification
+    @limitation: Tokens expire after 1 hour by default
+
+    Args:
+        token (str): Firebase JWT token from client request
+
+    Returns:
+        dict: Decoded token payload if valid, None if invalid
+    """
+    if not token:
+        return None
+    key = _token_key(token)
+    decoded_token = _token_cache.get(key)
+    if decoded_token is not None:
+        token_verifications.labels(result='cached').inc()
+        return decoded_token
+
+    future = _in_flight.get(key)
+    if future is None:
+        future = asyncio.get_running_loop().run_in_executor(_executor, auth.verify_id_token, token)
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    try:
+        decoded_token = await asyncio.shield(future)
+    except Exception as e:
+        token_verifications.labels(result='invalid').inc()
+        logger.error(f"Token verification failed: {str(e)}")
+        return None
+
+    ttl = decoded_token.get('exp', 0) - time.time()
+    if ttl > 0:
+        _token_cache.set(key, decoded_token, ttl=ttl)
+    token_verifications.labels(result='verified').inc()
+    return decoded_token
+
+
+security = HTTPBearer()
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """
+    @purpose: Validates Firebase JWT and returns decoded user data
+    @prereq: Valid Firebase authentication token required
+    @limitation: Tokens expire after 1 hour by default
+    """
+    decoded_token = await verify_firebase_token(credentials.credentials)
+    if not decoded_token:
+        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
+    return decoded_token
+
+
+def _fetch_certificates():
+    """
+    @purpose: Warms the Firebase Admin SDK's cached certificate session with Google's signing certificates
+    @limitation: Relies on SDK internals; any failure just leaves fetching to the next verification
+    """
+    verifier = auth._get_client(None)._token_verifier
+    verifier.request(_token_gen.ID_TOKEN_CERT_URI, method='GET')
+
+
+async def _prefetch_certificates_loop():
+    while True:
+        try:
+            await asyncio.get_running_loop().run_in_executor(_executor, _fetch_certificates)
+            logger.debug("Prefetched Firebase token certificates")
+        except Exception as e:
+            logger.debug(f"Certificate prefetch skipped: {str(e)}")
+        await asyncio.sleep(AUTH_CERT_REFRESH_INTERVAL)
+
+
+def start_certificate_prefetch():
+    """@purpose: Starts the best-effort background certificate refresh; safe to call more than once"""
+    global _prefetch_task
+    if _prefetch_task is None or _prefetch_task.done():
+        _prefetch_task = asyncio.create_task(_prefetch_certificates_loop())
@@ -8,7 +8,7 @@
 import os
 import stripe
 import logging
-from firebase_admin import credentials, initialize_app, firestore, get_app, storage, auth
+from firebase_admin import credentials, initialize_app, firestore, get_app, storage
 from dotenv import load_dotenv
 
 """
@@ -37,28 +37,6 @@ stripe.api_key = os.getenv("STRIPE_SECRET_KEY")
 # Firebase configuration
 STORAGE_BUCKET = "tangents-94.appspot.com"
 
-async def verify_firebase_token(token: str):
-    """
-    @purpose: Validates Firebase authentication tokens for protected routes
-    @prereq: Token must be a valid Firebase JWT
-    @example: decoded_user = await verify_firebase_token(request_token)
-    @performance: O(1) verification using Firebase Admin SDK
-    @limitation: Tokens expire after 1 hour by default
-    @reference: Used by authentication middleware in all protected routes
-    
-    Args:
-        token (str): Firebase JWT token from client request
-        
-    Returns:
-        dict: Decoded token payload if valid, None if invalid
-    """
-    try:
-        decoded_token = auth.verify_id_token(token)
-        return decoded_token
-    except Exception as e:
-        logger.error(f"Token verification failed: {str(e)}")
-        return None
-
 def initialize_firebase():
     """
     @purpose: Initialize Firebase Admin SDK and return Firestore client
@@ -0,0 +1,117 @@
+"""
+@purpose: Non-blocking data-access layer over the synchronous Firestore and Storage clients
+@prereq: Requires the Firestore client initialized in firebase.py
+@reference: Used by firestore_utils, storage_utils, stripe_utils and storage_maintenance
+@performance: Blocking client calls run on a bounded thread pool, never on the event loop
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from prometheus_client import Counter, Histogram
+
+from src.services.firebase.firebase import db
+
+logger = logging.getLogger(__name__)
+
+"""
+@purpose: Bound the threads blocked on Firestore/Storage round-trips
+@limitation: Calls beyond FIRESTORE_MAX_WORKERS wait for a free thread
+"""
+FIRESTORE_MAX_WORKERS = int(os.getenv("FIRESTORE_MAX_WORKERS", 16))
+_executor = ThreadPoolExecutor(max_workers=FIRESTORE_MAX_WORKERS, thread_name_prefix="firestore")
+
+# Metrics
+firestore_operations = Counter('firestore_operations_total', 'Total Firestore operations', ['operation', 'status'])
+firestore_latency = Histogram('firestore_operation_latency_seconds', 'Firestore operation latency', ['operation'])
+
+
+async def run_blocking(operation: str, func: Callable, *args, **kwargs) -> Any:
+    """
+    @purpose: Runs a blocking Firestore, Storage or Stripe call on the bounded executor
+    @invariant: Every call is counted and timed under its operation label
+    @example: blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix=prefix)))
+    """
+    loop = asyncio.get_running_loop()
+    start_time = time.perf_counter()
+    try:
+        result = await loop.run_in_executor(_executor, functools.partial(func, *args, **kwargs))
+        firestore_operations.labels(operation=operation, status='success').inc()
+        return result
+    except Exception:
+        firestore_operations.labels(operation=operation, status='error').inc()
+        raise
+    finally:
+        firestore_latency.labels(operation=operation).observe(time.perf_counter() - start_time)
+
+
+class FirestoreRepository:
+    """
+    @purpose: Async document and query operations on a Firestore client
+    @prereq: Document references are built with the client as usual; only round-trips go through here
+    """
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, ref, transaction=None):
+        """@purpose: Reads one document snapshot"""
+        return await run_blocking('get', ref.get, transaction=transaction)
+
+    async def get_all(self, refs: Iterable, field_paths: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        @purpose: Reads many documents in one batched round-trip
+        @performance: One BatchGetDocuments call instead of one call per document
+        @returns: Snapshots keyed by document path; missing documents have exists == False
+        """
+        refs = list(refs)
+        if not refs:
+            return {}
+        snapshots = await run_blocking(
+            'get_all', lambda: list(self.client.get_all(refs, field_paths=field_paths))
+        )
+        return {snapshot.reference.path: snapshot for snapshot in snapshots}
+
+    async def set(self, ref, data: Dict[str, Any], merge: bool = False):
+        """@purpose: Creates or overwrites a document"""
+        return await run_blocking('set', ref.set, data, merge=merge)
+
+    async def create(self, ref, data: Dict[str, Any]):
+        """@purpose: Creates a document, raising AlreadyExists if it exists"""
+        return await run_blocking('create', ref.create, data)
+
+    async def update(self, ref, data: Dict[str, Any]):
+        """@purpose: Updates fields of an existing document"""
+        return await run_blocking('update', ref.update, data)
+
+    async def delete(self, ref):
+        """@purpose: Deletes a document"""
+        return await run_blocking('delete', ref.delete)
+
+    async def query(self, query) -> list:
+        """@purpose: Runs a query or reads a whole collection"""
+        return await run_blocking('query', query.get)
+
+    async def run_transaction(self, func: Callable, *args, **kwargs):
+        """
+        @purpose: Runs a @firestore.transactional function with a new transaction
+        @invariant: The whole transaction, retries included, runs on one executor thread
+        """
+        return await run_blocking('transaction', lambda: func(self.client.transaction(), *args, **kwargs))
+
+    def batch(self):
+        """@purpose: Returns a write batch; commit it with commit_batch"""
+        return self.client.batch()
+
+    async def commit_batch(self, batch):
+        """@purpose: Commits a write batch in one round-trip"""
+        return await run_blocking('batch_commit', batch.commit)
+
+
+# @purpose: Export shared repository over the application Firestore client
+firestore_repo = FirestoreRepository(db)
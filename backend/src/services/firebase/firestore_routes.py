@@ -5,19 +5,21 @@
 @maintenance: Monitor Firebase and Stripe API version compatibility
 """
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
 import stripe
-from .firebase import verify_firebase_token
+from .auth_utils import get_current_user
 from .firestore_utils import (
     get_user_data,
     create_user_profile,
     update_user_data,
-    update_payment_history
+    update_payment_history,
+    invalidate_user_cache
 )
+from .token_ledger import get_token_ledger
 
 """
-@purpose: Configure route grouping and authentication
+@purpose: Configure route grouping
 @reference: FastAPI routing and security documentation
 """
 router = APIRouter(
@@ -25,20 +27,6 @@ router = APIRouter(
     tags=["user"]
 )
 
-security = HTTPBearer()
-
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """
-    @purpose: Validates Firebase JWT and returns decoded user data
-    @prereq: Valid Firebase authentication token required
-    @limitation: Tokens expire after 1 hour by default
-    """
-    token = credentials.credentials
-    decoded_token = await verify_firebase_token(token)
-    if not decoded_token:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    return decoded_token
-
 @router.get("/profile")
 async def get_user_profile(current_user: dict = Depends(get_current_user)):
     """
@@ -108,7 +96,7 @@ async def get_user_subscription(current_user: dict = Depends(get_current_user)):
     @performance: Requires Firestore read and potential Stripe API calls
     """
     try:
-        user_data = await get_user_data(current_user['uid'])
+        user_data = await get_user_data(current_user['uid'], use_cache=False)
         
         # @purpose: Compile subscription status data
         subscription_data = {
@@ -185,7 +173,7 @@ async def get_access_status(current_user: dict = Depends(get_current_user)):
     @example: Returns access type and expiry information
     """
     try:
-        user_data = await get_user_data(current_user['uid'])
+        user_data = await get_user_data(current_user['uid'], use_cache=False)
         return {
             "has_access": user_data.get('has_access', False),
             "access_type": "subscription" if user_data.get('subscription_status') == 'active' else "one_time" if user_data.get('one_time_purchase') else None,
@@ -195,16 +183,32 @@ async def get_access_status(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/tokens")
-async def get_token_balance(current_user: dict = Depends(get_current_user)):
+async def get_token_balance(
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
     """
-    @purpose: Retrieves user's current token balance and history
+    @purpose: Retrieves user's current token balance and one page of token history
     @prereq: User must exist in Firestore
+    @performance: One user document read plus one ledger query of `limit` entries
+    @example: GET /tokens?limit=20&cursor=<next_cursor from the previous page>
     """
     try:
-        user_data = await get_user_data(current_user['uid'])
+        user_id = current_user['uid']
+        user_data = await get_user_data(user_id, use_cache=False)
+        ledger = get_token_ledger()
+        
+        # @purpose: Move history still embedded in the user document into the ledger
+        if user_data.get('token_history'):
+            await ledger.migrate_legacy_history(user_id, user_data['token_history'])
+            invalidate_user_cache(user_id)
+        
+        history, next_cursor = await ledger.get_history(user_id, limit=limit, cursor=cursor)
         return {
             "tokens": user_data.get('tokens', 0),
-            "token_history": user_data.get('token_history', [])
+            "token_history": history,
+            "next_cursor": next_cursor
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -4,7 +4,10 @@
 @reference: Used by firestore_routes.py for API endpoints
 """
 
+import copy
 import logging
+import os
+import time
 from datetime import datetime, timedelta
 
 import stripe
@@ -12,12 +15,33 @@ from google.cloud import firestore
 from google.cloud.exceptions import Conflict
 
 from src.services.firebase.firebase import db, SERVER_TIMESTAMP, ArrayUnion
+from src.services.firebase.firestore_repository import firestore_repo, run_blocking
+from src.services.firebase.token_ledger import get_token_ledger
 from src.services.firebase.models import UserProfile, ProcessedEvent
 from src.api.middleware.validation import validate_request
+from src.services.gpt_researcher.utils.cache import LRUCache
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+"""
+@purpose: Per-process read-through cache of user documents
+@invariant: Every write to a user document in this process invalidates its entry
+@limitation: Writes made by other processes (e.g. the Stripe webhook landing on another API worker)
+             are only seen after USER_CACHE_TTL seconds, so the TTL is kept short and the access and
+             token checks read with use_cache=False
+"""
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", 5))
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", 4096))
+_user_cache = LRUCache(max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# Last invalidation time per user, so a read racing an invalidation is not cached
+_user_invalidations = LRUCache(max_size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+
+def invalidate_user_cache(user_id: str):
+    """Drops a user's cached document; call after any write to users/{user_id}"""
+    _user_cache.delete(user_id)
+    _user_invalidations.set(user_id, time.monotonic())
+
 @validate_request(response_model=UserProfile)
 async def create_user_profile(user_id: str, data: dict):
     """Creates new user profile with Stripe customer integration"""
@@ -31,7 +55,9 @@ async def create_user_profile(user_id: str, data: dict):
             return existing_user
             
         # Create Stripe customer
-        customer = stripe.Customer.create(
+        customer = await run_blocking(
+            'stripe.customer_create',
+            stripe.Customer.create,
             email=data['email'],
             metadata={'user_id': user_id}
         )
@@ -46,12 +72,12 @@ async def create_user_profile(user_id: str, data: dict):
             'tokens': 0,
             'has_access': False,
             'one_time_purchase': False,
-            'token_history': [],
             'name': data.get('name')
         }
         
         # Store data (validation happens through decorator)
-        await db.collection('users').document(user_id).set(user_data)
+        await firestore_repo.set(db.collection('users').document(user_id), user_data)
+        invalidate_user_cache(user_id)
         return user_data
         
     except Exception as e:
@@ -63,7 +89,7 @@ async def create_processed_event(event_data: dict):
     """Creates a new processed event record"""
     try:
         # Validation happens through decorator
-        await db.collection('processed_events').document(event_data['event_id']).set(event_data)
+        await firestore_repo.set(db.collection('processed_events').document(event_data['event_id']), event_data)
         return event_data
     except Exception as e:
         logger.error(f"Error creating processed event: {str(e)}")
@@ -80,25 +106,37 @@ async def update_user_data(user_id: str, data: dict):
         # Add timestamp
         data['last_updated'] = firestore.SERVER_TIMESTAMP
         
-        user_ref.update(data)
+        await firestore_repo.update(user_ref, data)
+        invalidate_user_cache(user_id)
         logger.info(f"✅ User data updated: {user_id}")
         
     except Exception as e:
         logger.error(f"🚨 Error updating user data: {str(e)}")
         raise
 
-async def get_user_data(user_id: str):
-    """Retrieves user data from Firestore"""
+async def get_user_data(user_id: str, use_cache: bool = True):
+    """
+    Retrieves user data, from the per-process cache when fresh, otherwise from Firestore.
+    Pass use_cache=False where a stale `has_access`/`tokens` matters, e.g. after a purchase.
+    """
     try:
+        cached = _user_cache.get(user_id) if use_cache else None
+        if cached is not None:
+            logger.debug(f"📖 User data cache hit: {user_id}")
+            return copy.deepcopy(cached)
+        
         logger.info(f"📖 Fetching user data for: {user_id}")
+        read_started_at = time.monotonic()
         user_ref = db.collection('users').document(user_id)
-        doc = user_ref.get()
+        doc = await firestore_repo.get(user_ref)
         
         if not doc.exists:
             logger.warning(f"❌ User not found: {user_id}")
             return None
             
         user_data = doc.to_dict()
+        if (_user_invalidations.get(user_id) or 0) < read_started_at:
+            _user_cache.set(user_id, copy.deepcopy(user_data))
         logger.info(f"✅ User data retrieved: {user_id}")
         logger.debug(f"📋 User data: {user_data}")  # Detailed data in debug level
         return user_data
@@ -124,9 +162,10 @@ async def update_payment_history(user_id: str, payment_data: dict):
         }
         
         # @purpose: Atomic array update using ArrayUnion
-        user_ref.update({
+        await firestore_repo.update(user_ref, {
             'payment_history': ArrayUnion([payment_record])
         })
+        invalidate_user_cache(user_id)
         
         logger.info(f"Successfully updated payment history for user {user_id}")
     except Exception as e:
@@ -144,7 +183,7 @@ async def create_report_document(user_id: str, report_data: dict):
         report_ref = db.collection('users').document(user_id)\
                       .collection('reports').document()
         
-        report_ref.set({
+        await firestore_repo.set(report_ref, {
             'title': report_data['title'],
             'created_at': SERVER_TIMESTAMP,
             'file_urls': report_data['file_urls'],
@@ -158,27 +197,21 @@ async def create_report_document(user_id: str, report_data: dict):
         raise
 
 async def update_user_tokens(user_id: str, amount: int, reason: str):
-    """Updates user token balance"""
+    """
+    @purpose: Adjusts the materialized token balance and records the change in the token ledger
+    @performance: One Increment write; the ledger entry is committed write-behind in batches
+    """
     try:
         logger.info(f"💰 Updating tokens for user {user_id}: {amount} ({reason})")
         user_ref = db.collection('users').document(user_id)
         
-        # Get current balance for logging
-        doc = user_ref.get()
-        if doc.exists:
-            current_balance = doc.to_dict().get('tokens', 0)
-            new_balance = current_balance + amount
-            logger.info(f"💳 Token balance: {current_balance} -> {new_balance}")
-        
         # Update tokens
-        user_ref.update({
+        await firestore_repo.update(user_ref, {
             'tokens': firestore.Increment(amount),
-            'token_history': firestore.ArrayUnion([{
-                'amount': amount,
-                'type': reason,
-                'timestamp': firestore.SERVER_TIMESTAMP
-            }])
+            'last_updated': firestore.SERVER_TIMESTAMP
         })
+        invalidate_user_cache(user_id)
+        await get_token_ledger().record(user_id, amount, reason)
         
         logger.info(f"✅ Tokens updated for user {user_id}")
         
@@ -191,7 +224,7 @@ async def check_processed_event(event_id: str) -> bool:
     try:
         logger.info(f"🔍 Checking processed event: {event_id}")
         event_ref = db.collection('processed_events').document(event_id)
-        doc = event_ref.get()
+        doc = await firestore_repo.get(event_ref)
         
         is_processed = doc.exists
         logger.info(f"✅ Event {event_id} processed status: {is_processed}")
@@ -207,7 +240,7 @@ async def mark_event_processed(event_id: str, event_type: str):
         logger.info(f"📝 Marking event as processed: {event_id} ({event_type})")
         event_ref = db.collection('processed_events').document(event_id)
         
-        event_ref.create({
+        await firestore_repo.create(event_ref, {
             'event_id': event_id,
             'event_type': event_type,
             'processed_at': firestore.SERVER_TIMESTAMP,
@@ -27,7 +27,7 @@ class UserProfile(BaseModel):
     tokens: int = Field(ge=0)
     has_access: bool
     one_time_purchase: bool
-    token_history: List[Any]
+    token_history: List[Any] = []  # Legacy embedded history; new entries go to token_ledger
     name: Optional[str] = None
 
     class Config:
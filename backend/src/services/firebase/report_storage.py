@@ -14,6 +14,7 @@ from typing import Dict, List, Optional
 from firebase_admin import firestore
 
 from src.services.firebase.firebase import db, storage_bucket
+from src.services.firebase.firestore_repository import firestore_repo, run_blocking
 from src.services.firebase.storage_utils import upload_file_to_storage, delete_file_from_storage
 from src.utils.file_utils import write_md_to_pdf, write_md_to_word
 
@@ -162,7 +163,7 @@ async def generate_report_files(
                 report_data.update(metadata)
                 
             # Use set with merge option for better atomicity
-            report_ref.set(report_data, merge=True)
+            await firestore_repo.set(report_ref, report_data, merge=True)
             
             return file_paths
             
@@ -187,7 +188,7 @@ async def cleanup_orphaned_files(user_id: str, days_old: int = 7) -> None:
         # Use the new filter syntax
         filter_condition = firestore.FieldFilter('created_at', '<=', cutoff_date)
         query = reports_ref.where(filter=filter_condition)
-        reports = query.get()
+        reports = await firestore_repo.query(query)
         
         valid_paths = set()
         
@@ -199,7 +200,7 @@ async def cleanup_orphaned_files(user_id: str, days_old: int = 7) -> None:
                 
         # List all files in storage
         prefix = f"users/{user_id}/reports/"
-        blobs = list(storage_bucket.list_blobs(prefix=prefix))
+        blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix=prefix)))
         
         # Delete orphaned files in batches
         batch_count = 0
@@ -237,7 +238,7 @@ async def monitor_storage_metrics(user_id: str) -> Dict:
     """
     try:
         prefix = f"users/{user_id}/reports/"
-        blobs = list(storage_bucket.list_blobs(prefix=prefix))
+        blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix=prefix)))
         
         total_size = 0
         file_count = 0
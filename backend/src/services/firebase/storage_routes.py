@@ -6,8 +6,7 @@
 """
 
 from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from .firebase import verify_firebase_token
+from .auth_utils import get_current_user
 from .storage_utils import (
     upload_file_to_storage,
     delete_file_from_storage,
@@ -29,21 +28,8 @@ router = APIRouter(
     tags=["storage"]
 )
 
-security = HTTPBearer()
 logger = logging.getLogger(__name__)
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """
-    @purpose: Validates Firebase JWT and returns decoded user data
-    @prereq: Valid Firebase authentication token required
-    @limitation: Tokens expire after 1 hour by default
-    """
-    token = credentials.credentials
-    decoded_token = await verify_firebase_token(token)
-    if not decoded_token:
-        raise HTTPException(status_code=401, detail="Invalid authentication credentials")
-    return decoded_token
-
 @router.post("/upload")
 async def upload_file(
     file: UploadFile = File(...),
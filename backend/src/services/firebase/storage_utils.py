@@ -13,7 +13,8 @@ from functools import wraps
 
 from prometheus_client import Counter, Histogram
 
-from src.services.firebase.firebase import storage_bucket, db
+from src.services.firebase.firebase import storage_bucket, db, INCREMENT, SERVER_TIMESTAMP
+from src.services.firebase.firestore_repository import firestore_repo, run_blocking
 
 # Metrics
 storage_operations = Counter('storage_operations_total', 'Total storage operations', ['operation', 'status'])
@@ -83,10 +84,12 @@ async def upload_file_to_storage(
                 'content_type': content_type
             }
         
-        blob.upload_from_file(file_stream, content_type=content_type)
+        previous_size = await get_existing_blob_size(full_path)
+        await run_blocking('storage.upload', blob.upload_from_file, file_stream, content_type=content_type)
+        await adjust_storage_usage(full_path, (blob.size or 0) - previous_size)
         
         if make_public:
-            blob.make_public()
+            await run_blocking('storage.make_public', blob.make_public)
             return blob.public_url
         else:
             return await generate_signed_url(full_path)
@@ -96,13 +99,18 @@ async def upload_file_to_storage(
         raise
 
 @monitor_storage_operation('get_user_quota')
-async def get_user_storage_quota(user_id: str) -> Dict[str, Any]:
-    """Get user's storage quota and usage"""
+async def get_user_storage_quota(user_id: str, user_data: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Get user's storage quota and usage; pass `user_data` when the user document is already loaded"""
     try:
-        quota_doc = await db.collection('users').document(user_id).get()
-        quota_data = quota_doc.to_dict().get('storage_quota', {})
+        if user_data is None:
+            quota_doc = await firestore_repo.get(db.collection('users').document(user_id))
+            user_data = quota_doc.to_dict() or {}
+        quota_data = user_data.get('storage_quota', {})
         
-        current_usage = await calculate_user_storage_usage(user_id)
+        current_usage = quota_data.get('used')
+        if current_usage is None:
+            # Counter not initialized yet: seed it from a one-off listing
+            current_usage = await reconcile_user_storage_usage(user_id)
         max_storage = quota_data.get('max_storage', 100 * 1024 * 1024)  # 100MB default
         
         return {
@@ -119,17 +127,63 @@ async def calculate_user_storage_usage(user_id: str) -> int:
     """Calculate total storage usage for a user"""
     try:
         prefix = f"users/{user_id}/"
-        total_size = 0
-        
-        blobs = storage_bucket.list_blobs(prefix=prefix)
-        for blob in blobs:
-            total_size += blob.size
-            
-        return total_size
+        blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix=prefix)))
+        return sum(blob.size for blob in blobs)
     except Exception as e:
         logger.error(f"Error calculating user storage usage: {str(e)}")
         raise
 
+def get_storage_owner(path: str) -> Optional[str]:
+    """Returns the user ID owning a `users/{user_id}/...` path, or None for shared paths"""
+    parts = path.split('/') if path else []
+    if len(parts) >= 3 and parts[0] == 'users' and parts[1]:
+        return parts[1]
+    return None
+
+async def get_existing_blob_size(path: str) -> int:
+    """
+    @purpose: Size of the object a write to `path` is about to overwrite, 0 if there is none
+    @invariant: Overwrites adjust the usage counter by the size difference, not the full new size
+    @performance: One Storage metadata read, only for paths whose usage is tracked
+    """
+    if not get_storage_owner(path):
+        return 0
+    blob = await run_blocking('storage.get_blob', storage_bucket.get_blob, path)
+    return (blob.size or 0) if blob is not None else 0
+
+async def adjust_storage_usage(path: str, delta: Optional[int]):
+    """
+    @purpose: Atomically applies a byte delta to the owning user's storage usage counter
+    @invariant: No-op for paths outside users/ and for unknown sizes; drift is fixed by reconciliation
+    @performance: Single Firestore write with a server-side Increment
+    """
+    user_id = get_storage_owner(path)
+    if not user_id or not delta:
+        return
+    try:
+        await firestore_repo.set(
+            db.collection('users').document(user_id),
+            {'storage_quota': {'used': INCREMENT(delta)}},
+            merge=True
+        )
+    except Exception as e:
+        # The file operation already succeeded; reconciliation will correct the counter
+        logger.error(f"Error adjusting storage usage for user {user_id}: {str(e)}")
+
+@monitor_storage_operation('reconcile_usage')
+async def reconcile_user_storage_usage(user_id: str) -> int:
+    """
+    @purpose: Recomputes a user's storage usage from Storage and overwrites the counter
+    @performance: O(n) listing of the user's files - maintenance and first use only
+    """
+    current_usage = await calculate_user_storage_usage(user_id)
+    await firestore_repo.set(
+        db.collection('users').document(user_id),
+        {'storage_quota': {'used': current_usage, 'reconciled_at': SERVER_TIMESTAMP}},
+        merge=True
+    )
+    return current_usage
+
 def is_valid_storage_path(path: str) -> bool:
     """Validate storage path structure and components"""
     if not path or '..' in path:
@@ -149,10 +203,10 @@ async def cleanup_expired_files(days: int = 7) -> List[str]:
         cutoff = datetime.now() - timedelta(days=days)
         deleted_files = []
         
-        blobs = storage_bucket.list_blobs(prefix='temp/')
+        blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix='temp/')))
         for blob in blobs:
             if blob.time_created < cutoff:
-                blob.delete()
+                await run_blocking('storage.delete', blob.delete)
                 deleted_files.append(blob.name)
                 
         return deleted_files
@@ -169,7 +223,7 @@ async def list_user_reports(user_id: str) -> list:
     """
     try:
         prefix = f"users/{user_id}/reports/"
-        blobs = storage_bucket.list_blobs(prefix=prefix)
+        blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix=prefix)))
         return [{
             'name': blob.name.replace(prefix, ''),  # @purpose: Clean names for display
             'full_path': blob.name,
@@ -186,12 +240,11 @@ async def delete_user_report(user_id: str, filename: str):
     @purpose: Removes specific user report with path validation
     @prereq: Valid user_id and filename required
     @invariant: Only deletes files in user's directory
-    @performance: Single Storage delete operation
+    @performance: Storage metadata read, delete and one counter write
     """
     try:
         full_path = f"users/{user_id}/reports/{filename}"
-        blob = storage_bucket.blob(full_path)
-        blob.delete()
+        await delete_file_from_storage(full_path)
         logger.info(f"Deleted report {filename} for user {user_id}")
     except Exception as e:
         logger.error(f"Error deleting user report: {str(e)}")
@@ -202,11 +255,15 @@ async def delete_file_from_storage(filename):
     @purpose: Deletes arbitrary file from Storage
     @prereq: Valid filename and delete permissions
     @limitation: No path validation - use with caution
-    @performance: Single Storage delete operation
+    @performance: Storage metadata read and delete; one counter write for user files
     """
     try:
-        blob = storage_bucket.blob(filename)
-        blob.delete()
+        # Fetch the blob (with its size) so the owner's usage counter can be decremented
+        blob = await run_blocking('storage.get_blob', storage_bucket.get_blob, filename)
+        if blob is None:
+            blob = storage_bucket.blob(filename)
+        await run_blocking('storage.delete', blob.delete)
+        await adjust_storage_usage(filename, -(blob.size or 0))
         logger.info(f"File {filename} deleted from Firebase Storage.")
     except Exception as e:
         logger.error(f"Error deleting file from Firebase Storage: {str(e)}")
@@ -220,7 +277,7 @@ async def list_files_in_storage(prefix=None):
     @limitation: May be slow for large buckets
     """
     try:
-        blobs = storage_bucket.list_blobs(prefix=prefix)
+        blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix=prefix)))
         file_list = [blob.name for blob in blobs]
         return file_list
     except Exception as e:
@@ -236,7 +293,7 @@ async def download_file_from_storage(filename):
     """
     try:
         blob = storage_bucket.blob(filename)
-        content = blob.download_as_bytes()
+        content = await run_blocking('storage.download', blob.download_as_bytes)
         return content
     except Exception as e:
         logger.error(f"Error downloading file from Firebase Storage: {str(e)}")
@@ -273,7 +330,7 @@ async def update_file_metadata(filename, metadata):
     try:
         blob = storage_bucket.blob(filename)
         blob.metadata = metadata
-        blob.patch()
+        await run_blocking('storage.patch', blob.patch)
         logger.info(f"Metadata updated for file {filename}")
     except Exception as e:
         logger.error(f"Error updating file metadata in Firebase Storage: {str(e)}")
@@ -288,9 +345,12 @@ async def copy_file_in_storage(source_filename, destination_filename):
     """
     try:
         source_blob = storage_bucket.blob(source_filename)
-        destination_blob = storage_bucket.blob(destination_filename)
+        previous_size = await get_existing_blob_size(destination_filename)
         
-        storage_bucket.copy_blob(source_blob, storage_bucket, destination_blob)
+        new_blob = await run_blocking(
+            'storage.copy', storage_bucket.copy_blob, source_blob, storage_bucket, destination_filename
+        )
+        await adjust_storage_usage(destination_filename, (new_blob.size or 0) - previous_size)
         logger.info(f"File copied from {source_filename} to {destination_filename}")
     except Exception as e:
         logger.error(f"Error copying file in Firebase Storage: {str(e)}")
@@ -305,7 +365,9 @@ async def generate_signed_url(filename, expiration=3600):
     """
     try:
         blob = storage_bucket.blob(filename)
-        url = blob.generate_signed_url(
+        url = await run_blocking(
+            'storage.signed_url',
+            blob.generate_signed_url,
             expiration=expiration,
             method='GET'
         )
@@ -335,7 +397,9 @@ async def save_research_report(
         file_path = f"users/{user_id}/research/{filename}"
         
         blob = storage_bucket.blob(file_path)
-        blob.upload_from_file(file_stream, content_type='text/markdown')
+        previous_size = await get_existing_blob_size(file_path)
+        await run_blocking('storage.upload', blob.upload_from_file, file_stream, content_type='text/markdown')
+        await adjust_storage_usage(file_path, (blob.size or 0) - previous_size)
         
         # Generate signed URL
         url = await generate_signed_url(file_path)
@@ -351,7 +415,7 @@ async def save_research_report(
             'updated_at': timestamp,
             'type': 'research_report'
         }
-        await doc_ref.set(doc_data)
+        await firestore_repo.set(doc_ref, doc_data)
         
         return {
             'id': doc_ref.id,
@@ -7,11 +7,10 @@
 
 import logging
 from fastapi import APIRouter, Request, HTTPException, Depends
-from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import stripe
 import os
 from .stripe_utils import handle_stripe_webhook
-from .firebase import verify_firebase_token
+from .auth_utils import get_current_user
 from .firestore_utils import get_user_data, check_processed_event, mark_event_processed
 from pydantic import BaseModel
 from fastapi.responses import JSONResponse
@@ -33,24 +32,6 @@ router = APIRouter(
     tags=["stripe"]
 )
 
-security = HTTPBearer()
-
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security)):
-    """Validates Firebase JWT and extracts user identity"""
-    token = credentials.credentials
-    logger.info("Verifying Firebase token...")
-    
-    decoded_token = await verify_firebase_token(token)
-    if not decoded_token:
-        logger.error("Invalid Firebase token")
-        raise HTTPException(
-            status_code=401,
-            detail="Invalid authentication credentials"
-        )
-    
-    logger.info(f"Token verified for user: {decoded_token.get('uid')}")
-    return decoded_token
-
 class CheckoutSessionRequest(BaseModel):
     """
     @purpose: Validates checkout session creation parameters
@@ -192,7 +173,7 @@ async def get_subscription_status(current_user: dict = Depends(get_current_user)
         user_id = current_user['uid']
         logger.info(f"Fetching subscription status for user: {user_id}")
         
-        user_data = await get_user_data(user_id)
+        user_data = await get_user_data(user_id, use_cache=False)
         if not user_data:
             logger.error(f"User not found: {user_id}")
             raise HTTPException(status_code=404, detail="User not found")
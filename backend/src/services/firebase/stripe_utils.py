@@ -12,12 +12,14 @@ from typing import Optional, Dict, Any
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
 from .firebase import db, firestore
+from .firestore_repository import firestore_repo, run_blocking
+from .token_ledger import ledger_collection, ledger_entry
+from .firestore_utils import invalidate_user_cache
 import stripe
 import logging
 from functools import wraps
 from google.cloud.firestore_v1.base_client import DocumentSnapshot
 from google.api_core import exceptions
-from google.cloud.firestore import ArrayUnion
 
 # Configure logging
 logger = logging.getLogger(__name__)
@@ -48,7 +50,7 @@ def ensure_idempotency(func):
 
         try:
             # Try to create the event document - will fail if already exists
-            processed_events_ref.create({
+            await firestore_repo.create(processed_events_ref, {
                 'event_id': event_id,
                 'event_type': event['type'],
                 'processed_at': firestore.SERVER_TIMESTAMP,
@@ -63,7 +65,7 @@ def ensure_idempotency(func):
             result = await func(event, *args, **kwargs)
             
             # Mark event as successfully processed
-            processed_events_ref.update({
+            await firestore_repo.update(processed_events_ref, {
                 'processing_status': 'completed',
                 'completed_at': firestore.SERVER_TIMESTAMP
             })
@@ -71,7 +73,7 @@ def ensure_idempotency(func):
             return result
         except Exception as e:
             # Mark event as failed
-            processed_events_ref.update({
+            await firestore_repo.update(processed_events_ref, {
                 'processing_status': 'failed',
                 'error': str(e),
                 'failed_at': firestore.SERVER_TIMESTAMP
@@ -111,7 +113,7 @@ class PaymentProcessor:
             })
             return True
             
-        return create_in_transaction(self.db.transaction(), payment_ref)
+        return await firestore_repo.run_transaction(create_in_transaction, payment_ref)
         
     async def update_payment_status(self, payment_id: str, 
                                   status: PaymentStatus,
@@ -120,10 +122,10 @@ class PaymentProcessor:
         payment_ref = self.db.collection('payments').document(payment_id)
         
         # Check if document exists
-        doc = payment_ref.get()
+        doc = await firestore_repo.get(payment_ref)
         if not doc.exists:
             # Create it if it doesn't exist
-            payment_ref.set({
+            await firestore_repo.set(payment_ref, {
                 'payment_id': payment_id,
                 'status': status.value,
                 'created_at': firestore.SERVER_TIMESTAMP,
@@ -137,7 +139,7 @@ class PaymentProcessor:
             }
             if metadata:
                 update_data['metadata'] = metadata
-            payment_ref.update(update_data)
+            await firestore_repo.update(payment_ref, update_data)
 
 class UserSubscriptionManager:
     """Manages user subscription states and updates"""
@@ -159,7 +161,8 @@ class UserSubscriptionManager:
             'last_updated': firestore.SERVER_TIMESTAMP
         }
         
-        user_ref.update(update_data)
+        await firestore_repo.update(user_ref, update_data)
+        invalidate_user_cache(user_id)
 
 @ensure_idempotency
 async def handle_stripe_webhook(event: Dict[str, Any]) -> JSONResponse:
@@ -197,11 +200,17 @@ async def handle_stripe_webhook(event: Dict[str, Any]) -> JSONResponse:
             if not event_data:
                 raise ValueError("Missing event data object")
                 
-            result = await handler(
-                event_data,
-                payment_processor,
-                subscription_manager
-            )
+            try:
+                result = await handler(
+                    event_data,
+                    payment_processor,
+                    subscription_manager
+                )
+            finally:
+                # Handlers write to the user document, possibly before failing part-way
+                user_id = (event_data.get('metadata') or {}).get('user_id')
+                if user_id:
+                    invalidate_user_cache(user_id)
             logger.info(f"✅ Successfully handled {event_type}")
             return JSONResponse(content={"status": "success", "result": result})
         else:
@@ -255,6 +264,7 @@ async def handle_checkout_session(
             # Add 5 tokens and update access status
             user_ref = db.collection('users').document(user_id)
             
+            @firestore.transactional
             def update_user_transaction(transaction):
                 user_doc = user_ref.get(transaction=transaction)
                 user_data = user_doc.to_dict()
@@ -264,23 +274,22 @@ async def handle_checkout_session(
                     'tokens': new_token_balance,
                     'has_access': True,
                     'one_time_purchase': (new_token_balance > 0 and user_data.get('subscription_status') != 'active'),
-                    'token_history': ArrayUnion([{
-                        'amount': 5,
-                        'type': 'one_time_purchase',
-                        'timestamp': firestore.SERVER_TIMESTAMP
-                    }]),
                     'last_updated': firestore.SERVER_TIMESTAMP
                 }
                 transaction.update(user_ref, update_data)
+                transaction.set(ledger_collection(user_id).document(), ledger_entry(5, 'one_time_purchase'))
             
-            db.transaction().transaction(update_user_transaction)
+            await firestore_repo.run_transaction(update_user_transaction)
             
         elif session['mode'] == 'subscription':
-            subscription = stripe.Subscription.retrieve(session['subscription'])
+            subscription = await run_blocking(
+                'stripe.subscription_retrieve', stripe.Subscription.retrieve, session['subscription']
+            )
             await subscription_manager.update_subscription(user_id, subscription)
             
             user_ref = db.collection('users').document(user_id)
             
+            @firestore.transactional
             def update_subscription_transaction(transaction):
                 user_doc = user_ref.get(transaction=transaction)
                 user_data = user_doc.to_dict()
@@ -291,16 +300,12 @@ async def handle_checkout_session(
                     'has_access': True,
                     'subscription_status': 'active',
                     'one_time_purchase': False,
-                    'token_history': ArrayUnion([{
-                        'amount': 20,
-                        'type': 'subscription_purchase',
-                        'timestamp': firestore.SERVER_TIMESTAMP
-                    }]),
                     'last_updated': firestore.SERVER_TIMESTAMP
                 }
                 transaction.update(user_ref, update_data)
+                transaction.set(ledger_collection(user_id).document(), ledger_entry(20, 'subscription_purchase'))
             
-            db.transaction().transaction(update_subscription_transaction)
+            await firestore_repo.run_transaction(update_subscription_transaction)
             
         return {"status": "success", "mode": session['mode']}
         
@@ -340,6 +345,7 @@ async def handle_subscription_deleted(
         
     user_ref = db.collection('users').document(user_id)
     
+    @firestore.transactional
     def update_subscription_status(transaction):
         user_doc = user_ref.get(transaction=transaction)
         user_data = user_doc.to_dict()
@@ -356,7 +362,7 @@ async def handle_subscription_deleted(
         }
         transaction.update(user_ref, update_data)
     
-    db.transaction().transaction(update_subscription_status)
+    await firestore_repo.run_transaction(update_subscription_status)
     
     return {"status": "success"}
 
@@ -370,7 +376,9 @@ async def handle_invoice_paid(
     if not user_id:
         raise ValueError("Missing user_id in invoice metadata")
         
-    subscription = stripe.Subscription.retrieve(invoice['subscription'])
+    subscription = await run_blocking(
+        'stripe.subscription_retrieve', stripe.Subscription.retrieve, invoice['subscription']
+    )
     await subscription_manager.update_subscription(user_id, subscription)
     
     # Create payment record
@@ -394,7 +402,7 @@ async def handle_invoice_payment_failed(
         raise ValueError("Missing user_id in invoice metadata")
         
     user_ref = db.collection('users').document(user_id)
-    user_ref.update({
+    await firestore_repo.update(user_ref, {
         'subscription_status': SubscriptionStatus.PAST_DUE.value,
         'last_updated': firestore.SERVER_TIMESTAMP
     })
@@ -0,0 +1,149 @@
+"""
+@purpose: Append-only token ledger kept in users/{user_id}/token_ledger
+@prereq: Requires the Firestore client initialized in firebase.py
+@reference: Written by firestore_utils.update_user_tokens and stripe_utils, read by firestore_routes
+@invariant: The user document keeps only the materialized `tokens` balance; history lives here
+"""
+
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from firebase_admin import firestore
+
+from src.services.firebase.firebase import db, DELETE_FIELD
+from src.services.firebase.firestore_repository import firestore_repo
+
+logger = logging.getLogger(__name__)
+
+"""
+@purpose: Write-behind settings for ledger entries
+@limitation: Entries still pending when the process is killed are lost; the balance itself is written synchronously
+"""
+TOKEN_LEDGER_FLUSH_INTERVAL = float(os.getenv("TOKEN_LEDGER_FLUSH_INTERVAL", 1.0))
+TOKEN_LEDGER_BATCH_SIZE = min(int(os.getenv("TOKEN_LEDGER_BATCH_SIZE", 200)), 500)  # Firestore batch limit
+
+TOKEN_LEDGER_COLLECTION = 'token_ledger'
+
+
+def ledger_collection(user_id: str):
+    """@purpose: Returns the ledger subcollection of a user"""
+    return db.collection('users').document(user_id).collection(TOKEN_LEDGER_COLLECTION)
+
+
+def ledger_entry(amount: int, reason: str, timestamp: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    @purpose: Builds a ledger entry document
+    @invariant: Timestamps are taken when the change happens, not when the write-behind batch commits
+    """
+    return {
+        'amount': amount,
+        'type': reason,
+        'timestamp': timestamp or datetime.now(timezone.utc)
+    }
+
+
+class TokenLedger:
+    """
+    @purpose: Buffers ledger entries and commits them in batched writes
+    @performance: One batch commit per TOKEN_LEDGER_FLUSH_INTERVAL or TOKEN_LEDGER_BATCH_SIZE entries
+    """
+
+    def __init__(self, flush_interval: float = TOKEN_LEDGER_FLUSH_INTERVAL,
+                 batch_size: int = TOKEN_LEDGER_BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending: List[Tuple[Any, Dict[str, Any]]] = []
+        self._flush_lock = asyncio.Lock()
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def record(self, user_id: str, amount: int, reason: str):
+        """
+        @purpose: Queues a ledger entry for the next batch commit
+        @invariant: Never waits on or raises from a commit - the balance change it records is already written
+        """
+        self._pending.append((ledger_collection(user_id).document(), ledger_entry(amount, reason)))
+        if self._flush_task is None or self._flush_task.done():
+            # A full batch goes out right away, otherwise after the flush interval
+            delay = 0 if len(self._pending) >= self.batch_size else self.flush_interval
+            self._flush_task = asyncio.create_task(self._flush_later(delay))
+
+    async def _flush_later(self, delay: float):
+        while True:
+            await asyncio.sleep(delay)
+            delay = self.flush_interval
+            try:
+                await self.flush()
+                return
+            except Exception as e:
+                # The entries were re-queued; try again after the next interval
+                logger.error(f"Error flushing token ledger: {str(e)}")
+
+    async def flush(self):
+        """
+        @purpose: Commits all pending entries
+        @invariant: Entries of a failed commit are re-queued and retried with the next flush
+        """
+        async with self._flush_lock:
+            while self._pending:
+                entries = self._pending[:self.batch_size]
+                del self._pending[:self.batch_size]
+                batch = firestore_repo.batch()
+                for ref, entry in entries:
+                    batch.set(ref, entry)
+                try:
+                    await firestore_repo.commit_batch(batch)
+                except Exception:
+                    self._pending[:0] = entries
+                    raise
+                logger.debug(f"Committed {len(entries)} token ledger entries")
+
+    async def get_history(self, user_id: str, limit: int = 20,
+                          cursor: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        @purpose: Reads one page of a user's ledger, newest first
+        @returns: (entries, next_cursor); next_cursor is None on the last page
+        @performance: One query of `limit` documents, plus one read to resolve the cursor
+        """
+        query = ledger_collection(user_id).order_by(
+            'timestamp', direction=firestore.Query.DESCENDING
+        )
+        if cursor:
+            cursor_doc = await firestore_repo.get(ledger_collection(user_id).document(cursor))
+            if cursor_doc.exists:
+                query = query.start_after(cursor_doc)
+        docs = await firestore_repo.query(query.limit(limit + 1))
+
+        entries = [{'id': doc.id, **doc.to_dict()} for doc in docs[:limit]]
+        next_cursor = entries[-1]['id'] if len(docs) > limit else None
+        return entries, next_cursor
+
+    async def migrate_legacy_history(self, user_id: str, history: List[Dict[str, Any]]):
+        """
+        @purpose: Moves an embedded token_history array into the ledger and drops it from the user document
+        @invariant: Ledger entries are committed before the array is removed
+        @invariant: Idempotent - entry IDs are derived from the array index, so concurrent or
+                    repeated migrations overwrite the same documents instead of duplicating them
+        """
+        for start in range(0, len(history), self.batch_size):
+            batch = firestore_repo.batch()
+            for index, item in enumerate(history[start:start + self.batch_size], start):
+                batch.set(ledger_collection(user_id).document(f'legacy-{index}'), ledger_entry(
+                    item.get('amount', 0), item.get('type', 'unknown'), item.get('timestamp')
+                ))
+            await firestore_repo.commit_batch(batch)
+        await firestore_repo.update(db.collection('users').document(user_id), {'token_history': DELETE_FIELD})
+        logger.info(f"Migrated {len(history)} token history entries to the ledger for user {user_id}")
+
+
+_token_ledger: Optional[TokenLedger] = None
+
+
+def get_token_ledger() -> TokenLedger:
+    """@purpose: Returns the process-wide token ledger"""
+    global _token_ledger
+    if _token_ledger is None:
+        _token_ledger = TokenLedger()
+    return _token_ledger
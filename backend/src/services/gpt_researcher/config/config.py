@@ -28,9 +28,27 @@ class Config:
         self.ollama_base_url = os.getenv("OLLAMA_BASE_URL", None)
         self.llm_model = os.getenv("DEFAULT_LLM_MODEL", "gpt-4o")
         self.fast_llm_model = os.getenv("FAST_LLM_MODEL", "gpt-4o")
+        self.llm_pool_size = int(os.getenv("LLM_POOL_SIZE", 20))
+        self.llm_routing = json.loads(os.getenv("LLM_ROUTING", "{}"))
+        self.llm_cache = os.getenv("LLM_CACHE", None)
+        self.llm_cache_ttl = float(os.getenv("LLM_CACHE_TTL", 86400))
+        self.llm_cache_size = int(os.getenv("LLM_CACHE_SIZE", 1000))
+        self.llm_cache_path = os.getenv("LLM_CACHE_PATH", None)
+        self.llm_rpm_limit = int(os.getenv("LLM_RPM_LIMIT", 0))
+        self.llm_tpm_limit = int(os.getenv("LLM_TPM_LIMIT", 0))
+        self.llm_rate_limits = json.loads(os.getenv("LLM_RATE_LIMITS", "{}"))
+        self.llm_max_retries = int(os.getenv("LLM_MAX_RETRIES", 3))
+        self.llm_backoff_base = float(os.getenv("LLM_BACKOFF_BASE", 1.0))
+        self.llm_backoff_max = float(os.getenv("LLM_BACKOFF_MAX", 20.0))
+        # Hedging duplicates slow calls, so it is off unless a default deadline is configured
+        self.llm_hedge_deadline = float(os.getenv("LLM_HEDGE_DEADLINE", 0))
+        self.llm_call_timeout = float(os.getenv("LLM_CALL_TIMEOUT", 600))
+        self.llm_hedge_target = os.getenv("LLM_HEDGE_TARGET", "")
         self.smart_llm_model = os.getenv("SMART_LLM_MODEL", "gpt-4o-2024-08-06")
         self.fast_token_limit = int(os.getenv("FAST_TOKEN_LIMIT", 4000))
         self.smart_token_limit = int(os.getenv("SMART_TOKEN_LIMIT", 6000))
+        self.context_token_budget = int(os.getenv("CONTEXT_TOKEN_BUDGET", 25000))
+        self.cost_use_provider_usage = os.getenv("COST_USE_PROVIDER_USAGE", "true").lower() == "true"
         self.browse_chunk_max_length = int(os.getenv("BROWSE_CHUNK_MAX_LENGTH", 8192))
         self.summary_token_limit = int(os.getenv("SUMMARY_TOKEN_LIMIT", 1200))
         self.temperature = float(os.getenv("TEMPERATURE", 0.4))
@@ -43,12 +61,33 @@ class Config:
         self.max_search_results_per_query = int(
             os.getenv("MAX_SEARCH_RESULTS_PER_QUERY", 5)
         )
+        self.search_cache_ttl = float(os.getenv("SEARCH_CACHE_TTL", 900))
+        self.search_cache_size = int(os.getenv("SEARCH_CACHE_SIZE", 5000))
+        self.retriever_timeout = float(os.getenv("RETRIEVER_TIMEOUT", 10))
+        self.search_deadline = float(os.getenv("SEARCH_DEADLINE", 15))
+        # Subtopics of a detailed report researched and written at once; concurrent ones don't see each other's headers
+        self.subtopic_concurrency = int(os.getenv("SUBTOPIC_CONCURRENCY", 1))
+        # 0 disables early stopping; when set, later-arriving pages may be left out of the context
+        self.context_early_stop_chunks = int(os.getenv("CONTEXT_EARLY_STOP_CHUNKS", 0))
+        self.context_early_stop_similarity = float(os.getenv("CONTEXT_EARLY_STOP_SIMILARITY", 0.5))
         self.memory_backend = os.getenv("MEMORY_BACKEND", "local")
+        self.embedding_cache_size = int(os.getenv("EMBEDDING_CACHE_SIZE", 50000))
+        self.embedding_cache_path = os.getenv("EMBEDDING_CACHE_PATH", None)
         self.total_words = int(os.getenv("TOTAL_WORDS", 1200))
         self.report_format = os.getenv("REPORT_FORMAT", "APA")
         self.max_iterations = int(os.getenv("MAX_ITERATIONS", 3))
         self.agent_role = os.getenv("AGENT_ROLE", None)
+        self.combined_planning = os.getenv("COMBINED_PLANNING", "true").lower() == "true"
         self.scraper = os.getenv("SCRAPER", "bs")
+        self.scraper_max_connections = int(os.getenv("SCRAPER_MAX_CONNECTIONS", 100))
+        self.scraper_max_per_host = int(os.getenv("SCRAPER_MAX_PER_HOST", 4))
+        self.scraper_timeout = float(os.getenv("SCRAPER_TIMEOUT", 4))
+        self.scraper_max_body_bytes = int(os.getenv("SCRAPER_MAX_BODY_BYTES", 5_000_000))
+        self.scraper_parse_workers = int(os.getenv("SCRAPER_PARSE_WORKERS", 2))
+        self.scrape_cache = os.getenv("SCRAPE_CACHE", "memory")
+        self.scrape_cache_ttl = float(os.getenv("SCRAPE_CACHE_TTL", 3600))
+        self.scrape_cache_size = int(os.getenv("SCRAPE_CACHE_SIZE", 2000))
+        self.scrape_cache_path = os.getenv("SCRAPE_CACHE_PATH", None)
         self.max_subtopics = os.getenv("MAX_SUBTOPICS", 5)
         self.report_source = os.getenv("REPORT_SOURCE", None)
         self.doc_path = os.getenv("DOC_PATH", "./my-docs")
@@ -1,4 +1,5 @@
-from .compression import ContextCompressor
+from .compression import ContextCompressor, BatchContextCompressor, StreamingContextCompressor
+from .assembler import ContextAssembler
 from .retriever import SearchAPIRetriever
 
-__all__ = ['ContextCompressor', 'SearchAPIRetriever']
+__all__ = ['ContextCompressor', 'BatchContextCompressor', 'StreamingContextCompressor', 'ContextAssembler', 'SearchAPIRetriever']
@@ -0,0 +1,90 @@
+import hashlib
+import re
+from itertools import zip_longest
+from typing import List, Union
+
+import numpy as np
+import tiktoken
+
+from src.services.gpt_researcher.utils.costs import ENCODING_MODEL
+
+SOURCE_BLOCK_PATTERN = re.compile(r"(?m)^(?=Source: )")
+WORD_PATTERN = re.compile(r"\w+")
+
+
+def simhash(text: str) -> int:
+    """Returns the 64-bit SimHash fingerprint of the text's word shingles."""
+    words = WORD_PATTERN.findall(text.lower())
+    shingles = [" ".join(words[i:i + 3]) for i in range(max(1, len(words) - 2))]
+    hashes = np.array(
+        [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles],
+        dtype=np.uint64,
+    )
+    bits = np.unpackbits(hashes.view(np.uint8).reshape(-1, 8), axis=1, bitorder="little")
+    votes = bits.sum(axis=0, dtype=np.int64) * 2 - len(shingles)
+    fingerprint = 0
+    for i, vote in enumerate(votes):
+        if vote > 0:
+            fingerprint |= 1 << i
+    return fingerprint
+
+
+class ContextAssembler:
+    """
+    Builds the report context from the per-sub-query context strings.
+
+    Context strings are split into their "Source: ..." chunks, exact duplicates are
+    removed by content hash and near-duplicates by SimHash distance, and the chunks
+    are packed into `token_budget` tokens. Chunks are taken round-robin across
+    sub-queries, best first, so every sub-query keeps its strongest evidence.
+    """
+
+    def __init__(self, token_budget: int = 25000, near_duplicate_distance: int = 3):
+        self.token_budget = token_budget
+        self.near_duplicate_distance = near_duplicate_distance
+        self.encoding = tiktoken.get_encoding(ENCODING_MODEL)
+
+    def split_chunks(self, context: str) -> List[str]:
+        return [chunk.strip() for chunk in SOURCE_BLOCK_PATTERN.split(context) if chunk.strip()]
+
+    def rank_chunks(self, contexts: List[str]) -> List[str]:
+        """Interleaves the chunks of every sub-query, keeping each sub-query's own order."""
+        per_query = [self.split_chunks(context) for context in contexts if context]
+        return [chunk for rank in zip_longest(*per_query) for chunk in rank if chunk is not None]
+
+    def deduplicate(self, chunks: List[str]) -> List[str]:
+        seen_hashes = set()
+        fingerprints = []
+        unique_chunks = []
+        for chunk in chunks:
+            content_hash = hashlib.sha256(" ".join(chunk.split()).encode("utf-8")).hexdigest()
+            if content_hash in seen_hashes:
+                continue
+            seen_hashes.add(content_hash)
+            fingerprint = simhash(chunk)
+            if any(bin(fingerprint ^ other).count("1") <= self.near_duplicate_distance for other in fingerprints):
+                continue
+            fingerprints.append(fingerprint)
+            unique_chunks.append(chunk)
+        return unique_chunks
+
+    def pack(self, chunks: List[str]) -> List[str]:
+        """Greedily keeps the chunks, in rank order, that still fit in the token budget."""
+        packed = []
+        remaining = self.token_budget
+        for chunk, tokens in zip(chunks, self.encoding.encode_batch(chunks, disallowed_special=())):
+            if len(tokens) <= remaining:
+                packed.append(chunk)
+                remaining -= len(tokens)
+            elif not packed:
+                # A single oversized block (e.g. unstructured context) is truncated rather than dropped
+                packed.append(self.encoding.decode(tokens[:remaining]))
+                remaining = 0
+        return packed
+
+    def assemble(self, context: Union[str, List[str]]) -> str:
+        contexts = [context] if isinstance(context, str) else [str(c) for c in context]
+        chunks = self.deduplicate(self.rank_chunks(contexts))
+        if not chunks:
+            return ""
+        return "\n".join(self.pack(chunks))
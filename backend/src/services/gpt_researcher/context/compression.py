@@ -1,6 +1,8 @@
 import os
 import asyncio
-from typing import Optional
+from typing import List, Optional
+
+import numpy as np
 from .retriever import SearchAPIRetriever, SectionRetriever
 from langchain.retrievers import (
     ContextualCompressionRetriever,
@@ -10,10 +12,18 @@ from langchain.retrievers.document_compressors import (
     EmbeddingsFilter,
 )
 from langchain.text_splitter import RecursiveCharacterTextSplitter
-from src.services.gpt_researcher.utils.costs import estimate_embedding_cost
+from src.services.gpt_researcher.utils.costs import aestimate_embedding_cost
 from src.services.gpt_researcher.memory.embeddings import OPENAI_EMBEDDING_MODEL
 
 
+def pretty_print_docs(docs, top_n=None) -> str:
+    """Formats documents as Source/Title/Content blocks, keeping the first `top_n` when given."""
+    return "\n".join(f"Source: {d.metadata.get('source')}\n"
+                     f"Title: {d.metadata.get('title')}\n"
+                     f"Content: {d.page_content}\n"
+                     for d in docs[:top_n])
+
+
 class VectorstoreCompressor:
     def __init__(self, vector_store, max_results=7, filter: Optional[dict] = None, **kwargs):
         self.vector_store = vector_store
@@ -21,15 +31,9 @@ class VectorstoreCompressor:
         self.filter = filter
         self.kwargs = kwargs
 
-    def __pretty_print_docs(self, docs):
-        return f"\n".join(f"Source: {d.metadata.get('source')}\n"
-                          f"Title: {d.metadata.get('title')}\n"
-                          f"Content: {d.page_content}\n"
-                          for d in docs)
-
     async def async_get_context(self, query, max_results=5):
         results = await self.vector_store.asimilarity_search(query=query, k=max_results, filter=self.filter)
-        return self.__pretty_print_docs(results)
+        return pretty_print_docs(results)
 
 
 class ContextCompressor:
@@ -55,18 +59,108 @@ class ContextCompressor:
         )
         return contextual_retriever
 
-    def __pretty_print_docs(self, docs, top_n):
-        return f"\n".join(f"Source: {d.metadata.get('source')}\n"
-                          f"Title: {d.metadata.get('title')}\n"
-                          f"Content: {d.page_content}\n"
-                          for i, d in enumerate(docs) if i < top_n)
-
     async def async_get_context(self, query, max_results=5, cost_callback=None):
         compressed_docs = self.__get_contextual_retriever()
         if cost_callback:
-            cost_callback(estimate_embedding_cost(model=OPENAI_EMBEDDING_MODEL, docs=self.documents))
+            cost_callback(await aestimate_embedding_cost(model=OPENAI_EMBEDDING_MODEL, docs=self.documents))
         relevant_docs = await asyncio.to_thread(compressed_docs.invoke, query)
-        return self.__pretty_print_docs(relevant_docs, max_results)
+        return pretty_print_docs(relevant_docs, max_results)
+
+
+class BatchContextCompressor:
+    """
+    Chunks and embeds a fixed document set once, then scores every sub-query against it
+    with a single query x chunk cosine-similarity matrix.
+    """
+
+    def __init__(self, documents, embeddings, max_results=10, **kwargs):
+        self.max_results = max_results
+        self.documents = documents
+        self.kwargs = kwargs
+        self.embeddings = embeddings
+        self.similarity_threshold = float(os.environ.get("SIMILARITY_THRESHOLD", 0.38))
+
+    def split_documents(self, pages):
+        splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=100)
+        base_retriever = SearchAPIRetriever(pages=pages)
+        return splitter.split_documents(base_retriever.invoke(""))
+
+    def similarity_matrix(self, query_vectors, chunk_vectors):
+        queries = np.asarray(query_vectors, dtype=np.float32)
+        chunks = np.asarray(chunk_vectors, dtype=np.float32)
+        queries /= np.linalg.norm(queries, axis=1, keepdims=True) + 1e-10
+        chunks /= np.linalg.norm(chunks, axis=1, keepdims=True) + 1e-10
+        return queries @ chunks.T
+
+    def top_chunks(self, scores, chunks, max_results):
+        """Returns the chunks above the similarity threshold, best first."""
+        ranked = np.argsort(-scores)[:max_results]
+        return [chunks[i] for i in ranked if scores[i] >= self.similarity_threshold]
+
+    def __get_relevant_docs(self, queries, max_results):
+        chunks = self.split_documents(self.documents)
+        if not chunks:
+            return [[] for _ in queries]
+        chunk_vectors = self.embeddings.embed_documents([chunk.page_content for chunk in chunks])
+        # Queries go through embed_query: providers with asymmetric embeddings encode them differently
+        query_vectors = [self.embeddings.embed_query(query) for query in queries]
+        scores = self.similarity_matrix(query_vectors, chunk_vectors)
+        return [self.top_chunks(row, chunks, max_results) for row in scores]
+
+    async def async_get_contexts(self, queries: List[str], max_results=None, cost_callback=None) -> List[str]:
+        max_results = max_results or self.max_results
+        if cost_callback:
+            cost_callback(await aestimate_embedding_cost(model=OPENAI_EMBEDDING_MODEL, docs=self.documents))
+        relevant_docs = await asyncio.to_thread(self.__get_relevant_docs, queries, max_results)
+        return [pretty_print_docs(docs) for docs in relevant_docs]
+
+
+class StreamingContextCompressor(BatchContextCompressor):
+    """
+    Chunks, embeds and scores pages against a single query as they arrive.
+
+    `is_saturated` reports when enough chunks at or above `early_stop_similarity`
+    have been collected, so the caller can stop waiting for the remaining pages.
+    Early stopping changes which sources end up in the context, so it is off by default.
+    """
+
+    def __init__(self, query, embeddings, max_results=10, early_stop_chunks=0, early_stop_similarity=0.5, **kwargs):
+        super().__init__(documents=[], embeddings=embeddings, max_results=max_results, **kwargs)
+        self.query = query
+        self.early_stop_chunks = early_stop_chunks
+        self.early_stop_similarity = early_stop_similarity
+        self.chunks = []
+        self.scores = np.zeros(0, dtype=np.float32)
+        self._query_vector = None
+
+    def __score_page(self, page):
+        chunks = self.split_documents([page])
+        if not chunks:
+            return [], np.zeros(0, dtype=np.float32)
+        if self._query_vector is None:
+            self._query_vector = self.embeddings.embed_query(self.query)
+        chunk_vectors = self.embeddings.embed_documents([chunk.page_content for chunk in chunks])
+        return chunks, self.similarity_matrix([self._query_vector], chunk_vectors)[0]
+
+    async def add_page(self, page, cost_callback=None):
+        """Chunks, embeds and scores one page against the query."""
+        if cost_callback:
+            cost_callback(await aestimate_embedding_cost(model=OPENAI_EMBEDDING_MODEL, docs=[page]))
+        chunks, scores = await asyncio.to_thread(self.__score_page, page)
+        self.documents.append(page)
+        self.chunks.extend(chunks)
+        self.scores = np.concatenate([self.scores, scores])
+
+    def is_saturated(self) -> bool:
+        if not self.early_stop_chunks:
+            return False
+        return int(np.count_nonzero(self.scores >= self.early_stop_similarity)) >= self.early_stop_chunks
+
+    def get_context(self, max_results=None) -> str:
+        max_results = max_results or self.max_results
+        if not self.chunks:
+            return ""
+        return pretty_print_docs(self.top_chunks(self.scores, self.chunks, max_results))
 
 
 class WrittenContentCompressor:
@@ -97,6 +191,6 @@ class WrittenContentCompressor:
     async def async_get_context(self, query, max_results=5, cost_callback=None):
         compressed_docs = self.__get_contextual_retriever()
         if cost_callback:
-            cost_callback(estimate_embedding_cost(model=OPENAI_EMBEDDING_MODEL, docs=self.documents))
+            cost_callback(await aestimate_embedding_cost(model=OPENAI_EMBEDDING_MODEL, docs=self.documents))
         relevant_docs = await asyncio.to_thread(compressed_docs.invoke, query)
         return self.__pretty_docs_list(relevant_docs, max_results)
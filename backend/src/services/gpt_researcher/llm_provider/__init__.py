@@ -1,5 +1,9 @@
 from .generic import GenericLLMProvider
+from .scheduler import LLMScheduler, Priority, get_scheduler
 
 __all__ = [
     "GenericLLMProvider",
+    "LLMScheduler",
+    "Priority",
+    "get_scheduler",
 ]
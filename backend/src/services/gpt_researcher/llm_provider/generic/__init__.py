@@ -1,3 +1,3 @@
-from .base import GenericLLMProvider
+from .base import GenericLLMProvider, PartialResponseError
 
-__all__ = ["GenericLLMProvider"]
\ No newline at end of file
+__all__ = ["GenericLLMProvider", "PartialResponseError"]
@@ -1,15 +1,47 @@
+import asyncio
 import importlib
+import json
+import threading
+from functools import lru_cache
 from typing import Any
 from colorama import Fore, Style, init
 import os
 
+from src.services.gpt_researcher.config.config import Config
+from src.services.gpt_researcher.llm_provider.scheduler import Priority, get_scheduler
+from src.services.gpt_researcher.utils.costs import estimate_prompt_tokens
+
+# Providers whose langchain client accepts a pooled httpx client
+_HTTPX_PROVIDERS = {"openai", "azure_openai"}
+
+_shared_providers = {}
+_shared_providers_lock = threading.Lock()
+
+class PartialResponseError(Exception):
+    """A streaming call failed after part of the response was already sent to the client."""
+
+    def __init__(self, message, partial_response: str = ""):
+        super().__init__(message)
+        self.partial_response = partial_response
+
+
+class FirstTokenTimeout(asyncio.TimeoutError):
+    """A streaming call produced no output within its first-token deadline."""
+
+
 class GenericLLMProvider:
 
-    def __init__(self, llm):
+    def __init__(self, llm, provider: str = None, model: str = None, max_tokens: int = None):
         self.llm = llm
+        # Rate-limit key and token estimate for the scheduler
+        self.provider = provider
+        self.model = model
+        self.max_tokens = max_tokens
 
     @classmethod
     def from_provider(cls, provider: str, **kwargs: Any):
+        model = kwargs.get("model") or kwargs.get("model_name")
+        max_tokens = kwargs.get("max_tokens")
         if provider == "openai":
             _check_pkg("langchain_openai")
             from langchain_openai import ChatOpenAI
@@ -87,37 +119,133 @@ class GenericLLMProvider:
                 f"Unsupported {provider=}.\n\nSupported model providers are: "
                 f"{supported}"
             )
-        return cls(llm)
+        return cls(llm, provider, model, max_tokens)
+
 
+    @classmethod
+    def get_shared(cls, provider: str, pool_size: int = 20, **kwargs: Any):
+        """
+        Returns the provider for these settings on the running event loop, creating it on first use.
+        Sharing the client keeps its HTTP connections (and TLS sessions) alive across calls.
+        The pooled client is bound to the loop that first uses it, so each loop gets its own.
+        """
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        key = (loop, json.dumps([provider, kwargs], sort_keys=True, default=str))
+        shared = _shared_providers.get(key)
+        if shared is not None:
+            return shared
+        with _shared_providers_lock:
+            shared = _shared_providers.get(key)
+            if shared is None:
+                # Drop the providers of loops that have since closed, e.g. after asyncio.run() returned
+                for stale in [k for k in _shared_providers if k[0] is not None and k[0].is_closed()]:
+                    del _shared_providers[stale]
+                if provider in _HTTPX_PROVIDERS and pool_size and "http_async_client" not in kwargs:
+                    import httpx
+                    kwargs["http_async_client"] = httpx.AsyncClient(
+                        limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size)
+                    )
+                shared = cls.from_provider(provider, **kwargs)
+                _shared_providers[key] = shared
+        return shared
+
+    async def acquire(self, messages, priority: Priority = Priority.BACKGROUND):
+        """Waits for this provider/model's rate limits, higher priority calls first."""
+        await get_scheduler(Config()).acquire(
+            self.provider, self.model, estimate_prompt_tokens(messages) + (self.max_tokens or 0), priority
+        )
 
-    async def get_chat_response(self, messages, stream, websocket=None):
+    async def get_chat_response(self, messages, stream, websocket=None, priority=None):
+        response, _ = await self.get_chat_response_with_usage(messages, stream, websocket, priority)
+        return response
+
+    async def get_chat_response_with_usage(self, messages, stream, websocket=None, priority=None, admitted=False):
+        """
+        Returns the response text and the provider-reported token usage, as a dict with
+        `input_tokens` and `output_tokens`, or None when the provider does not report it.
+
+        Args:
+            priority (Priority, optional): Scheduling class. Defaults to INTERACTIVE when streaming, else BACKGROUND.
+            admitted (bool): The caller already waited in `acquire` for this call
+        """
         if not stream:
+            if not admitted:
+                await self.acquire(messages, Priority.BACKGROUND if priority is None else priority)
             # Getting output from the model chain using ainvoke for asynchronous invoking
             output = await self.llm.ainvoke(messages)
 
-            return output.content
+            return output.content, _usage_dict(getattr(output, "usage_metadata", None))
 
         else:
-            return await self.stream_response(messages, websocket)
+            return await self.stream_response_with_usage(messages, websocket, priority=priority, admitted=admitted)
+
+    async def stream_response(self, messages, websocket=None, priority=None):
+        response, _ = await self.stream_response_with_usage(messages, websocket, priority=priority)
+        return response
+
+    async def stream_response_with_usage(self, messages, websocket=None, first_token_timeout=None, on_first_token=None,
+                                         priority=None, admitted=False):
+        """
+        Streams the response to the websocket paragraph by paragraph.
+
+        Args:
+            first_token_timeout (float, optional): Give up with FirstTokenTimeout if no chunk arrives in time
+            on_first_token (callable, optional): Called once when the first chunk arrives
+            priority (Priority, optional): Scheduling class. Defaults to INTERACTIVE.
+            admitted (bool): The caller already waited in `acquire` for this call
+        """
+        if not admitted:
+            await self.acquire(messages, Priority.INTERACTIVE if priority is None else priority)
 
-    async def stream_response(self, messages, websocket=None):
         paragraph = ""
         response = ""
+        usage = None
+        sent = False
 
         # Streaming the response using the chain astream method from langchain
-        async for chunk in self.llm.astream(messages):
-            content = chunk.content
-            if content is not None:
-                response += content
-                paragraph += content
-                if "\n" in paragraph:
-                    await self._send_output(paragraph, websocket)
-                    paragraph = ""
+        chunks = self.llm.astream(messages).__aiter__()
+        try:
+            first_chunk = await asyncio.wait_for(chunks.__anext__(), timeout=first_token_timeout)
+        except StopAsyncIteration:
+            return response, usage
+        except asyncio.TimeoutError as e:
+            raise FirstTokenTimeout(f"No output within {first_token_timeout:.1f}s") from e
+        if on_first_token:
+            on_first_token()
+
+        try:
+            chunk = first_chunk
+            while True:
+                content = chunk.content
+                if content is not None:
+                    response += content
+                    paragraph += content
+                    if "\n" in paragraph:
+                        await self._send_output(paragraph, websocket)
+                        paragraph = ""
+                        sent = True
+                chunk_usage = _usage_dict(getattr(chunk, "usage_metadata", None))
+                if chunk_usage:
+                    usage = usage or {"input_tokens": 0, "output_tokens": 0}
+                    usage["input_tokens"] += chunk_usage["input_tokens"]
+                    usage["output_tokens"] += chunk_usage["output_tokens"]
+                try:
+                    chunk = await chunks.__anext__()
+                except StopAsyncIteration:
+                    break
+        except Exception as e:
+            # Output already reached the client, so the call cannot be retried transparently
+            if sent:
+                raise PartialResponseError(f"Stream interrupted: {e}", response) from e
+            raise
 
         if paragraph:
             await self._send_output(paragraph, websocket)
 
-        return response
+        return response, usage
 
     async def _send_output(self, content, websocket=None):
         if websocket is not None:
@@ -143,6 +271,16 @@ _SUPPORTED_PROVIDERS = {
     "bedrock",
 }
 
+def _usage_dict(usage_metadata):
+    if not usage_metadata:
+        return None
+    return {
+        "input_tokens": usage_metadata.get("input_tokens", 0) or 0,
+        "output_tokens": usage_metadata.get("output_tokens", 0) or 0,
+    }
+
+
+@lru_cache(maxsize=None)
 def _check_pkg(pkg: str) -> None:
     if not importlib.util.find_spec(pkg):
         pkg_kebab = pkg.replace("_", "-")
@@ -0,0 +1,124 @@
+import asyncio
+import random
+import threading
+from collections import deque
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+RETRYABLE_ERROR_NAMES = {
+    "RateLimitError",
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "ServiceUnavailableError",
+    "OverloadedError",
+    "ResourceExhausted",
+    "DeadlineExceeded",
+}
+
+_latency_tracker = None
+_latency_tracker_lock = threading.Lock()
+
+
+def latency_bucket(max_tokens: Optional[int]) -> int:
+    """
+    Groups calls by output budget so short planning calls and long report-writing calls
+    get separate latency distributions: 0 for no limit, else powers of two of max_tokens.
+    """
+    return int(max_tokens or 0).bit_length()
+
+
+class LatencyTracker:
+    """
+    Keeps a window of recent latencies per provider/model/output budget, used to derive the hedging deadline.
+    Non-streaming calls record their total latency, streaming calls their time to first token.
+    """
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[Tuple[str, str, bool, int], deque] = {}
+        self._lock = threading.Lock()
+
+    def record(self, provider: str, model: str, stream: bool, latency: float, bucket: int = 0) -> None:
+        with self._lock:
+            samples = self._samples.setdefault((provider, model, stream, bucket), deque(maxlen=self.window))
+            samples.append(latency)
+
+    def percentile(self, provider: str, model: str, stream: bool, percentile: float = 0.95, bucket: int = 0) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples.get((provider, model, stream, bucket), ()))
+        if len(samples) < self.min_samples:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile))]
+
+    def deadline(self, provider: str, model: str, stream: bool, default: float, multiplier: float = 1.5,
+                 minimum: float = 2.0, bucket: int = 0) -> float:
+        """Returns the hedging deadline: the p95 latency times `multiplier`, or `default` until enough samples exist."""
+        p95 = self.percentile(provider, model, stream, bucket=bucket)
+        if p95 is None:
+            return default
+        return max(minimum, p95 * multiplier)
+
+
+def get_latency_tracker() -> LatencyTracker:
+    """Returns the process-wide LLM latency tracker."""
+    global _latency_tracker
+    with _latency_tracker_lock:
+        if _latency_tracker is None:
+            _latency_tracker = LatencyTracker()
+    return _latency_tracker
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Whether an LLM call failure is transient: timeouts, rate limits, overload and 5xx errors."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError, ConnectionError)):
+        return True
+    status_code = getattr(error, "status_code", None) or getattr(getattr(error, "response", None), "status_code", None)
+    if status_code in RETRYABLE_STATUS_CODES:
+        return True
+    return type(error).__name__ in RETRYABLE_ERROR_NAMES
+
+
+def backoff_delay(attempt: int, base: float = 1.0, maximum: float = 20.0) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(maximum, base * 2 ** attempt))
+
+
+async def hedged(primary: Callable[[], Awaitable], hedge: Callable[[], Awaitable], deadline: Optional[float],
+                 timeout: Optional[float] = None):
+    """
+    Runs `primary`, and if it has not finished within `deadline` seconds, also runs `hedge`.
+    Returns the first successful result and cancels the other call.
+    Raises asyncio.TimeoutError if no call succeeds within `timeout` seconds overall.
+    """
+    loop = asyncio.get_running_loop()
+    expires_at = loop.time() + timeout if timeout else None
+
+    def remaining():
+        return None if expires_at is None else max(0.0, expires_at - loop.time())
+
+    first = asyncio.ensure_future(primary())
+    tasks = {first}
+    try:
+        if not deadline:
+            return await asyncio.wait_for(asyncio.shield(first), timeout=remaining())
+        done, _ = await asyncio.wait(tasks, timeout=deadline if expires_at is None else min(deadline, remaining()))
+        if not done and (expires_at is None or remaining() > 0):
+            tasks.add(asyncio.ensure_future(hedge()))
+
+        pending = set(tasks)
+        error = None
+        while pending:
+            done, pending = await asyncio.wait(pending, timeout=remaining(), return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                raise asyncio.TimeoutError(f"LLM call did not finish within {timeout}s")
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                error = task.exception()
+        raise error
+    finally:
+        for task in tasks:
+            if not task.done():
+                task.cancel()
@@ -0,0 +1,81 @@
+import threading
+from enum import Enum
+from typing import Dict, Optional, Tuple
+
+_tier_stats = None
+_tier_stats_lock = threading.Lock()
+
+
+class TaskClass(str, Enum):
+    """What an LLM call is for, used to route it to a model tier."""
+    PLANNING = "planning"  # Agent selection, sub-queries, subtopics, outlines
+    EXTRACTION = "extraction"  # Summaries of scraped content
+    WRITING = "writing"  # Report sections, introductions, conclusions
+    REVIEWING = "reviewing"  # Multi-agent review and revision notes
+
+
+DEFAULT_TIERS = {
+    TaskClass.PLANNING: "fast",
+    TaskClass.EXTRACTION: "fast",
+    TaskClass.WRITING: "smart",
+    TaskClass.REVIEWING: "smart",
+}
+
+
+def get_tier(task_class: TaskClass, cfg) -> str:
+    """Returns the tier ("fast" or "smart") of a task class, as set in LLM_ROUTING or the defaults."""
+    routing = getattr(cfg, "llm_routing", None) or {}
+    return routing.get(TaskClass(task_class).value) or DEFAULT_TIERS[TaskClass(task_class)]
+
+
+def route_model(task_class: TaskClass, cfg, smart_model: Optional[str] = None) -> Tuple[str, int]:
+    """
+    Returns the (model, max_tokens) to use for a task class.
+
+    Args:
+        task_class (TaskClass): What the call is for
+        cfg (Config): The configuration object
+        smart_model (str, optional): Model of the smart tier, when the caller has its own (e.g. a multi-agent task)
+    """
+    if get_tier(task_class, cfg) == "fast":
+        return cfg.fast_llm_model, cfg.fast_token_limit
+    return smart_model or cfg.smart_llm_model, cfg.smart_token_limit
+
+
+class TierStats:
+    """Call count, latency and cost of routed LLM calls, per tier and task class."""
+
+    def __init__(self):
+        self._stats: Dict[Tuple[str, str], Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def record(self, tier: str, task_class: TaskClass, latency: float, cost: float, failed: bool = False) -> None:
+        with self._lock:
+            stats = self._stats.setdefault(
+                (tier, TaskClass(task_class).value),
+                {"calls": 0, "errors": 0, "total_latency": 0.0, "max_latency": 0.0, "total_cost": 0.0},
+            )
+            stats["calls"] += 1
+            stats["errors"] += int(failed)
+            stats["total_latency"] += latency
+            stats["max_latency"] = max(stats["max_latency"], latency)
+            stats["total_cost"] += cost
+
+    def metrics(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        with self._lock:
+            metrics = {}
+            for (tier, task_class), stats in self._stats.items():
+                metrics.setdefault(tier, {})[task_class] = {
+                    **stats,
+                    "avg_latency": stats["total_latency"] / stats["calls"] if stats["calls"] else 0.0,
+                }
+            return metrics
+
+
+def get_tier_stats() -> TierStats:
+    """Returns the process-wide routed call stats."""
+    global _tier_stats
+    with _tier_stats_lock:
+        if _tier_stats is None:
+            _tier_stats = TierStats()
+    return _tier_stats
@@ -0,0 +1,156 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from enum import IntEnum
+from typing import Dict, Optional, Tuple
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+class Priority(IntEnum):
+    """Scheduling classes for LLM calls, lowest value served first."""
+    INTERACTIVE = 0  # Streaming report writing the user is watching
+    BACKGROUND = 1  # Planning: agent selection, sub-queries, subtopics
+    REVIEW = 2  # Multi-agent review and revision
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `capacity` per minute. A capacity of 0 means unlimited."""
+
+    def __init__(self, capacity: float):
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def time_until(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available."""
+        if not self.capacity:
+            return 0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0
+        return (amount - self.tokens) * 60 / self.capacity
+
+    def consume(self, amount: float) -> None:
+        if self.capacity:
+            self.tokens -= min(amount, self.capacity)
+
+
+class _ModelQueue:
+    """Priority queue of waiting calls for one provider/model, drained within its rate limits."""
+
+    def __init__(self, rpm: int, tpm: int):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.waiters = []
+        self.wakeup = asyncio.Event()
+        self.dispatcher: Optional[asyncio.Task] = None
+        self.served = 0
+        self.total_wait = 0.0
+
+    def depth(self) -> Dict[str, int]:
+        depths = {priority.name.lower(): 0 for priority in Priority}
+        for priority, _, _, future, _ in self.waiters:
+            if not future.done():
+                depths[Priority(priority).name.lower()] += 1
+        return depths
+
+    async def dispatch(self) -> None:
+        while self.waiters:
+            priority, _, tokens, future, enqueued_at = self.waiters[0]
+            if future.done():
+                # The caller was cancelled while waiting
+                heapq.heappop(self.waiters)
+                continue
+            wait = max(self.requests.time_until(1), self.tokens.time_until(tokens))
+            if wait > 0:
+                # Wake up early when a new call arrives, it may have a higher priority
+                self.wakeup.clear()
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self.waiters)
+            self.requests.consume(1)
+            self.tokens.consume(tokens)
+            self.served += 1
+            self.total_wait += time.monotonic() - enqueued_at
+            future.set_result(None)
+
+
+class LLMScheduler:
+    """
+    Central admission control for LLM calls.
+
+    Each provider/model has token buckets for requests per minute and estimated tokens
+    per minute. Calls over the limit wait in a priority queue instead of failing
+    into provider-side rate limit retries, and interactive calls are admitted first.
+    """
+
+    def __init__(self, rpm: int = 0, tpm: int = 0, limits: Optional[Dict[str, Dict[str, int]]] = None):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.limits = limits or {}
+        self._queues: Dict[Tuple[str, str], _ModelQueue] = {}
+        self._sequence = itertools.count()
+
+    def _queue(self, provider: str, model: str) -> _ModelQueue:
+        key = (provider, model)
+        queue = self._queues.get(key)
+        if queue is None:
+            limits = self.limits.get(f"{provider}:{model}") or self.limits.get(provider) or {}
+            queue = _ModelQueue(limits.get("rpm", self.rpm), limits.get("tpm", self.tpm))
+            self._queues[key] = queue
+        return queue
+
+    async def acquire(self, provider: str, model: str, tokens: int, priority: Priority = Priority.BACKGROUND) -> None:
+        """Waits until a call of about `tokens` tokens may be sent to the provider/model."""
+        queue = self._queue(provider, model)
+        if not queue.waiters and not queue.requests.time_until(1) and not queue.tokens.time_until(tokens):
+            queue.requests.consume(1)
+            queue.tokens.consume(tokens)
+            queue.served += 1
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(queue.waiters, (int(priority), next(self._sequence), tokens, future, time.monotonic()))
+        queue.wakeup.set()
+        if queue.dispatcher is None or queue.dispatcher.done():
+            queue.dispatcher = asyncio.ensure_future(queue.dispatch())
+        await future
+
+    def metrics(self) -> Dict[str, Dict]:
+        """Returns the queue depth per priority and admission stats of every provider/model."""
+        return {
+            f"{provider}:{model}": {
+                "queue_depth": queue.depth(),
+                "served": queue.served,
+                "avg_wait_seconds": queue.total_wait / queue.served if queue.served else 0.0,
+                "rpm_available": queue.requests.tokens if queue.requests.capacity else None,
+                "tpm_available": queue.tokens.tokens if queue.tokens.capacity else None,
+            }
+            for (provider, model), queue in self._queues.items()
+        }
+
+
+def get_scheduler(cfg=None) -> LLMScheduler:
+    """Returns the process-wide LLM scheduler."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler(
+                rpm=getattr(cfg, "llm_rpm_limit", 0),
+                tpm=getattr(cfg, "llm_tpm_limit", 0),
+                limits=getattr(cfg, "llm_rate_limits", None),
+            )
+    return _scheduler
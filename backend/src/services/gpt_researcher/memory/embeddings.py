@@ -1,11 +1,99 @@
 from langchain_community.vectorstores import FAISS
+from langchain_core.embeddings import Embeddings
+import hashlib
 import os
+import threading
+from typing import List, Optional
+
+from src.services.gpt_researcher.utils.cache import LRUCache, SQLiteCache
 
 OPENAI_EMBEDDING_MODEL = os.environ.get("OPENAI_EMBEDDING_MODEL","text-embedding-3-small")
 
+# Process-wide embedding cache shared by every Memory instance
+_embedding_cache: Optional[LRUCache] = None
+_embedding_store: Optional[SQLiteCache] = None
+_embedding_cache_lock = threading.Lock()
+
+
+def get_embedding_cache(max_size: int = 50000, cache_path: Optional[str] = None):
+    """
+    Returns the process-wide (memory, disk) embedding cache pair, creating it on first use.
+    The disk store is only created when a cache path is configured.
+    """
+    global _embedding_cache, _embedding_store
+    with _embedding_cache_lock:
+        if _embedding_cache is None:
+            _embedding_cache = LRUCache(max_size=max_size)
+        if _embedding_store is None and cache_path:
+            _embedding_store = SQLiteCache(cache_path, table="embeddings")
+    return _embedding_cache, _embedding_store
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model with a content-hash keyed cache, so identical chunk text
+    is embedded once per process instead of once per sub-query.
+    """
+
+    def __init__(self, embeddings: Embeddings, namespace: str, cache: LRUCache, store: Optional[SQLiteCache] = None):
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.cache = cache
+        self.store = store
+
+    def _key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8", errors="replace")).hexdigest()
+        return f"{self.namespace}:{digest}"
+
+    def _lookup(self, keys: List[str]) -> dict:
+        found = {}
+        for key in keys:
+            vector = self.cache.get(key)
+            if vector is not None:
+                found[key] = vector
+        missing = [key for key in keys if key not in found]
+        if self.store is not None and missing:
+            stored = self.store.get_many(missing)
+            for key, vector in stored.items():
+                self.cache.set(key, vector)
+            found.update(stored)
+        return found
+
+    def _save(self, vectors: dict) -> None:
+        for key, vector in vectors.items():
+            self.cache.set(key, vector)
+        if self.store is not None:
+            self.store.set_many(vectors)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [self._key(text) for text in texts]
+        found = self._lookup(list(dict.fromkeys(keys)))
+
+        # Embed each distinct missing text once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        if missing:
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            new_vectors = dict(zip(missing.keys(), vectors))
+            self._save(new_vectors)
+            found.update(new_vectors)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        key = f"query:{self._key(text)}"
+        found = self._lookup([key])
+        if key in found:
+            return found[key]
+        vector = self.embeddings.embed_query(text)
+        self._save({key: vector})
+        return vector
+
 
 class Memory:
-    def __init__(self, embedding_provider, headers=None, **kwargs):
+    def __init__(self, embedding_provider, headers=None, cache_size: int = 50000, cache_path: Optional[str] = None, **kwargs):
         _embeddings = None
         headers = headers or {}
         match embedding_provider:
@@ -52,6 +140,12 @@ class Memory:
                 raise Exception("Embedding provider not found.")
 
         self._embeddings = _embeddings
+        if cache_size:
+            model = getattr(_embeddings, "model", None) or getattr(_embeddings, "model_name", None) or ""
+            cache, store = get_embedding_cache(cache_size, cache_path)
+            self._embeddings = CachedEmbeddings(
+                _embeddings, f"{embedding_provider}:{model}", cache, store
+            )
 
     def get_embeddings(self):
         return self._embeddings
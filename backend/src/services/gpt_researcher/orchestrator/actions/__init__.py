@@ -1,6 +1,6 @@
-from .retriever import get_retriever, get_retrievers
-from .query_processing import get_sub_queries, extract_json_with_regex, choose_agent
-from .web_scraping import scrape_urls
+from .retriever import get_retriever, get_retrievers, search_retriever, search_retrievers
+from .query_processing import get_sub_queries, extract_json_with_regex, choose_agent, plan_research
+from .web_scraping import scrape_urls, stream_urls
 from .report_generation import write_conclusion, summarize_url, generate_draft_section_titles, generate_report, get_report_introduction
 from .markdown_processing import extract_headers, extract_sections, table_of_contents, add_references
 from .utils import stream_output
@@ -8,9 +8,12 @@ from .utils import stream_output
 __all__ = [
     "get_retriever",
     "get_retrievers",
+    "search_retriever",
+    "search_retrievers",
     "get_sub_queries",
     "extract_json_with_regex",
     "scrape_urls",
+    "stream_urls",
     "write_conclusion",
     "summarize_url",
     "generate_draft_section_titles",
@@ -21,5 +24,6 @@ __all__ = [
     "table_of_contents",
     "add_references",
     "stream_output",
-    "choose_agent"
+    "choose_agent",
+    "plan_research"
 ]
\ No newline at end of file
@@ -4,7 +4,13 @@ import json_repair
 from typing import List, Dict, Any
 from src.services.gpt_researcher.config.config import Config
 from src.services.gpt_researcher.utils.llm import create_chat_completion
-from src.services.gpt_researcher.orchestrator.prompts import auto_agent_instructions, generate_search_queries_prompt
+from src.services.gpt_researcher.llm_provider.routing import TaskClass, route_model
+from src.services.gpt_researcher.orchestrator.prompts import (
+    auto_agent_instructions,
+    generate_search_queries_prompt,
+    research_plan_instructions,
+    generate_research_plan_prompt,
+)
 
 
 async def choose_agent(
@@ -27,16 +33,19 @@ async def choose_agent(
     response = None  # Initialize response to ensure it's defined
 
     try:
+        model, max_tokens = route_model(TaskClass.PLANNING, cfg)
         response = await create_chat_completion(
-            model=cfg.smart_llm_model,
+            model=model,
             messages=[
                 {"role": "system", "content": f"{auto_agent_instructions()}"},
                 {"role": "user", "content": f"task: {query}"},
             ],
             temperature=0.15,
             llm_provider=cfg.llm_provider,
+            max_tokens=max_tokens,
             llm_kwargs=cfg.llm_kwargs,
             cost_callback=cost_callback,
+            task_class=TaskClass.PLANNING,
         )
 
         agent_dict = json.loads(response)
@@ -70,6 +79,79 @@ async def handle_json_error(response):
     )
 
 
+async def plan_research(
+    query: str,
+    cfg,
+    parent_query: str,
+    report_type: str,
+    cost_callback: callable = None,
+):
+    """
+    Chooses the agent and generates the sub queries with a single LLM call
+    Args:
+        query: original query
+        cfg: Config
+        parent_query: The main query, when researching a subtopic
+        report_type:
+        cost_callback: callback for calculating llm costs
+
+    Returns:
+        agent: Agent name
+        agent_role_prompt: Agent role prompt
+        sub_queries: List of sub queries, or None if the response had none to use
+    """
+    max_research_iterations = cfg.max_iterations if cfg.max_iterations else 1
+    response = None  # Initialize response to ensure it's defined
+
+    try:
+        model, max_tokens = route_model(TaskClass.PLANNING, cfg)
+        response = await create_chat_completion(
+            model=model,
+            messages=[
+                {"role": "system", "content": f"{research_plan_instructions()}"},
+                {
+                    "role": "user",
+                    "content": generate_research_plan_prompt(
+                        query,
+                        parent_query,
+                        report_type,
+                        max_iterations=max_research_iterations,
+                    ),
+                },
+            ],
+            temperature=0.15,
+            llm_provider=cfg.llm_provider,
+            max_tokens=max_tokens,
+            llm_kwargs=cfg.llm_kwargs,
+            cost_callback=cost_callback,
+            task_class=TaskClass.PLANNING,
+        )
+
+        plan = json.loads(response)
+        return plan["server"], plan["agent_role_prompt"], parse_sub_queries(plan.get("sub_queries"))
+
+    except Exception:
+        print("⚠️ Error in reading JSON, attempting to repair JSON")
+        agent, agent_role_prompt = await handle_json_error(response or "")
+        return agent, agent_role_prompt, extract_sub_queries(response or "")
+
+
+def parse_sub_queries(sub_queries):
+    if not isinstance(sub_queries, list):
+        return None
+    sub_queries = [sub_query for sub_query in sub_queries if isinstance(sub_query, str) and sub_query.strip()]
+    return sub_queries or None
+
+
+def extract_sub_queries(response):
+    try:
+        plan = json_repair.loads(response)
+    except Exception as e:
+        print(f"Error using json_repair: {e}")
+        return None
+    return parse_sub_queries(plan.get("sub_queries")) if isinstance(plan, dict) else None
+
+
 def extract_json_with_regex(response):
     json_match = re.search(r"{.*?}", response, re.DOTALL)
     if json_match:
@@ -100,8 +182,9 @@ async def get_sub_queries(
 
     """
     max_research_iterations = cfg.max_iterations if cfg.max_iterations else 1
+    model, max_tokens = route_model(TaskClass.PLANNING, cfg)
     response = await create_chat_completion(
-        model=cfg.smart_llm_model,
+        model=model,
         messages=[
             {"role": "system", "content": f"{agent_role_prompt}"},
             {
@@ -116,8 +199,10 @@ async def get_sub_queries(
         ],
         temperature=0.1,
         llm_provider=cfg.llm_provider,
+        max_tokens=max_tokens,
         llm_kwargs=cfg.llm_kwargs,
         cost_callback=cost_callback,
+        task_class=TaskClass.PLANNING,
     )
 
     sub_queries = json_repair.loads(response)
@@ -4,6 +4,7 @@ from typing import List, Dict, Any
 from colorama import Fore, Style
 from src.services.gpt_researcher.config.config import Config
 from src.services.gpt_researcher.utils.llm import create_chat_completion
+from src.services.gpt_researcher.llm_provider.routing import TaskClass, route_model
 from src.services.gpt_researcher.utils.logger import get_formatted_logger
 from src.services.gpt_researcher.orchestrator.prompts import (
     generate_report_introduction,
@@ -39,8 +40,9 @@ async def get_report_introduction(
         str: The generated introduction.
     """
     try:
+        model, max_tokens = route_model(TaskClass.WRITING, config)
         introduction = await create_chat_completion(
-            model=config.smart_llm_model,
+            model=model,
             messages=[
                 {"role": "system", "content": f"{role}"},
                 {"role": "user", "content": generate_report_introduction(
@@ -50,9 +52,10 @@ async def get_report_introduction(
             llm_provider=config.llm_provider,
             stream=True,
             websocket=websocket,
-            max_tokens=config.smart_token_limit,
+            max_tokens=max_tokens,
             llm_kwargs=config.llm_kwargs,
             cost_callback=cost_callback,
+            task_class=TaskClass.WRITING,
         )
         return introduction
     except Exception as e:
@@ -83,8 +86,9 @@ async def write_conclusion(
         str: The generated conclusion.
     """
     try:
+        model, max_tokens = route_model(TaskClass.WRITING, config)
         conclusion = await create_chat_completion(
-            model=config.smart_llm_model,
+            model=model,
             messages=[
                 {"role": "system", "content": f"{role}"},
                 {"role": "user", "content": generate_report_conclusion(
@@ -94,9 +98,10 @@ async def write_conclusion(
             llm_provider=config.llm_provider,
             stream=True,
             websocket=websocket,
-            max_tokens=config.smart_token_limit,
+            max_tokens=max_tokens,
             llm_kwargs=config.llm_kwargs,
             cost_callback=cost_callback,
+            task_class=TaskClass.WRITING,
         )
         return conclusion
     except Exception as e:
@@ -127,8 +132,9 @@ async def summarize_url(
         str: The summarized content.
     """
     try:
+        model, max_tokens = route_model(TaskClass.EXTRACTION, config)
         summary = await create_chat_completion(
-            model=config.smart_llm_model,
+            model=model,
             messages=[
                 {"role": "system", "content": f"{role}"},
                 {"role": "user", "content": f"Summarize the following content from {url}:\n\n{content}"},
@@ -137,9 +143,10 @@ async def summarize_url(
             llm_provider=config.llm_provider,
             stream=True,
             websocket=websocket,
-            max_tokens=config.smart_token_limit,
+            max_tokens=max_tokens,
             llm_kwargs=config.llm_kwargs,
             cost_callback=cost_callback,
+            task_class=TaskClass.EXTRACTION,
         )
         return summary
     except Exception as e:
@@ -171,8 +178,9 @@ async def generate_draft_section_titles(
         List[str]: A list of generated section titles.
     """
     try:
+        model, max_tokens = route_model(TaskClass.PLANNING, config)
         section_titles = await create_chat_completion(
-            model=config.smart_llm_model,
+            model=model,
             messages=[
                 {"role": "system", "content": f"{role}"},
                 {"role": "user", "content": generate_draft_titles_prompt(
@@ -182,9 +190,10 @@ async def generate_draft_section_titles(
             llm_provider=config.llm_provider,
             stream=True,
             websocket=None,
-            max_tokens=config.smart_token_limit,
+            max_tokens=max_tokens,
             llm_kwargs=config.llm_kwargs,
             cost_callback=cost_callback,
+            task_class=TaskClass.PLANNING,
         )
         return section_titles.split("\n")
     except Exception as e:
@@ -234,8 +243,9 @@ async def generate_report(
     else:
         content = f"{generate_prompt(query, context, report_source, report_format=cfg.report_format, tone=tone, total_words=cfg.total_words)}"
     try:
+        model, max_tokens = route_model(TaskClass.WRITING, cfg)
         report = await create_chat_completion(
-            model=cfg.smart_llm_model,
+            model=model,
             messages=[
                 {"role": "system", "content": f"{agent_role_prompt}"},
                 {"role": "user", "content": content},
@@ -244,9 +254,10 @@ async def generate_report(
             llm_provider=cfg.llm_provider,
             stream=True,
             websocket=websocket,
-            max_tokens=cfg.smart_token_limit,
+            max_tokens=max_tokens,
             llm_kwargs=cfg.llm_kwargs,
             cost_callback=cost_callback,
+            task_class=TaskClass.WRITING,
         )
     except Exception as e:
         print(f"{Fore.RED}Error in generate_report: {e}{Style.RESET_ALL}")
@@ -1,5 +1,7 @@
-from typing import List, Type
+import asyncio
+from typing import Dict, List, Type
 from src.services.gpt_researcher.config.config import Config
+from src.services.gpt_researcher.retrievers.cache import get_search_cache
 
 def get_retriever(retriever):
     """
@@ -103,6 +105,66 @@ def get_retrievers(headers, cfg):
     return [get_retriever(r) or get_default_retriever() for r in retrievers]
 
 
+async def search_retriever(retriever_class, query: str, cfg, **options) -> List[Dict]:
+    """
+    Searches the query with the given retriever through the shared search cache.
+
+    Args:
+        retriever_class: The retriever class to search with
+        query (str): The query to search for
+        cfg (Config): The configuration object
+        **options: Extra keyword arguments passed to the retriever constructor
+
+    Returns:
+        list: The search results
+    """
+    return await get_search_cache(cfg).search(
+        retriever_class, query, cfg.max_search_results_per_query, **options
+    )
+
+
+async def search_retrievers(retriever_classes, query: str, cfg, **options) -> List[Dict]:
+    """
+    Searches the query with all retrievers concurrently.
+
+    Each retriever is bounded by RETRIEVER_TIMEOUT and the whole fan-out by SEARCH_DEADLINE.
+    Retrievers that fail or miss their budget are skipped, so partial results are returned.
+
+    Args:
+        retriever_classes: The retriever classes to search with
+        query (str): The query to search for
+        cfg (Config): The configuration object
+        **options: Extra keyword arguments passed to the retriever constructors
+
+    Returns:
+        list: The search results of every retriever that answered in time, in retriever order
+    """
+    retriever_timeout = getattr(cfg, "retriever_timeout", 10) or None
+    search_deadline = getattr(cfg, "search_deadline", 15) or None
+
+    async def search(retriever_class):
+        return await asyncio.wait_for(
+            search_retriever(retriever_class, query, cfg, **options), timeout=retriever_timeout
+        )
+
+    tasks = [asyncio.ensure_future(search(retriever_class)) for retriever_class in retriever_classes]
+    if not tasks:
+        return []
+    _, pending = await asyncio.wait(tasks, timeout=search_deadline)
+    for task in pending:
+        task.cancel()
+
+    search_results = []
+    for retriever_class, task in zip(retriever_classes, tasks):
+        if task in pending:
+            print(f"Search with {retriever_class.__name__} missed the search deadline for '{query}'")
+        elif task.exception() is not None:
+            print(f"Search with {retriever_class.__name__} failed for '{query}': {task.exception()!r}")
+        else:
+            search_results.extend(task.result())
+    return search_results
+
+
 def get_default_retriever(retriever):
     from gpt_researcher.retrievers import TavilySearch
 
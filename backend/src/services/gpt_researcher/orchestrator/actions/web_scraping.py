@@ -8,9 +8,9 @@ from src.services.gpt_researcher.utils.logger import get_formatted_logger
 
 logger = get_formatted_logger()
 
-def scrape_urls(urls, cfg=None):
+async def scrape_urls(urls, cfg=None):
     """
-    Scrapes the urls
+    Scrapes the urls concurrently on the event loop
     Args:
         urls: List of urls
         cfg: Config (optional)
@@ -26,10 +26,33 @@ def scrape_urls(urls, cfg=None):
         else "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
     )
     try:
-        content = Scraper(urls, user_agent, cfg.scraper).run()
+        content = await Scraper(urls, user_agent, cfg.scraper, cfg).run()
     except Exception as e:
         print(f"{Fore.RED}Error in scrape_urls: {e}{Style.RESET_ALL}")
     return content
+
+
+async def stream_urls(urls, cfg=None):
+    """
+    Scrapes the urls concurrently and yields each page as soon as it is scraped
+    Args:
+        urls: List of urls
+        cfg: Config (optional)
+
+    Yields:
+        dict: The scraped page, with url, raw_content and title
+    """
+    cfg = cfg or Config()
+    pages = Scraper(urls, cfg.user_agent, cfg.scraper, cfg).stream()
+    try:
+        async for page in pages:
+            yield page
+    except Exception as e:
+        print(f"{Fore.RED}Error in stream_urls: {e}{Style.RESET_ALL}")
+    finally:
+        await pages.aclose()
+
+
 async def filter_urls(urls: List[str], config: Config) -> List[str]:
     """
     Filter URLs based on configuration settings.
@@ -1,7 +1,13 @@
 import asyncio
-from typing import List, Dict, Optional, Set
-
-from src.services.gpt_researcher.context.compression import ContextCompressor, WrittenContentCompressor, VectorstoreCompressor
+from typing import AsyncIterator, List, Dict, Optional, Set
+
+from src.services.gpt_researcher.context.compression import (
+    ContextCompressor,
+    BatchContextCompressor,
+    StreamingContextCompressor,
+    WrittenContentCompressor,
+    VectorstoreCompressor,
+)
 from src.services.gpt_researcher.document import DocumentLoader, LangChainDocumentLoader
 from src.services.gpt_researcher.utils.enum import ReportSource
 from src.services.gpt_researcher.orchestrator.actions.utils import stream_output
@@ -90,6 +96,10 @@ class ContextManager:
                 sub_queries,
             )
 
+        if scraped_data:
+            # The document set is fixed, so chunk and embed it once for all sub-queries
+            return await self.get_similar_content_by_queries(sub_queries, scraped_data)
+
         context = await asyncio.gather(
             *[self.__process_sub_query(sub_query, scraped_data) for sub_query in sub_queries]
         )
@@ -194,6 +204,77 @@ class ContextManager:
             query=query, max_results=10, cost_callback=self.researcher.add_costs
         )
 
+    async def get_similar_content_by_stream(self, query: str, pages: AsyncIterator[Dict]) -> str:
+        """
+        Compresses pages into context for the query as they are scraped, and stops
+        consuming the stream once enough highly similar chunks have been collected.
+        """
+        if self.researcher.verbose:
+            await stream_output(
+                "logs",
+                "fetching_query_content",
+                f"📚 Getting relevant content based on query: {query}...",
+                self.researcher.websocket,
+            )
+
+        cfg = self.researcher.cfg
+        streaming_compressor = StreamingContextCompressor(
+            query=query,
+            embeddings=self.researcher.memory.get_embeddings(),
+            max_results=10,
+            early_stop_chunks=getattr(cfg, "context_early_stop_chunks", 0),
+            early_stop_similarity=getattr(cfg, "context_early_stop_similarity", 0.5),
+        )
+        try:
+            async for page in pages:
+                await streaming_compressor.add_page(page, cost_callback=self.researcher.add_costs)
+                if streaming_compressor.is_saturated():
+                    if self.researcher.verbose:
+                        await stream_output(
+                            "logs",
+                            "context_saturated",
+                            f"⏩ Found enough relevant content for '{query}' after {len(streaming_compressor.documents)} sources",
+                            self.researcher.websocket,
+                        )
+                    break
+        finally:
+            # Cancels the pages that are still being scraped
+            await pages.aclose()
+
+        return streaming_compressor.get_context()
+
+    async def get_similar_content_by_queries(self, queries: List[str], pages: List[Dict]) -> List[str]:
+        """Scores every query against the same pages with a single chunking and embedding pass."""
+        if self.researcher.verbose:
+            await stream_output(
+                "logs",
+                "fetching_query_content",
+                f"📚 Getting relevant content based on {len(queries)} queries...",
+                self.researcher.websocket,
+            )
+
+        batch_compressor = BatchContextCompressor(
+            documents=pages, embeddings=self.researcher.memory.get_embeddings()
+        )
+        contexts = await batch_compressor.async_get_contexts(
+            queries=queries, max_results=10, cost_callback=self.researcher.add_costs
+        )
+
+        if self.researcher.verbose:
+            for query, content in zip(queries, contexts):
+                if content:
+                    await stream_output(
+                        "logs", "subquery_context_window", f"📃 {content}", self.researcher.websocket
+                    )
+                else:
+                    await stream_output(
+                        "logs",
+                        "subquery_context_not_found",
+                        f"🤷 No content found for '{query}'...",
+                        self.researcher.websocket,
+                    )
+        return contexts
+
     async def __get_sub_queries(self, query):
         from gpt_researcher.orchestrator.actions import get_sub_queries
         return await get_sub_queries(
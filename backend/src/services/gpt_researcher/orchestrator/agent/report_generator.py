@@ -1,5 +1,8 @@
+import asyncio
 from typing import Dict, Optional
 
+from src.services.gpt_researcher.context.assembler import ContextAssembler
+
 from src.services.gpt_researcher.orchestrator.prompts import (
     get_report_by_type,
     generate_report_conclusion,
@@ -9,6 +12,7 @@ from src.services.gpt_researcher.orchestrator.prompts import (
 )
 
 from src.services.gpt_researcher.utils.llm import construct_subtopics, create_chat_completion
+from src.services.gpt_researcher.llm_provider.routing import TaskClass, route_model
 from src.services.gpt_researcher.orchestrator.actions import stream_output, generate_report, generate_draft_section_titles
 
 
@@ -31,6 +35,10 @@ class ReportGenerator:
             str: The generated report.
         """
         context = ext_context or self.researcher.context
+        # Deduplicate the sub-query contexts and fit them into the context token budget
+        context_token_budget = getattr(self.researcher.cfg, "context_token_budget", 25000)
+        if context and context_token_budget:
+            context = await asyncio.to_thread(ContextAssembler(context_token_budget).assemble, context)
         if self.researcher.verbose:
             await stream_output(
                 "logs",
@@ -86,8 +94,9 @@ class ReportGenerator:
         conclusion_prompt = generate_report_conclusion(report_content)
 
         # Send the prompt to the LLM and get the response
+        model, max_tokens = route_model(TaskClass.WRITING, self.researcher.cfg)
         conclusion = await create_chat_completion(
-            model=self.researcher.cfg.smart_llm_model,
+            model=model,
             messages=[
                 {"role": "system", "content": f"{self.researcher.role}"},
                 {"role": "user", "content": conclusion_prompt},
@@ -96,9 +105,10 @@ class ReportGenerator:
             llm_provider=self.researcher.cfg.llm_provider,
             stream=True,
             websocket=self.researcher.websocket,
-            max_tokens=self.researcher.cfg.smart_token_limit,
+            max_tokens=max_tokens,
             llm_kwargs=self.researcher.cfg.llm_kwargs,
             cost_callback=self.researcher.add_costs,
+            task_class=TaskClass.WRITING,
         )
 
         if self.researcher.verbose:
@@ -128,8 +138,9 @@ class ReportGenerator:
         )
 
         # Send the prompt to the LLM and get the response
+        model, max_tokens = route_model(TaskClass.WRITING, self.researcher.cfg)
         introduction = await create_chat_completion(
-            model=self.researcher.cfg.smart_llm_model,
+            model=model,
             messages=[
                 {"role": "system", "content": f"{self.researcher.role}"},
                 {"role": "user", "content": introduction_prompt},
@@ -138,9 +149,10 @@ class ReportGenerator:
             llm_provider=self.researcher.cfg.llm_provider,
             stream=True,
             websocket=self.researcher.websocket,
-            max_tokens=self.researcher.cfg.smart_token_limit,
+            max_tokens=max_tokens,
             llm_kwargs=self.researcher.cfg.llm_kwargs,
             cost_callback=self.researcher.add_costs,
+            task_class=TaskClass.WRITING,
         )
 
         if self.researcher.verbose:
@@ -168,6 +180,7 @@ class ReportGenerator:
             data=self.researcher.context,
             config=self.researcher.cfg,
             subtopics=self.researcher.subtopics,
+            cost_callback=self.researcher.add_costs,
         )
 
         if self.researcher.verbose:
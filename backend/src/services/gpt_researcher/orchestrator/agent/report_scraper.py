@@ -1,6 +1,5 @@
-import asyncio
 from typing import List, Dict
-from src.services.gpt_researcher.orchestrator.actions import scrape_urls
+from src.services.gpt_researcher.orchestrator.actions import scrape_urls, search_retrievers
 
 
 class ReportScraper:
@@ -25,7 +24,7 @@ class ReportScraper:
                 self.researcher.websocket,
             )
 
-        scraped_content = await asyncio.to_thread(scrape_urls, urls, self.researcher.cfg)
+        scraped_content = await scrape_urls(urls, self.researcher.cfg)
 
         if self.researcher.verbose:
             await self.researcher.stream_output(
@@ -80,14 +79,8 @@ class ReportScraper:
         Returns:
             List[str]: List of URLs found.
         """
-        search_urls = []
-        for retriever_class in self.researcher.retrievers:
-            retriever = retriever_class(query)
-            search_results = await asyncio.to_thread(
-                retriever.search, max_results=self.researcher.cfg.max_search_results_per_query
-            )
-            search_urls.extend([url.get("href") for url in search_results])
-        return search_urls
+        search_results = await search_retrievers(self.researcher.retrievers, query, self.researcher.cfg)
+        return [url.get("href") for url in search_results]
 
     async def _get_new_urls(self, urls: List[str]) -> List[str]:
         """
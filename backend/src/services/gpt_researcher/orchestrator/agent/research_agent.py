@@ -60,7 +60,11 @@ class GPTResearcher:
         self.research_costs = 0.0
         self.retrievers = get_retrievers(self.headers, self.cfg)
         self.memory = Memory(
-            getattr(self.cfg, 'embedding_provider', None), self.headers)
+            getattr(self.cfg, 'embedding_provider', None),
+            self.headers,
+            cache_size=self.cfg.embedding_cache_size,
+            cache_path=self.cfg.embedding_cache_path,
+        )
 
         # Initialize components
         self.research_conductor = ResearchConductor(self)
@@ -69,7 +73,9 @@ class GPTResearcher:
         self.context_manager = ContextManager(self)
 
     async def conduct_research(self):
-        if not (self.agent and self.role):
+        if not (self.agent and self.role) and self.cfg.combined_planning:
+            await self.research_conductor.plan_research()
+        elif not (self.agent and self.role):
             self.agent, self.role = await choose_agent(
                 query=self.query,
                 cfg=self.cfg,
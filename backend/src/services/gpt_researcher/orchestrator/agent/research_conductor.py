@@ -3,7 +3,7 @@ import random
 from typing import Dict, Optional
 
 from src.services.gpt_researcher.orchestrator.actions.utils import stream_output
-from src.services.gpt_researcher.orchestrator.actions import get_sub_queries, scrape_urls
+from src.services.gpt_researcher.orchestrator.actions import get_sub_queries, plan_research, scrape_urls, search_retrievers, stream_urls
 from src.services.gpt_researcher.document import DocumentLoader, LangChainDocumentLoader
 from src.services.gpt_researcher.utils.enum import ReportSource, ReportType, Tone
 
@@ -13,13 +13,57 @@ class ResearchConductor:
 
     def __init__(self, researcher):
         self.researcher = researcher
+        # Sub-queries of the researcher's own query, when they came with the combined planning call
+        self.planned_sub_queries = None
+        self.speculative_search = None
+
+    async def plan_research(self):
+        """
+        Chooses the agent and generates the sub-queries with one LLM call.
+        For web research the original query is always researched as well, so its search
+        starts meanwhile and its results are waiting in the search cache afterwards.
+        """
+        if (
+            self.researcher.report_source in (ReportSource.Web.value, ReportSource.Hybrid.value)
+            and self.researcher.report_type != "subtopic_report"
+            and not self.researcher.source_urls
+        ):
+            self.speculative_search = asyncio.create_task(
+                search_retrievers(self.researcher.retrievers, self.researcher.query, self.researcher.cfg)
+            )
+
+        try:
+            self.researcher.agent, self.researcher.role, self.planned_sub_queries = await plan_research(
+                query=self.researcher.query,
+                cfg=self.researcher.cfg,
+                parent_query=self.researcher.parent_query,
+                report_type=self.researcher.report_type,
+                cost_callback=self.researcher.add_costs,
+            )
+        except BaseException:
+            self.__cancel_speculative_search()
+            raise
+
+    def __cancel_speculative_search(self):
+        if self.speculative_search:
+            self.speculative_search.cancel()
+            self.speculative_search = None
 
     async def conduct_research(self):
         """
         Runs the GPT Researcher to conduct research
         """
-        # Reset visited_urls and source_urls at the start of each research task
-        self.researcher.visited_urls.clear()
+        try:
+            return await self.__conduct_research()
+        finally:
+            # Not consumed when the research failed, was cancelled or never searched the original query
+            self.__cancel_speculative_search()
+
+    async def __conduct_research(self):
+        # Reset visited_urls and source_urls at the start of each research task.
+        # Subtopic researchers share the detailed report's visited urls, so keep them
+        if self.researcher.report_type != "subtopic_report":
+            self.researcher.visited_urls.clear()
         # Due to deprecation of report_type in favor of report_source,
         # we need to clear source_urls if report_source is not static
         if self.researcher.report_source != "static" and self.researcher.report_type != "sources":
@@ -88,7 +132,7 @@ class ResearchConductor:
                 self.researcher.websocket,
             )
 
-        scraped_sites = scrape_urls(new_search_urls, self.researcher.cfg)
+        scraped_sites = await scrape_urls(new_search_urls, self.researcher.cfg)
         return await self.researcher.context_manager.get_similar_content_by_query(self.researcher.query, scraped_sites)
 
     async def __get_context_by_vectorstore(self, query, filter: Optional[dict] = None):
@@ -146,6 +190,13 @@ class ResearchConductor:
                 sub_queries,
             )
 
+        # Local and LangChain documents are the same for every sub-query,
+        # so chunk and embed them once and score all sub-queries in a batch
+        if scraped_data:
+            return await self.researcher.context_manager.get_similar_content_by_queries(
+                sub_queries, scraped_data
+            )
+
         # Using asyncio.gather to process the sub_queries asynchronously
         context = await asyncio.gather(
             *[
@@ -205,10 +256,18 @@ class ResearchConductor:
                 self.researcher.websocket,
             )
 
-        if not scraped_data:
-            scraped_data = await self.__scrape_data_by_query(sub_query)
-
-        content = await self.researcher.context_manager.get_similar_content_by_query(sub_query, scraped_data)
+        if scraped_data:
+            content = await self.researcher.context_manager.get_similar_content_by_query(sub_query, scraped_data)
+        else:
+            # Compress each page as soon as it is scraped instead of waiting for the slowest host
+            new_search_urls = await self.__search_urls_by_query(sub_query)
+            scraped_urls = set()
+            content = await self.researcher.context_manager.get_similar_content_by_stream(
+                sub_query,
+                self.__track_scraped(new_search_urls, stream_urls(new_search_urls, self.researcher.cfg), scraped_urls),
+            )
+            # URLs skipped by an early stop were never scraped; don't report them as visited
+            self.researcher.visited_urls.difference_update(set(new_search_urls) - scraped_urls)
 
         if content and self.researcher.verbose:
             await stream_output(
@@ -223,6 +282,17 @@ class ResearchConductor:
             )
         return content
 
+    async def __track_scraped(self, urls, pages, scraped_urls: set):
+        """Passes the streamed pages through, recording which of the urls were scraped."""
+        try:
+            async for page in pages:
+                scraped_urls.add(page.get("url"))
+                yield page
+            # The stream ran to the end, so every url was attempted, including failed ones
+            scraped_urls.update(urls)
+        finally:
+            await pages.aclose()
+
     async def __get_new_urls(self, url_set_input):
         """Gets the new urls from the given url set.
         Args: url_set_input (set[str]): The url set to get the new urls from
@@ -246,31 +316,27 @@ class ResearchConductor:
 
         return new_urls
 
-    async def __scrape_data_by_query(self, sub_query):
+    async def __search_urls_by_query(self, sub_query):
         """
-        Runs a sub-query across multiple retrievers and scrapes the resulting URLs.
+        Runs a sub-query across multiple retrievers and returns the new URLs to scrape.
 
         Args:
             sub_query (str): The sub-query to search for.
 
         Returns:
-            list: A list of scraped content results.
+            list: The URLs not visited yet, shuffled.
         """
-        new_search_urls = []
-
-        # Iterate through all retrievers
-        for retriever_class in self.researcher.retrievers:
-            # Instantiate the retriever with the sub-query
-            retriever = retriever_class(sub_query)
-
-            # Perform the search using the current retriever
-            search_results = await asyncio.to_thread(
-                retriever.search, max_results=self.researcher.cfg.max_search_results_per_query
+        # Search all retrievers concurrently, through the shared search cache
+        if self.speculative_search and sub_query == self.researcher.query:
+            speculative_search, self.speculative_search = self.speculative_search, None
+            search_results = await speculative_search
+        else:
+            search_results = await search_retrievers(
+                self.researcher.retrievers, sub_query, self.researcher.cfg
             )
 
-            # Collect new URLs from search results
-            search_urls = [url.get("href") for url in search_results]
-            new_search_urls.extend(search_urls)
+        # Collect new URLs from search results
+        new_search_urls = [url.get("href") for url in search_results]
 
         # Get unique URLs
         new_search_urls = await self.__get_new_urls(new_search_urls)
@@ -285,14 +351,11 @@ class ResearchConductor:
                 self.researcher.websocket,
             )
 
-        # Scrape the new URLs
-        scraped_content_results = await asyncio.to_thread(
-            scrape_urls, new_search_urls, self.researcher.cfg
-        )
-
-        return scraped_content_results
+        return new_search_urls
 
     async def __get_sub_queries(self, query):
+        if self.planned_sub_queries and query == self.researcher.query:
+            return list(self.planned_sub_queries)
         # Generate Sub-Queries including original query
         return await get_sub_queries(
             query=query,
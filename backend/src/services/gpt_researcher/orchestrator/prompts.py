@@ -190,6 +190,49 @@ response:
 """
 
 
+def research_plan_instructions():
+    return auto_agent_instructions() + """
+In the same response, also write the google search queries asked for in the task, as a "sub_queries" list of strings:
+{
+    "server": "💰 Finance Agent",
+    "agent_role_prompt": "You are a seasoned finance analyst AI assistant. ...",
+    "sub_queries": ["query 1", "query 2", "query 3"]
+}
+The response should contain ONLY the JSON object.
+"""
+
+
+def generate_research_plan_prompt(
+    question: str,
+    parent_query: str,
+    report_type: str,
+    max_iterations: int = 3,
+):
+    """Generates the prompt that picks the agent and writes the search queries in one response.
+    Args:
+        question (str): The question to plan the research for
+        parent_query (str): The main question (only relevant for detailed reports)
+        report_type (str): The report type
+        max_iterations (int): The maximum number of search queries to generate
+
+    Returns: str: The research plan prompt for the given question
+    """
+
+    if parent_query and (
+        report_type == ReportType.DetailedReport.value
+        or report_type == ReportType.SubtopicReport.value
+    ):
+        task = f"{parent_query} - {question}"
+    else:
+        task = question
+
+    return (
+        f"task: {task}\n"
+        f'Write {max_iterations} google search queries to search online that form an objective opinion from the task.\n'
+        f"Assume the current date is {datetime.now(timezone.utc).strftime('%B %d, %Y')} if required."
+    )
+
+
 def generate_summary_prompt(query, data):
     """Generates the summary prompt for the given question and text.
     Args: question (str): The question to generate the summary prompt for
@@ -72,6 +72,9 @@ class DetailedReport:
         self.global_written_sections: List[str] = []
         self.global_urls: Set[str] = set(
             self.source_urls) if self.source_urls else set()
+        # Subtopics research concurrently up to this limit; shared state is merged under the lock
+        self.subtopic_concurrency = max(1, getattr(self.main_task_assistant.cfg, "subtopic_concurrency", 1))
+        self._merge_lock = asyncio.Lock()
 
     async def run(self) -> str:
         # Main method to execute the entire research and report generation process
@@ -103,12 +106,18 @@ class DetailedReport:
         return all_subtopics
 
     async def _generate_subtopic_reports(self, subtopics: List[Dict]) -> tuple:
-        # Generate individual reports for each subtopic
+        # Generate individual reports for each subtopic, at most `subtopic_concurrency` at a time
         subtopic_reports = []
         subtopics_report_body = ""
+        semaphore = asyncio.Semaphore(self.subtopic_concurrency)
 
-        for subtopic in subtopics:
-            result = await self._get_subtopic_report(subtopic)
+        async def get_subtopic_report(subtopic: Dict) -> Dict[str, str]:
+            async with semaphore:
+                return await self._get_subtopic_report(subtopic)
+
+        # Results are merged in subtopic order, whatever order they finish in
+        results = await asyncio.gather(*[get_subtopic_report(subtopic) for subtopic in subtopics])
+        for result in results:
             if result["report"]:
                 subtopic_reports.append(result)
                 subtopics_report_body += f"\n\n\n{result['report']}"
@@ -132,8 +141,8 @@ class DetailedReport:
             tone=self.tone,
         )
 
-        # Conduct research for the subtopic
-        subtopic_assistant.context = list(set(self.global_context))
+        # Conduct research for the subtopic. Subtopics share the `global_urls` set,
+        # so a URL scraped by one subtopic is skipped by the others, even when running concurrently
         await subtopic_assistant.conduct_research()
 
         # Generate and process draft section titles
@@ -144,26 +153,42 @@ class DetailedReport:
         parse_draft_section_titles_text = [header.get(
             "text", "") for header in parse_draft_section_titles]
 
+        # Each subtopic sees the headers and sections of the subtopics finished before it starts
+        # writing; with SUBTOPIC_CONCURRENCY > 1, reports written at the same time don't see each other
+        async with self._merge_lock:
+            existing_headers = list(self.existing_headers)
+            written_sections = list(self.global_written_sections)
+
         # Get relevant content based on draft section titles
         relevant_contents = await subtopic_assistant.get_similar_written_contents_by_draft_section_titles(
-            current_subtopic_task, parse_draft_section_titles_text, self.global_written_sections
+            current_subtopic_task, parse_draft_section_titles_text, written_sections
         )
 
         # Write the subtopic report
-        subtopic_report = await subtopic_assistant.write_report(self.existing_headers, relevant_contents)
+        subtopic_report = await subtopic_assistant.write_report(existing_headers, relevant_contents)
 
-        # Update global tracking variables
-        self.global_written_sections.extend(extract_sections(subtopic_report))
-        self.global_context = list(set(subtopic_assistant.context))
-        self.global_urls.update(subtopic_assistant.visited_urls)
+        async with self._merge_lock:
+            # Update global tracking variables
+            self.global_written_sections.extend(extract_sections(subtopic_report))
+            self.global_context = list(dict.fromkeys(
+                self._context_list(self.global_context) + self._context_list(subtopic_assistant.context)
+            ))
+            self.global_urls.update(subtopic_assistant.visited_urls)
 
-        self.existing_headers.append({
-            "subtopic task": current_subtopic_task,
-            "headers": extract_headers(subtopic_report),
-        })
+            self.existing_headers.append({
+                "subtopic task": current_subtopic_task,
+                "headers": extract_headers(subtopic_report),
+            })
 
         return {"topic": subtopic, "report": subtopic_report}
 
+    @staticmethod
+    def _context_list(context) -> List[str]:
+        # Web research leaves a list of context strings; hybrid research a single combined string
+        if isinstance(context, str):
+            return [context] if context else []
+        return list(context or [])
+
     async def _construct_detailed_report(self, introduction: str, report_body: str) -> str:
         # Assemble the final detailed report
         toc = table_of_contents(report_body)
@@ -0,0 +1,78 @@
+import asyncio
+import json
+import threading
+from typing import Dict, List
+
+from src.services.gpt_researcher.utils.cache import LRUCache
+
+_search_cache = None
+_search_cache_lock = threading.Lock()
+
+
+class SearchCache:
+    """
+    Retriever-agnostic search result cache.
+
+    Results are cached with a TTL, keyed by (retriever, query, max_results, options).
+    Concurrent identical searches are coalesced so they share one upstream call.
+    """
+
+    def __init__(self, ttl: float = 900, max_size: int = 5000):
+        self.ttl = ttl
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+        self._in_flight: Dict[str, asyncio.Future] = {}
+
+    @staticmethod
+    def make_key(retriever_class, query: str, max_results: int, options: dict) -> str:
+        return json.dumps(
+            [retriever_class.__name__, query.strip(), max_results, options],
+            sort_keys=True,
+            default=str,
+        )
+
+    async def search(self, retriever_class, query: str, max_results: int, **options) -> List[Dict]:
+        """
+        Returns the search results for the query, from the cache, from an identical
+        in-flight search, or from a new upstream call.
+        """
+        key = self.make_key(retriever_class, query, max_results, options)
+        if self.ttl:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(
+                self._search(retriever_class, query, max_results, options)
+            )
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._on_done(key, done))
+
+        # Shield the shared call so one cancelled caller does not cancel it for the others
+        return await asyncio.shield(future)
+
+    async def _search(self, retriever_class, query: str, max_results: int, options: dict) -> List[Dict]:
+        retriever = retriever_class(query, **options)
+        return await asyncio.to_thread(retriever.search, max_results=max_results) or []
+
+    def _on_done(self, key: str, future: asyncio.Future) -> None:
+        self._in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+        results = future.result()
+        # Retrievers swallow their errors and return no results, so don't cache empty responses
+        if self.ttl and results:
+            self._cache.set(key, results)
+
+
+def get_search_cache(cfg=None) -> SearchCache:
+    """Returns the process-wide search cache."""
+    global _search_cache
+    with _search_cache_lock:
+        if _search_cache is None:
+            _search_cache = SearchCache(
+                ttl=getattr(cfg, "search_cache_ttl", 900),
+                max_size=getattr(cfg, "search_cache_size", 5000),
+            )
+    return _search_cache
@@ -1,6 +1,58 @@
 from bs4 import BeautifulSoup
 
 
+def parse_html_document(content: bytes, encoding: str = None) -> dict:
+    """
+    Parses raw HTML and returns the page title and the cleaned text content.
+
+    Kept at module level so it can be shipped to a process pool by the async scraper.
+    """
+    soup = BeautifulSoup(content, "lxml", from_encoding=encoding)
+    title = soup.title.get_text(strip=True) if soup.title else ""
+
+    for script_or_style in soup(["script", "style"]):
+        script_or_style.extract()
+
+    raw_content = get_content_from_soup(soup)
+    lines = (line.strip() for line in raw_content.splitlines())
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    return {"title": title, "raw_content": "\n".join(chunk for chunk in chunks if chunk)}
+
+
+def extract_text_from_html(content: bytes, encoding: str = None) -> str:
+    """Parses raw HTML and returns the cleaned text content."""
+    return parse_html_document(content, encoding)["raw_content"]
+
+
+def get_content_from_soup(soup: BeautifulSoup) -> str:
+    """Get the relevant text from the soup with improved filtering"""
+    text_elements = []
+    tags = ["h1", "h2", "h3", "h4", "h5", "p", "li", "div", "span"]
+
+    for element in soup.find_all(tags):
+        # Skip empty elements
+        if not element.text.strip():
+            continue
+
+        # Skip elements with very short text (likely buttons or links)
+        if len(element.text.split()) < 3:
+            continue
+
+        # Check if the element is likely to be navigation or a menu
+        parent_classes = element.parent.get('class', [])
+        if any(cls in ['nav', 'menu', 'sidebar', 'footer'] for cls in parent_classes):
+            continue
+
+        # Remove excess whitespace and join lines
+        cleaned_text = ' '.join(element.text.split())
+
+        # Add the cleaned text to our list of elements
+        text_elements.append(cleaned_text)
+
+    # Join all text elements with newlines
+    return '\n\n'.join(text_elements)
+
+
 class BeautifulSoupScraper:
 
     def __init__(self, link, session=None):
@@ -11,7 +63,7 @@ class BeautifulSoupScraper:
         """
         This function scrapes content from a webpage by making a GET request, parsing the HTML using
         BeautifulSoup, and extracting script and style elements before returning the cleaned content.
-        
+
         Returns:
           The `scrape` method is returning the cleaned and extracted content from the webpage specified
         by the `self.link` attribute. The method fetches the webpage content, removes script and style
@@ -20,18 +72,7 @@ class BeautifulSoupScraper:
         """
         try:
             response = self.session.get(self.link, timeout=4)
-            soup = BeautifulSoup(
-                response.content, "lxml", from_encoding=response.encoding
-            )
-
-            for script_or_style in soup(["script", "style"]):
-                script_or_style.extract()
-
-            raw_content = self.get_content_from_url(soup)
-            lines = (line.strip() for line in raw_content.splitlines())
-            chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-            content = "\n".join(chunk for chunk in chunks if chunk)
-            return content
+            return extract_text_from_html(response.content, response.encoding)
 
         except Exception as e:
             print("Error! : " + str(e))
@@ -39,28 +80,4 @@ class BeautifulSoupScraper:
 
     def get_content_from_url(self, soup: BeautifulSoup) -> str:
         """Get the relevant text from the soup with improved filtering"""
-        text_elements = []
-        tags = ["h1", "h2", "h3", "h4", "h5", "p", "li", "div", "span"]
-
-        for element in soup.find_all(tags):
-            # Skip empty elements
-            if not element.text.strip():
-                continue
-
-            # Skip elements with very short text (likely buttons or links)
-            if len(element.text.split()) < 3:
-                continue
-
-            # Check if the element is likely to be navigation or a menu
-            parent_classes = element.parent.get('class', [])
-            if any(cls in ['nav', 'menu', 'sidebar', 'footer'] for cls in parent_classes):
-                continue
-
-            # Remove excess whitespace and join lines
-            cleaned_text = ' '.join(element.text.split())
-
-            # Add the cleaned text to our list of elements
-            text_elements.append(cleaned_text)
-
-        # Join all text elements with newlines
-        return '\n\n'.join(text_elements)
+        return get_content_from_soup(soup)
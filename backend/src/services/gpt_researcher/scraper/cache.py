@@ -0,0 +1,184 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from src.services.gpt_researcher.utils.cache import LRUCache, SQLiteCache
+
+TRACKING_PARAM_PREFIXES = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+_scrape_cache = None
+_scrape_cache_lock = threading.Lock()
+
+
+def normalize_url(url: str) -> str:
+    """
+    Normalizes a URL so that trivially different links share one cache entry.
+    Lowercases scheme and host, drops default ports, fragments and tracking parameters,
+    and sorts the query string.
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(TRACKING_PARAM_PREFIXES)
+    )
+    path = parts.path or "/"
+    return urlunsplit((scheme, netloc, path, urlencode(query), ""))
+
+
+class ScrapeCache(ABC):
+    """
+    Base class for the shared scrape cache.
+
+    Entries are dicts holding `raw_content`, `title`, the `etag` and `last_modified`
+    validators and `fetched_at`. Entries older than `ttl` are stale: they are kept so
+    they can be revalidated with a conditional GET, and are only dropped by size eviction.
+    """
+
+    def __init__(self, ttl: float = 3600):
+        self.ttl = ttl
+
+    @abstractmethod
+    def get(self, url: str) -> Optional[dict]:
+        """Returns the entry for the URL, fresh or stale, or None."""
+
+    @abstractmethod
+    def set(self, url: str, entry: dict) -> None:
+        """Stores the entry for the URL."""
+
+    def is_fresh(self, entry: dict) -> bool:
+        return time.time() - entry.get("fetched_at", 0) < self.ttl
+
+    # Async variants for the scraper: SQLite and disk I/O run off the event loop
+    async def aget(self, url: str) -> Optional[dict]:
+        return await asyncio.to_thread(self.get, url)
+
+    async def aset(self, url: str, entry: dict) -> None:
+        await asyncio.to_thread(self.set, url, entry)
+
+
+class MemoryScrapeCache(ScrapeCache):
+    """In-process LRU scrape cache."""
+
+    def __init__(self, ttl: float = 3600, max_entries: int = 2000):
+        super().__init__(ttl)
+        self._cache = LRUCache(max_size=max_entries)
+
+    def get(self, url: str) -> Optional[dict]:
+        return self._cache.get(normalize_url(url))
+
+    def set(self, url: str, entry: dict) -> None:
+        self._cache.set(normalize_url(url), entry)
+
+    # Memory lookups don't block, so skip the thread hop
+    async def aget(self, url: str) -> Optional[dict]:
+        return self.get(url)
+
+    async def aset(self, url: str, entry: dict) -> None:
+        self.set(url, entry)
+
+
+class SQLiteScrapeCache(ScrapeCache):
+    """Scrape cache stored in a SQLite database, shared by every process on the host."""
+
+    def __init__(self, path: str, ttl: float = 3600, max_entries: int = 2000):
+        super().__init__(ttl)
+        self._store = SQLiteCache(path, table="scrape_cache", max_entries=max_entries)
+
+    def get(self, url: str) -> Optional[dict]:
+        return self._store.get(normalize_url(url))
+
+    def set(self, url: str, entry: dict) -> None:
+        self._store.set(normalize_url(url), entry)
+
+
+class DiskScrapeCache(ScrapeCache):
+    """
+    Scrape cache stored as one JSON file per URL in a local directory.
+
+    The number of files is tracked in memory, so the directory is only scanned when it
+    exceeds `max_entries`; eviction then trims it to 90% so scans stay infrequent.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600, max_entries: int = 2000):
+        super().__init__(ttl)
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+        self._count = sum(1 for name in os.listdir(path) if name.endswith(".json"))
+
+    def _file(self, url: str) -> str:
+        digest = hashlib.sha256(normalize_url(url).encode("utf-8")).hexdigest()
+        return os.path.join(self.path, f"{digest}.json")
+
+    def get(self, url: str) -> Optional[dict]:
+        try:
+            with open(self._file(url), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def set(self, url: str, entry: dict) -> None:
+        filename = self._file(url)
+        tmp_filename = f"{filename}.{threading.get_ident()}.tmp"
+        is_new = not os.path.exists(filename)
+        with open(tmp_filename, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp_filename, filename)
+        if is_new:
+            with self._lock:
+                self._count += 1
+                over_limit = self._count > self.max_entries
+            if over_limit:
+                self._evict()
+
+    def _evict(self) -> None:
+        with self._lock:
+            files = [os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith(".json")]
+            self._count = len(files)
+            if self._count <= self.max_entries:
+                return
+            files.sort(key=lambda name: os.path.getmtime(name))
+            for name in files[:self._count - int(self.max_entries * 0.9)]:
+                try:
+                    os.remove(name)
+                    self._count -= 1
+                except OSError:
+                    pass
+
+
+def get_scrape_cache(cfg=None) -> Optional[ScrapeCache]:
+    """
+    Returns the process-wide scrape cache configured by SCRAPE_CACHE
+    ("memory", "sqlite" or "disk"), or None when caching is disabled.
+    """
+    global _scrape_cache
+    backend = getattr(cfg, "scrape_cache", "memory")
+    if not backend or backend == "none":
+        return None
+    with _scrape_cache_lock:
+        if _scrape_cache is None:
+            ttl = getattr(cfg, "scrape_cache_ttl", 3600)
+            max_entries = getattr(cfg, "scrape_cache_size", 2000)
+            path = getattr(cfg, "scrape_cache_path", None) or "./.cache/scrape"
+            match backend:
+                case "memory":
+                    _scrape_cache = MemoryScrapeCache(ttl, max_entries)
+                case "sqlite":
+                    _scrape_cache = SQLiteScrapeCache(os.path.join(path, "scrape_cache.db"), ttl, max_entries)
+                case "disk":
+                    _scrape_cache = DiskScrapeCache(path, ttl, max_entries)
+                case _:
+                    raise ValueError(f"Unknown scrape cache backend: {backend}")
+    return _scrape_cache
@@ -1,15 +1,72 @@
-from concurrent.futures.thread import ThreadPoolExecutor
-from functools import partial
+import asyncio
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 
-import requests
+import aiohttp
 
-from gpt_researcher.scraper import (
+from src.services.gpt_researcher.scraper import (
     ArxivScraper,
     BeautifulSoupScraper,
     PyMuPDFScraper,
     WebBaseLoaderScraper,
     BrowserScraper
 )
+from src.services.gpt_researcher.scraper.beautiful_soup.beautiful_soup import parse_html_document
+from src.services.gpt_researcher.scraper.cache import get_scrape_cache
+
+# One HTTP session per event loop, shared by every research session in the process
+_http_sessions = {}
+_parse_executor = None
+_parse_executor_lock = threading.Lock()
+
+
+def get_http_session(max_connections: int = 100, max_per_host: int = 4, timeout: float = 4) -> aiohttp.ClientSession:
+    """
+    Returns the shared aiohttp session for the running event loop.
+    The connector bounds the connection pool, limits connections per host and caches DNS lookups.
+    """
+    loop = asyncio.get_running_loop()
+    session = _http_sessions.get(loop)
+    if session is None or session.closed:
+        connector = aiohttp.TCPConnector(
+            limit=max_connections,
+            limit_per_host=max_per_host,
+            ttl_dns_cache=300,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout),
+        )
+        _http_sessions[loop] = session
+    return session
+
+
+async def close_http_session() -> None:
+    """Closes the shared HTTP session of the running event loop, if any."""
+    session = _http_sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+def get_parse_executor(max_workers: int):
+    """
+    Returns the process pool used to parse HTML, or None to parse in a thread instead.
+    """
+    global _parse_executor
+    if max_workers <= 0:
+        return None
+    with _parse_executor_lock:
+        if _parse_executor is None:
+            _parse_executor = ProcessPoolExecutor(max_workers=max_workers)
+    return _parse_executor
+
+
+def _reset_parse_executor() -> None:
+    global _parse_executor
+    with _parse_executor_lock:
+        _parse_executor = None
 
 
 class Scraper:
@@ -17,43 +74,134 @@ class Scraper:
     Scraper class to extract the content from the links
     """
 
-    def __init__(self, urls, user_agent, scraper):
+    def __init__(self, urls, user_agent, scraper, cfg=None):
         """
         Initialize the Scraper class.
         Args:
-            urls:
+            urls: List of urls to scrape
+            user_agent: User agent sent with every request
+            scraper: Default scraper key for links that are not pdf or arxiv
+            cfg: Config (optional), used for connection and parsing limits
         """
         self.urls = urls
-        self.session = requests.Session()
-        self.session.headers.update({"User-Agent": user_agent})
+        self.user_agent = user_agent
         self.scraper = scraper
-
-    def run(self):
+        self.max_connections = getattr(cfg, "scraper_max_connections", 100)
+        self.max_per_host = getattr(cfg, "scraper_max_per_host", 4)
+        self.timeout = getattr(cfg, "scraper_timeout", 4)
+        self.max_body_bytes = getattr(cfg, "scraper_max_body_bytes", 5_000_000)
+        self.parse_workers = getattr(cfg, "scraper_parse_workers", 2)
+        self.cache = get_scrape_cache(cfg)
+
+    async def run(self):
         """
         Extracts the content from the links
         """
-        partial_extract = partial(self.extract_data_from_link, session=self.session)
-        with ThreadPoolExecutor(max_workers=20) as executor:
-            contents = executor.map(partial_extract, self.urls)
+        session = get_http_session(self.max_connections, self.max_per_host, self.timeout)
+        contents = await asyncio.gather(
+            *[self.extract_data_from_link(link, session) for link in self.urls]
+        )
         res = [content for content in contents if content["raw_content"] is not None]
         return res
 
-    def extract_data_from_link(self, link, session):
+    async def stream(self):
         """
-        Extracts the data from the link
+        Yields the content of each link as soon as it has been scraped, in completion order.
+        Closing the generator early cancels the links still being fetched.
         """
-        content = ""
+        session = get_http_session(self.max_connections, self.max_per_host, self.timeout)
+        tasks = [asyncio.ensure_future(self.extract_data_from_link(link, session)) for link in self.urls]
         try:
-            Scraper = self.get_scraper(link)
-            scraper = Scraper(link, session)
-            content = scraper.scrape()
+            for next_done in asyncio.as_completed(tasks):
+                content = await next_done
+                if content["raw_content"] is not None:
+                    yield content
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def extract_data_from_link(self, link, session):
+        """
+        Extracts the data from the link, serving it from the shared scrape cache when possible
+        """
+        cached = await self.cache.aget(link) if self.cache else None
+        if cached and self.cache.is_fresh(cached):
+            return {"url": link, "raw_content": cached["raw_content"], "title": cached.get("title", "")}
 
+        try:
+            scraper_key = self.get_scraper_key(link)
+            if scraper_key == "bs":
+                page = await self.scrape_html(link, session, cached)
+            else:
+                # The remaining scrapers are blocking libraries, keep them off the event loop
+                Scraper = self.get_scraper(link)
+                scraper = Scraper(link)
+                page = {"raw_content": await asyncio.to_thread(scraper.scrape), "title": ""}
+
+            content = page["raw_content"]
             if len(content) < 100:
                 return {"url": link, "raw_content": None}
-            return {"url": link, "raw_content": content}
+
+            if self.cache:
+                await self.cache.aset(link, {**page, "fetched_at": time.time()})
+            return {"url": link, "raw_content": content, "title": page.get("title", "")}
         except Exception as e:
             return {"url": link, "raw_content": None}
 
+    async def scrape_html(self, link, session, cached=None):
+        """
+        Fetches a page with the shared async session and parses it in the process pool.
+        A stale cache entry with validators is revalidated with a conditional GET.
+        """
+        headers = {"User-Agent": self.user_agent}
+        if cached:
+            if cached.get("etag"):
+                headers["If-None-Match"] = cached["etag"]
+            if cached.get("last_modified"):
+                headers["If-Modified-Since"] = cached["last_modified"]
+
+        async with session.get(link, headers=headers) as response:
+            # Not modified: the caller stores the entry again, which marks it fresh
+            if response.status == 304 and cached:
+                return cached
+            # Error pages must not be parsed, cached and served to other sessions
+            if not 200 <= response.status < 300:
+                raise ValueError(f"Unexpected status {response.status} for {link}")
+            body = await self.read_body(response)
+            encoding = response.charset
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+
+        page = await self.parse_html(body, encoding)
+        return {**page, "etag": etag, "last_modified": last_modified}
+
+    async def read_body(self, response) -> bytes:
+        """Streams the response body, stopping once `max_body_bytes` have been read."""
+        body = bytearray()
+        async for chunk in response.content.iter_chunked(64 * 1024):
+            body.extend(chunk)
+            if len(body) >= self.max_body_bytes:
+                break
+        return bytes(body)
+
+    async def parse_html(self, body: bytes, encoding: str = None) -> dict:
+        loop = asyncio.get_running_loop()
+        executor = get_parse_executor(self.parse_workers)
+        if executor is None:
+            return await asyncio.to_thread(parse_html_document, body, encoding)
+        try:
+            return await loop.run_in_executor(executor, parse_html_document, body, encoding)
+        except BrokenProcessPool:
+            _reset_parse_executor()
+            return await asyncio.to_thread(parse_html_document, body, encoding)
+
+    def get_scraper_key(self, link):
+        if link.endswith(".pdf"):
+            return "pdf"
+        elif "arxiv.org" in link:
+            return "arxiv"
+        return self.scraper
+
     def get_scraper(self, link):
         """
         The function `get_scraper` determines the appropriate scraper class based on the provided link
@@ -79,14 +227,7 @@ class Scraper:
             "browser": BrowserScraper,
         }
 
-        scraper_key = None
-
-        if link.endswith(".pdf"):
-            scraper_key = "pdf"
-        elif "arxiv.org" in link:
-            scraper_key = "arxiv"
-        else:
-            scraper_key = self.scraper
+        scraper_key = self.get_scraper_key(link)
 
         scraper_class = SCRAPER_CLASSES.get(scraper_key)
         if scraper_class is None:
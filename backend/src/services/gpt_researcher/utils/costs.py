@@ -1,3 +1,7 @@
+import asyncio
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
 import tiktoken
 
 # Per OpenAI Pricing Page: https://openai.com/api/pricing/
@@ -7,19 +11,82 @@ OUTPUT_COST_PER_TOKEN = 0.000015
 IMAGE_INFERENCE_COST = 0.003825
 EMBEDDING_COST = 0.02 / 1000000 # Assumes new ada-3-small
 
+# Inputs larger than this many characters are encoded in a worker thread, off the event loop
+OFFLOAD_CHARS = 20000
+
+
+@lru_cache(maxsize=None)
+def get_encoding(name: str = ENCODING_MODEL) -> tiktoken.Encoding:
+    """Returns the tiktoken encoding, loading it only once per process."""
+    return tiktoken.get_encoding(name)
+
+
+@lru_cache(maxsize=None)
+def get_encoding_for_model(model: str) -> tiktoken.Encoding:
+    """Returns the tiktoken encoding of a model, falling back to the default encoding."""
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return get_encoding(ENCODING_MODEL)
+
+
+def count_tokens(texts: Iterable[str], encoding: Optional[tiktoken.Encoding] = None) -> int:
+    """Counts the tokens of all texts with one batched encode."""
+    encoding = encoding or get_encoding()
+    texts = [text for text in texts if text]
+    if not texts:
+        return 0
+    return sum(len(tokens) for tokens in encoding.encode_batch(texts, disallowed_special=()))
+
+
+def llm_cost_from_tokens(input_tokens: int, output_tokens: int) -> float:
+    return input_tokens * INPUT_COST_PER_TOKEN + output_tokens * OUTPUT_COST_PER_TOKEN
+
+
+def _message_texts(messages) -> List[str]:
+    if isinstance(messages, str):
+        return [messages]
+    # Messages are OpenAI-style dicts or LangChain message objects
+    return [str(m.get("content", "")) if isinstance(m, dict) else str(getattr(m, "content", m)) for m in messages]
+
+
+def _doc_texts(docs) -> List[str]:
+    return [str(doc.get("raw_content", "")) if isinstance(doc, dict) else str(doc) for doc in docs]
+
+
+def estimate_prompt_tokens(messages) -> int:
+    """Cheap token estimate (about 4 characters per token), used for rate limiting without encoding."""
+    return sum(len(text) for text in _message_texts(messages)) // 4
+
 
 # Cost estimation is via OpenAI libraries and models. May vary for other models
-def estimate_llm_cost(input_content: str, output_content: str) -> float:
-    encoding = tiktoken.get_encoding(ENCODING_MODEL)
-    input_tokens = encoding.encode(input_content)
-    output_tokens = encoding.encode(output_content)
-    input_costs = len(input_tokens) * INPUT_COST_PER_TOKEN
-    output_costs = len(output_tokens) * OUTPUT_COST_PER_TOKEN
-    return input_costs + output_costs
+def estimate_llm_cost(input_content, output_content: str) -> float:
+    encoding = get_encoding()
+    input_tokens = count_tokens(_message_texts(input_content), encoding)
+    output_tokens = count_tokens([output_content], encoding)
+    return llm_cost_from_tokens(input_tokens, output_tokens)
 
 
 def estimate_embedding_cost(model, docs):
-    encoding = tiktoken.encoding_for_model(model)
-    total_tokens = sum(len(encoding.encode(str(doc))) for doc in docs)
+    total_tokens = count_tokens(_doc_texts(docs), get_encoding_for_model(model))
     return total_tokens * EMBEDDING_COST
 
+
+async def aestimate_llm_cost(input_content, output_content: str, usage: Optional[dict] = None) -> float:
+    """
+    Estimates the cost of an LLM call. Uses the provider-reported token usage when given,
+    and encodes large inputs in a worker thread so the event loop is not blocked.
+    """
+    if usage and usage.get("input_tokens") is not None:
+        return llm_cost_from_tokens(usage.get("input_tokens", 0), usage.get("output_tokens", 0))
+    size = sum(len(text) for text in _message_texts(input_content)) + len(output_content or "")
+    if size > OFFLOAD_CHARS:
+        return await asyncio.to_thread(estimate_llm_cost, input_content, output_content)
+    return estimate_llm_cost(input_content, output_content)
+
+
+async def aestimate_embedding_cost(model, docs) -> float:
+    """Estimates the embedding cost of the docs, encoding large inputs in a worker thread."""
+    if sum(len(text) for text in _doc_texts(docs)) > OFFLOAD_CHARS:
+        return await asyncio.to_thread(estimate_embedding_cost, model, docs)
+    return estimate_embedding_cost(model, docs)
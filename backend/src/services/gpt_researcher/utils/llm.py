@@ -1,8 +1,10 @@
 # libraries
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
+import time
 from typing import Optional, Any, Dict
 
 from colorama import Fore, Style
@@ -10,13 +12,23 @@ from langchain.output_parsers import PydanticOutputParser
 from langchain.prompts import PromptTemplate
 
 from src.services.gpt_researcher.orchestrator.prompts import generate_subtopics_prompt
-from .costs import estimate_llm_cost
+from src.services.gpt_researcher.config.config import Config
+from .costs import aestimate_llm_cost
+from .llm_cache import LLMResponseCache, get_llm_response_cache
+from src.services.gpt_researcher.llm_provider.scheduler import Priority
+from src.services.gpt_researcher.llm_provider.routing import TaskClass, get_tier, get_tier_stats, route_model
+from src.services.gpt_researcher.llm_provider.hedging import (
+    backoff_delay, get_latency_tracker, hedged, is_retryable, latency_bucket
+)
+from src.services.gpt_researcher.llm_provider.generic.base import FirstTokenTimeout, PartialResponseError
 from .validators import Subtopics
 
 
 def get_llm(llm_provider, **kwargs):
-    from gpt_researcher.llm_provider import GenericLLMProvider
-    return GenericLLMProvider.from_provider(llm_provider, **kwargs)
+    from src.services.gpt_researcher.llm_provider import GenericLLMProvider
+    return GenericLLMProvider.get_shared(
+        llm_provider, pool_size=getattr(Config(), "llm_pool_size", 20), **kwargs
+    )
 
 
 async def create_chat_completion(
@@ -28,7 +40,9 @@ async def create_chat_completion(
         stream: Optional[bool] = False,
         websocket: Any | None = None,
         llm_kwargs: Dict[str, Any] | None = None,
-        cost_callback: callable = None
+        cost_callback: callable = None,
+        priority: Optional[Priority] = None,
+        task_class: Optional[TaskClass] = None,
 ) -> str:
     """Create a chat completion using the OpenAI API
     Args:
@@ -40,9 +54,50 @@ async def create_chat_completion(
         llm_provider (str, optional): The LLM Provider to use.
         webocket (WebSocket): The websocket used in the currect request,
         cost_callback: Callback function for updating cost
+        priority (Priority, optional): Scheduling class. Defaults to INTERACTIVE for streaming calls, else BACKGROUND.
+        task_class (TaskClass, optional): What the call is for; latency and cost are recorded for its model tier
     Returns:
         str: The response from the chat completion
     """
+    if task_class is None:
+        return await _create_chat_completion(
+            messages, model, temperature, max_tokens, llm_provider, stream, websocket, llm_kwargs, cost_callback, priority
+        )
+
+    call_costs = []
+
+    def track_cost(cost):
+        call_costs.append(cost)
+        if cost_callback:
+            cost_callback(cost)
+
+    started = time.monotonic()
+    failed = False
+    try:
+        return await _create_chat_completion(
+            messages, model, temperature, max_tokens, llm_provider, stream, websocket, llm_kwargs, track_cost, priority
+        )
+    except Exception:
+        failed = True
+        raise
+    finally:
+        get_tier_stats().record(
+            get_tier(task_class, Config()), task_class, time.monotonic() - started, sum(call_costs), failed
+        )
+
+
+async def _create_chat_completion(
+        messages: list,
+        model: Optional[str],
+        temperature: float,
+        max_tokens: Optional[int],
+        llm_provider: Optional[str],
+        stream: Optional[bool],
+        websocket: Any | None,
+        llm_kwargs: Dict[str, Any] | None,
+        cost_callback: callable,
+        priority: Optional[Priority],
+) -> str:
     # validate input
     if model is None:
         raise ValueError("Model cannot be None")
@@ -50,28 +105,115 @@ async def create_chat_completion(
         raise ValueError(
             f"Max tokens cannot be more than 8001, but got {max_tokens}")
 
-    # Get the provider from supported providers
-    provider = get_llm(llm_provider, model=model, temperature=temperature,
-                       max_tokens=max_tokens, **(llm_kwargs or {}))
+    cfg = Config()
+
+    # Non-streaming calls (agent selection, sub-queries, ...) may be served from the response cache
+    response_cache = None if stream else get_llm_response_cache(cfg)
+    cache_key = None
+    if response_cache is not None:
+        cache_key = LLMResponseCache.make_key(llm_provider, model, temperature, messages, llm_kwargs, max_tokens)
+        cached_response = await response_cache.aget(cache_key)
+        if cached_response is not None:
+            return cached_response
+
+    if priority is None:
+        priority = Priority.INTERACTIVE if stream else Priority.BACKGROUND
+    tracker = get_latency_tracker()
+    bucket = latency_bucket(max_tokens)
+    hedge_provider, hedge_model = _get_hedge_target(cfg, llm_provider, model)
+
+    def provider_for(target_provider, target_model):
+        # Get the provider from supported providers
+        return get_llm(target_provider, model=target_model, temperature=temperature, max_tokens=max_tokens,
+                       **((llm_kwargs or {}) if target_provider == llm_provider else {}))
+
+    async def acquire(target_provider, target_model):
+        # Wait for the provider/model rate limits, interactive calls first
+        await provider_for(target_provider, target_model).acquire(messages, priority)
+
+    async def call(target_provider, target_model, first_token_timeout=None):
+        provider = provider_for(target_provider, target_model)
+        started = time.monotonic()
+        if stream:
+            return await provider.stream_response_with_usage(
+                messages, websocket, first_token_timeout=first_token_timeout,
+                on_first_token=lambda: tracker.record(
+                    target_provider, target_model, True, time.monotonic() - started, bucket
+                ),
+                admitted=True,
+            )
+        result = await provider.get_chat_response_with_usage(messages, False, admitted=True)
+        tracker.record(target_provider, target_model, False, time.monotonic() - started, bucket)
+        return result
 
     response = ""
+    last_error = None
+    max_retries = getattr(cfg, "llm_max_retries", 3)
+    # Overall limit for non-streaming calls; a stream cut off mid-way would duplicate output on retry
+    call_timeout = getattr(cfg, "llm_call_timeout", 0) or None
+    reroute = False
     # create response
-    for _ in range(10):  # maximum of 10 attempts
-        response = await provider.get_chat_response(
-            messages, stream, websocket
-        )
+    for attempt in range(max_retries + 1):
+        # Hedge when a call is slower than usual: p95 latency (to first token when streaming) times a margin
+        deadline = None
+        if getattr(cfg, "llm_hedge_deadline", 0):
+            deadline = tracker.deadline(llm_provider, model, bool(stream), cfg.llm_hedge_deadline, bucket=bucket)
+        try:
+            if stream:
+                # Streamed output cannot be duplicated, so a call without a first token in time
+                # is abandoned and only then is the retry sent to the hedge target
+                target = (hedge_provider, hedge_model) if reroute else (llm_provider, model)
+                await acquire(*target)
+                response, usage = await call(*target, first_token_timeout=deadline)
+            else:
+                # Time spent queued for the rate limits does not count towards the hedging deadline
+                await acquire(llm_provider, model)
+
+                async def hedge():
+                    await acquire(hedge_provider, hedge_model)
+                    return await call(hedge_provider, hedge_model)
+
+                response, usage = await hedged(lambda: call(llm_provider, model), hedge, deadline, call_timeout)
+        except Exception as e:
+            last_error = e
+            reroute = isinstance(e, FirstTokenTimeout)
+            if isinstance(e, PartialResponseError) or not is_retryable(e) or attempt == max_retries:
+                break
+            delay = backoff_delay(attempt, getattr(cfg, "llm_backoff_base", 1.0), getattr(cfg, "llm_backoff_max", 20.0))
+            logging.warning(f"Retrying {llm_provider}:{model} in {delay:.1f}s after error: {e!r}")
+            await asyncio.sleep(delay)
+            continue
 
         if cost_callback:
-            llm_costs = estimate_llm_cost(str(messages), response)
+            if not getattr(cfg, "cost_use_provider_usage", True):
+                usage = None
+            llm_costs = await aestimate_llm_cost(messages, response, usage)
             cost_callback(llm_costs)
 
+        if cache_key is not None and response:
+            await response_cache.aset(cache_key, response)
+
         return response
 
-    logging.error(f"Failed to get response from {llm_provider} API")
-    raise RuntimeError(f"Failed to get response from {llm_provider} API")
+    logging.error(f"Failed to get response from {llm_provider} API: {last_error!r}")
+    raise RuntimeError(f"Failed to get response from {llm_provider} API") from last_error
+
 
+def _get_hedge_target(cfg, llm_provider: str, model: str) -> tuple:
+    """
+    Resolves LLM_HEDGE_TARGET: empty repeats the same call, "fast" uses the fast model,
+    and "provider:model" sends the hedge to another provider.
+    """
+    target = getattr(cfg, "llm_hedge_target", "") or ""
+    if target == "fast":
+        return llm_provider, cfg.fast_llm_model
+    if ":" in target:
+        provider, hedge_model = target.split(":", 1)
+        return provider, hedge_model
+    return llm_provider, model
 
-async def construct_subtopics(task: str, data: str, config, subtopics: list = []) -> list:
+
+async def construct_subtopics(task: str, data: str, config, subtopics: list = [], cost_callback: callable = None) -> list:
     """
     Construct subtopics based on the given task and data.
 
@@ -80,6 +222,7 @@ async def construct_subtopics(task: str, data: str, config, subtopics: list = []
         data (str): Additional data for context.
         config: Configuration settings.
         subtopics (list, optional): Existing subtopics. Defaults to [].
+        cost_callback (callable, optional): Callback function for updating cost
 
     Returns:
         list: A list of constructed subtopics.
@@ -94,22 +237,30 @@ async def construct_subtopics(task: str, data: str, config, subtopics: list = []
                 "format_instructions": parser.get_format_instructions()},
         )
 
-        print(f"\n🤖 Calling {config.smart_llm_model}...\n")
-
         temperature = config.temperature
         # temperature = 0 # Note: temperature throughout the code base is currently set to Zero
-        provider = get_llm(config.llm_provider, model=config.smart_llm_model,
-                           temperature=temperature, max_tokens=config.smart_token_limit, **config.llm_kwargs)
-        model = provider.llm
-
-        chain = prompt | model | parser
-
-        output = chain.invoke({
-            "task": task,
-            "data": data,
-            "subtopics": subtopics,
-            "max_subtopics": config.max_subtopics
-        })
+        model_name, max_tokens = route_model(TaskClass.PLANNING, config)
+        print(f"\n🤖 Calling {model_name}...\n")
+        provider = get_llm(config.llm_provider, model=model_name,
+                           temperature=temperature, max_tokens=max_tokens, **config.llm_kwargs)
+
+        messages = [{"role": "user", "content": prompt.format(
+            task=task,
+            data=data,
+            subtopics=subtopics,
+            max_subtopics=config.max_subtopics
+        )}]
+
+        started = time.monotonic()
+        # Goes through the provider so the call is rate limited and scheduled like the others
+        response, usage = await provider.get_chat_response_with_usage(messages, False, priority=Priority.BACKGROUND)
+        if not getattr(config, "cost_use_provider_usage", True):
+            usage = None
+        cost = await aestimate_llm_cost(messages, response, usage)
+        if cost_callback:
+            cost_callback(cost)
+        get_tier_stats().record(get_tier(TaskClass.PLANNING, config), TaskClass.PLANNING, time.monotonic() - started, cost)
+        output = parser.parse(response)
 
         return output
 
@@ -0,0 +1,94 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+from typing import Optional
+
+from .cache import LRUCache, SQLiteCache
+
+_llm_cache = None
+_llm_cache_lock = threading.Lock()
+
+
+def _serialize_message(message):
+    # Messages are OpenAI-style dicts or LangChain message objects
+    if isinstance(message, dict):
+        return [message.get("role"), message.get("content")]
+    return [getattr(message, "type", None), getattr(message, "content", str(message))]
+
+
+class LLMResponseCache:
+    """
+    Exact-match cache for non-streaming chat completions.
+
+    Keys hash the provider, model, temperature, max tokens, extra model kwargs and messages.
+    Responses live in an in-memory LRU tier and, when a path is given, in SQLite
+    so they survive restarts and are shared by every process on the host.
+    Async code uses `aget`/`aset`, which keep the SQLite tier off the event loop.
+    """
+
+    def __init__(self, ttl: float = 86400, max_size: int = 1000, path: Optional[str] = None):
+        self.ttl = ttl
+        self.memory = LRUCache(max_size=max_size, ttl=ttl)
+        self.store = SQLiteCache(path, table="llm_responses", max_entries=max_size * 10) if path else None
+
+    @staticmethod
+    def make_key(provider: str, model: str, temperature: float, messages: list, llm_kwargs: Optional[dict] = None,
+                 max_tokens: Optional[int] = None) -> str:
+        payload = json.dumps(
+            [provider, model, temperature, max_tokens, llm_kwargs or {}, [_serialize_message(m) for m in messages]],
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        response = self.memory.get(key)
+        if response is None and self.store is not None:
+            response = self.store.get(key)
+            if response is not None:
+                self.memory.set(key, response)
+        return response
+
+    def set(self, key: str, response: str) -> None:
+        self.memory.set(key, response)
+        if self.store is not None:
+            self.store.set(key, response, ttl=self.ttl)
+
+    async def aget(self, key: str) -> Optional[str]:
+        response = self.memory.get(key)
+        if response is None and self.store is not None:
+            response = await asyncio.to_thread(self.store.get, key)
+            if response is not None:
+                self.memory.set(key, response)
+        return response
+
+    async def aset(self, key: str, response: str) -> None:
+        self.memory.set(key, response)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.set, key, response, ttl=self.ttl)
+
+
+def get_llm_response_cache(cfg=None) -> Optional[LLMResponseCache]:
+    """
+    Returns the process-wide LLM response cache configured by LLM_CACHE
+    ("memory" or "sqlite"), or None when the cache is disabled (the default).
+    """
+    global _llm_cache
+    backend = getattr(cfg, "llm_cache", None)
+    if not backend or backend == "none":
+        return None
+    with _llm_cache_lock:
+        if _llm_cache is None:
+            path = None
+            if backend == "sqlite":
+                path = os.path.join(getattr(cfg, "llm_cache_path", None) or "./.cache/llm", "llm_cache.db")
+            elif backend != "memory":
+                raise ValueError(f"Unknown LLM cache backend: {backend}")
+            _llm_cache = LLMResponseCache(
+                ttl=getattr(cfg, "llm_cache_ttl", 86400),
+                max_size=getattr(cfg, "llm_cache_size", 1000),
+                path=path,
+            )
+    return _llm_cache
@@ -6,6 +6,7 @@ from langgraph.graph import StateGraph, END
 
 from .utils.views import print_agent_output
 from .utils.llms import call_model
+from ...gpt_researcher.llm_provider.routing import TaskClass
 from ..memory.draft import DraftState
 from . import ResearchAgent, ReviewerAgent, ReviserAgent
 
@@ -40,6 +41,7 @@ class EditorAgent:
             prompt=prompt,
             model=task.get("model"),
             response_format="json",
+            task_class=TaskClass.PLANNING,
         )
 
         return {
@@ -1,5 +1,6 @@
 from .utils.views import print_agent_output
 from .utils.llms import call_model
+from ...gpt_researcher.llm_provider.routing import TaskClass
 import json
 
 sample_revision_notes = """
@@ -48,6 +49,7 @@ You MUST return nothing but a JSON in the following format:
             prompt,
             model=task.get("model"),
             response_format="json",
+            task_class=TaskClass.WRITING,
         )
         return response
 
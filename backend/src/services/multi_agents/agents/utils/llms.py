@@ -5,6 +5,8 @@ from langchain_community.adapters.openai import convert_openai_messages
 from ....gpt_researcher.config.config import Config
 from ....gpt_researcher.orchestrator.actions.query_processing import handle_json_error
 from ....gpt_researcher.utils.llm import create_chat_completion
+from ....gpt_researcher.llm_provider.scheduler import Priority
+from ....gpt_researcher.llm_provider.routing import TaskClass, route_model
 
 from loguru import logger
 
@@ -13,6 +15,7 @@ async def call_model(
     prompt: list,
     model: str,
     response_format: str = None,
+    task_class: TaskClass = TaskClass.REVIEWING,
 ):
 
     optional_params = {}
@@ -21,6 +24,8 @@ async def call_model(
 
     cfg = Config()
     lc_messages = convert_openai_messages(prompt)
+    # The task's model is this run's smart tier
+    model, max_tokens = route_model(task_class, cfg, smart_model=model)
 
     try:
         response = await create_chat_completion(
@@ -28,7 +33,10 @@ async def call_model(
             messages=lc_messages,
             temperature=0,
             llm_provider=cfg.llm_provider,
+            max_tokens=max_tokens,
             llm_kwargs=cfg.llm_kwargs,
+            priority=Priority.REVIEW,
+            task_class=task_class,
             # cost_callback=cost_callback,
         )
 
@@ -2,6 +2,7 @@ from datetime import datetime
 import json5 as json
 from .utils.views import print_agent_output
 from .utils.llms import call_model
+from ...gpt_researcher.llm_provider.routing import TaskClass
 
 sample_json = """
 {
@@ -63,6 +64,7 @@ class WriterAgent:
             prompt,
             task.get("model"),
             response_format="json",
+            task_class=TaskClass.WRITING,
         )
         return response
 
@@ -88,6 +90,7 @@ Headers Data: {headers}\n
             prompt,
             task.get("model"),
             response_format="json",
+            task_class=TaskClass.WRITING,
         )
         return {"headers": response}
 
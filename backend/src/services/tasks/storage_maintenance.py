@@ -9,10 +9,12 @@ from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from firebase_admin import firestore
 from ..firebase.firebase import db, storage_bucket
+from ..firebase.firestore_repository import firestore_repo, run_blocking
 from ..firebase.storage_utils import (
     cleanup_expired_files,
-    calculate_user_storage_usage,
+    adjust_storage_usage,
     get_user_storage_quota,
+    reconcile_user_storage_usage,
     StorageQuotaExceeded
 )
 from prometheus_client import Gauge, Counter, Histogram
@@ -62,7 +64,7 @@ async def get_active_users(days: int = 30) -> List[str]:
         
         filter_condition = firestore.FieldFilter('last_login', '>=', cutoff.timestamp())
         query = users_ref.where(filter=filter_condition)
-        users = query.get()
+        users = await firestore_repo.query(query)
         
         user_ids = [user.id for user in users]
         logger.info(f"Found {len(user_ids)} active users")
@@ -78,18 +80,20 @@ async def cleanup_orphaned_storage(user_id: str) -> int:
     try:
         # List all storage files
         prefix = f"users/{user_id}/"
-        blobs = storage_bucket.list_blobs(prefix=prefix)
+        blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix=prefix)))
         deleted_count = 0
 
         # Get all valid document references
-        docs = await db.collection('users').document(user_id)\
-                      .collection('reports').get()
+        docs = await firestore_repo.query(
+            db.collection('users').document(user_id).collection('reports')
+        )
         valid_paths = {doc.get('file_path') for doc in docs}
 
         # Delete orphaned files
         for blob in blobs:
             if blob.name not in valid_paths:
-                blob.delete()
+                await run_blocking('storage.delete', blob.delete)
+                await adjust_storage_usage(blob.name, -(blob.size or 0))
                 deleted_count += 1
                 cleanup_files.inc()
 
@@ -100,11 +104,20 @@ async def cleanup_orphaned_storage(user_id: str) -> int:
         maintenance_errors.labels(task='cleanup_orphaned_storage').inc()
         return 0
 
-async def update_storage_metrics(user_id: str) -> Dict[str, int]:
-    """Update storage metrics for a user"""
+async def reconcile_storage_usage(user_id: str) -> Optional[int]:
+    """Recompute a user's storage usage counter from Storage to correct any drift"""
     try:
-        usage = await calculate_user_storage_usage(user_id)
-        quota = await get_user_storage_quota(user_id)
+        return await reconcile_user_storage_usage(user_id)
+    except Exception as e:
+        logger.error(f"Error reconciling storage usage for user {user_id}: {str(e)}")
+        maintenance_errors.labels(task='reconcile_storage_usage').inc()
+        return None
+
+async def update_storage_metrics(user_id: str, user_data: Optional[Dict] = None) -> Dict[str, int]:
+    """Update storage metrics for a user; `user_data` saves re-reading an already loaded user document"""
+    try:
+        quota = await get_user_storage_quota(user_id, user_data)
+        usage = quota['used']
 
         storage_usage.labels(user_id=user_id).set(usage)
         storage_quota.labels(user_id=user_id).set(quota['total'])
@@ -116,11 +129,13 @@ async def update_storage_metrics(user_id: str) -> Dict[str, int]:
         }
 
         # Store metrics in Firestore
-        await db.collection('users').document(user_id)\
-               .collection('storage_metrics').document().set({
-            'timestamp': firestore.SERVER_TIMESTAMP,
-            'metrics': metrics
-        })
+        await firestore_repo.set(
+            db.collection('users').document(user_id).collection('storage_metrics').document(),
+            {
+                'timestamp': firestore.SERVER_TIMESTAMP,
+                'metrics': metrics
+            }
+        )
 
         return metrics
 
@@ -133,7 +148,7 @@ async def count_user_files(user_id: str) -> int:
     """Count total files for a user"""
     try:
         prefix = f"users/{user_id}/"
-        blobs = list(storage_bucket.list_blobs(prefix=prefix))
+        blobs = await run_blocking('storage.list_blobs', lambda: list(storage_bucket.list_blobs(prefix=prefix)))
         return len(blobs)
     except Exception as e:
         logger.error(f"Error counting files for user {user_id}: {str(e)}")
@@ -153,7 +168,11 @@ async def async_maintenance_routine():
     active_users = await get_active_users()
     logger.info(f"Running maintenance for {len(active_users)} active users")
 
-    for user_id in active_users:
+    # Read all active user documents in one batched round-trip
+    user_refs = [db.collection('users').document(user_id) for user_id in active_users]
+    user_snapshots = await firestore_repo.get_all(user_refs)
+
+    for user_id, user_ref in zip(active_users, user_refs):
         try:
             # Clean up expired files
             expired_count = await cleanup_expired_files()
@@ -163,8 +182,18 @@ async def async_maintenance_routine():
             orphaned_count = await cleanup_orphaned_storage(user_id)
             logger.info(f"Cleaned up {orphaned_count} orphaned files for user {user_id}")
 
+            # Reconcile the incrementally maintained usage counter
+            snapshot = user_snapshots.get(user_ref.path)
+            user_data = (snapshot.to_dict() or {}) if snapshot is not None and snapshot.exists else None
+            usage = await reconcile_storage_usage(user_id)
+            if user_data is not None and usage is not None:
+                user_data = {
+                    **user_data,
+                    'storage_quota': {**user_data.get('storage_quota', {}), 'used': usage}
+                }
+
             # Update metrics
-            metrics = await update_storage_metrics(user_id)
+            metrics = await update_storage_metrics(user_id, user_data)
             logger.info(f"Updated storage metrics for user {user_id}: {metrics}")
 
         except Exception as e:
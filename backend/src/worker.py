@@ -0,0 +1,86 @@
+import asyncio
+import os
+import socket
+import sys
+import time
+from pathlib import Path
+
+# Add backend directory to Python path
+backend_root = str(Path(__file__).resolve().parents[1])
+src_root = str(Path(__file__).resolve().parent)
+sys.path.extend([backend_root, src_root])
+
+# Set environment variable for imports
+os.environ["PYTHONPATH"] = f"{backend_root}:{src_root}"
+
+# Load environment variables from .env files
+from dotenv import load_dotenv
+env_path = os.path.join(backend_root, '.env.backend')
+load_dotenv(env_path)
+
+from src.api.controllers.job_broker import get_job_broker
+from src.api.controllers.job_engine import (
+    JOB_ABANDON_TIMEOUT,
+    JOB_MAX_WORKERS,
+    JOB_POLL_INTERVAL,
+    JOB_RETENTION,
+    BrokerEventStream,
+    JobEngine,
+    ResearchJob,
+)
+from src.services.firebase.token_ledger import get_token_ledger
+from src.services.gpt_researcher.scraper.scraper import close_http_session
+
+
+async def run_worker():
+    """
+    Claims research jobs from the job broker and runs up to JOB_MAX_WORKERS of them at once.
+
+    Run one worker process per core next to the API processes, with the same JOB_BROKER
+    settings, e.g. `JOB_BROKER=sqlite python backend/src/worker.py`.
+    """
+    broker = get_job_broker()
+    if broker is None:
+        raise SystemExit("Set JOB_BROKER (e.g. JOB_BROKER=sqlite) to run research workers")
+
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    # Abandoned jobs are found through the broker below, not by local subscribers
+    engine = JobEngine(max_workers=JOB_MAX_WORKERS, max_jobs_per_user=0, abandon_timeout=0)
+    last_pruned_at = 0.0
+    print(f"Research worker {worker_id} started with {JOB_MAX_WORKERS} slots")
+
+    try:
+        while True:
+            running = [job.id for job in engine.active_jobs()]
+            await asyncio.to_thread(broker.heartbeat, running)
+            for job_id in await asyncio.to_thread(broker.jobs_to_cancel, running, JOB_ABANDON_TIMEOUT):
+                if await engine.cancel(job_id):
+                    print(f"Cancelling research job {job_id}")
+
+            while len(engine.active_jobs()) < engine.max_workers:
+                claimed = await asyncio.to_thread(broker.claim, worker_id)
+                if claimed is None:
+                    break
+                job_id, user_id, params = claimed
+                print(f"Running research job {job_id} for user {user_id}")
+                engine.start(ResearchJob(
+                    user_id, params, job_id=job_id, events=BrokerEventStream(broker, job_id, user_id)
+                ))
+
+            if time.time() - last_pruned_at > JOB_RETENTION:
+                await asyncio.to_thread(broker.prune, JOB_RETENTION)
+                last_pruned_at = time.time()
+
+            await asyncio.sleep(JOB_POLL_INTERVAL * 5)
+    finally:
+        running = [job for job in engine.active_jobs() if job.task is not None]
+        for job in running:
+            await engine.cancel(job.id)
+        # Let cancelled jobs write their final status to the broker
+        await asyncio.gather(*(job.task for job in running), return_exceptions=True)
+        await get_token_ledger().flush()
+        await close_http_session()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())